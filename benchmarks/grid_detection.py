@@ -0,0 +1,50 @@
+"""
+Regression benchmark for grid detection: every screenshot in examples/ is rescaled to a range of zoom levels
+(including some that stretch one axis more than the other) and must read back as the same board as the original.
+
+Run from the repository root with `python -m benchmarks.grid_detection`.
+"""
+from PIL import Image
+import numpy as np
+import os
+import time
+from package.image_io import crop_board_image, image_to_board, load_board_from_image
+
+EXAMPLES_FOLDER = os.path.join(os.path.dirname(__file__), "..", "examples")
+SCALES = [(0.5, 0.5), (0.75, 0.75), (0.9, 0.9), (1, 1), (1.1, 1.1), (1.3, 1.3), (1.5, 1.5), (2, 2), (3, 3), (4, 4),
+          (1.5, 1), (1, 1.3), (2, 1.5), (0.8, 1.2)]
+
+
+def rescaled_corpus():
+    """Yields (name, x scale, y scale, image, expected board string) for every example at every scale."""
+    for filename in sorted(os.listdir(EXAMPLES_FOLDER)):
+        if not filename.endswith(".png"):
+            continue
+        path = os.path.join(EXAMPLES_FOLDER, filename)
+        expected = str(load_board_from_image(path))
+        original = Image.open(path).convert("RGB")
+        for x_scale, y_scale in SCALES:
+            size = (round(original.width * x_scale), round(original.height * y_scale))
+            yield filename[:-4], x_scale, y_scale, np.array(original.resize(size, Image.BILINEAR)), expected
+
+
+def main():
+    failures = 0
+    total_time = 0.0
+    for name, x_scale, y_scale, image, expected in rescaled_corpus():
+        start = time.perf_counter()
+        try:
+            result = str(image_to_board(crop_board_image(image)))
+            status = "ok" if result == expected else "MISMATCH"
+        except ValueError as e:
+            status = f"ERROR ({e})"
+        elapsed = time.perf_counter() - start
+        total_time += elapsed
+        if status != "ok":
+            failures += 1
+        print(f"{name:>12} {x_scale:>4}x{y_scale:<4} {elapsed * 1000:8.1f}ms  {status}")
+    print(f"{failures} failures, {total_time:.2f}s total")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Import time benchmark: imports each entry point in a fresh interpreter with `python -X importtime`,
+reports how long it took, and fails if any of them loaded one of the heavy optional backends.
+Then reads benchmarks/corpus.txt and solves it with `package.batch --corpus` with those backends made
+unimportable, as on an install with only the standard library, and fails if either breaks.
+
+Run from the repository root with `python -m benchmarks.import_time`.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+# modules that must import with only the standard library
+LIGHTWEIGHT_MODULES = ["package.Solver", "package.RectangleSolver", "package.io", "package.encoding", "package.PuzzleCorpus"]
+HEAVY_MODULES = ["numpy", "PIL", "selenium"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CORPUS = os.path.join(ROOT, "benchmarks", "corpus.txt")
+# seconds per puzzle for the batch check, which is about reading the corpus rather than solving it
+BATCH_TIMEOUT = 2
+
+
+def import_time(module):
+    """Cumulative import time of the module in microseconds, and the heavy modules that ended up loaded."""
+    check = f"import sys, {module}; print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", check], capture_output=True, text=True, check=True)
+    total = 0
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line.split("|")
+        if line.startswith("import time:") and len(fields) == 3 and fields[2].strip() == module:
+            total = int(fields[1])
+    loaded = [name for name in result.stdout.strip().split(",") if name]
+    return total, loaded
+
+
+def run_without_backends(args):
+    """
+    Runs python with args from the repository root, with the heavy modules made unimportable in it and in every
+    process it starts, through a sitecustomize module on PYTHONPATH.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        with open(os.path.join(directory, "sitecustomize.py"), "w") as file:
+            file.write(f"import sys\nsys.modules.update(dict.fromkeys({HEAVY_MODULES!r}))\n")
+        path = [directory, ROOT] + [entry for entry in [os.environ.get("PYTHONPATH")] if entry]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path))
+        return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True)
+
+
+def read_corpus_without_backends():
+    """The number of boards in the benchmark corpus, read without the heavy modules, or the error."""
+    check = ("from package.PuzzleCorpus import PuzzleCorpus\n"
+             f"with PuzzleCorpus({CORPUS!r}) as corpus:\n"
+             "    print(sum(1 for _ in corpus))")
+    result = run_without_backends(["-c", check])
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    return int(result.stdout), None
+
+
+def batch_without_backends():
+    """The results of batch --corpus on the benchmark corpus run without the heavy modules, or the error."""
+    result = run_without_backends(["-m", "package.batch", "--corpus", CORPUS, "--workers", "2",
+                                   "--timeout", str(BATCH_TIMEOUT)])
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1]
+    results = [json.loads(line) for line in result.stdout.splitlines()]
+    errors = [f"{result['id']}: {result['error']}" for result in results if result["status"] == "error"]
+    return results, "; ".join(errors) or None
+
+
+def main():
+    failures = 0
+    for module in LIGHTWEIGHT_MODULES:
+        total, loaded = import_time(module)
+        status = "ok" if not loaded else f"LOADED {', '.join(loaded)}"
+        if loaded:
+            failures += 1
+        print(f"{module:>24} {total / 1000:8.1f}ms  {status}")
+    count, error = read_corpus_without_backends()
+    if error:
+        failures += 1
+    print(f"{'PuzzleCorpus':>24} {'':10}  {f'FAILED {error}' if error else f'ok, read {count} boards'}")
+    results, error = batch_without_backends()
+    if error:
+        failures += 1
+    print(f"{'batch --corpus':>24} {'':10}  {f'FAILED {error}' if error else f'ok, {len(results)} results'}")
+    if failures:
+        sys.exit(f"{failures} checks pulled in or needed optional backends")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Benchmark suite: solves every puzzle in benchmarks/corpus.txt with the chosen engine and options,
+each in a fresh process, and records wall time, search counters and peak memory as JSON.
+Given a baseline from an earlier run, it flags every puzzle that got slower, searched more or used more memory.
+The corpus holds the example boards and seeded package.generator puzzles from 10x10 to 20x20; its comments say
+how each group was made, so it can be rebuilt.
+
+Run from the repository root, e.g.
+    python -m benchmarks.suite --sizes 5 10 --output results.json
+    python -m benchmarks.suite --engine solver --option break_symmetry=false --baseline results.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import subprocess
+import sys
+import time
+import tracemalloc
+from package.PuzzleCorpus import PuzzleCorpus
+from package.encoding import decode_board, encode_board
+from package.MemoryBudget import MemoryBudget
+from package.RectangleSolver import RectangleSolver
+from package.Solver import Solver
+
+CORPUS_PATH = os.path.join(os.path.dirname(__file__), "corpus.txt")
+DEFAULT_TIMEOUT = 600
+# relative slowdown that counts as a regression, and the absolute slowdown below which timing noise is ignored
+DEFAULT_TOLERANCE = 0.2
+MIN_REGRESSION_SECONDS = 0.05
+COMPARED_METRICS = ["wall_time", "nodes", "backtracks", "propagations", "peak_memory"]
+
+
+def load_corpus(path=CORPUS_PATH):
+    """(name, encoded board) for every puzzle in the corpus file, a PuzzleCorpus whose boards are named."""
+    with PuzzleCorpus(path) as corpus:
+        return [(corpus.name(i) or str(i), encode_board(corpus[i])) for i in range(len(corpus))]
+
+
+def run_solver(board, options):
+    options = dict(options)
+    # given in bytes, e.g. --option memory_budget=268435456
+    if "memory_budget" in options:
+        options["memory_budget"] = MemoryBudget(options["memory_budget"])
+    solver = Solver(board, **options)
+    solver.solve()
+    stats = solver.stats.to_dict()
+    metrics = {"solutions": solver.solution_count, "search_status": solver.status}
+    metrics.update((key, stats[key]) for key in ["nodes", "decisions", "propagations", "backtracks", "max_depth", "rules"])
+    return metrics
+
+
+def run_rectangles(board, options):
+    if options:
+        raise ValueError(f"RectangleSolver takes no options, got {options}")
+    return {"solutions": len(RectangleSolver(board).solve())}
+
+
+ENGINES = {"solver": run_solver, "rectangles": run_rectangles}
+
+
+def _run_in_child(engine, encoded, options, trace_memory, results):
+    try:
+        board = decode_board(encoded)
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        metrics = ENGINES[engine](board, options)
+        metrics["wall_time"] = time.perf_counter() - start
+        if trace_memory:
+            metrics["peak_memory"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        metrics["status"] = "ok"
+    except Exception as e:
+        metrics = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+    results.put(metrics)
+
+
+def _run_isolated(engine, encoded, options, trace_memory, timeout):
+    """Runs one solve in a fresh process, so caches and memory from earlier puzzles don't carry over."""
+    results = multiprocessing.Queue()
+    process = multiprocessing.Process(target=_run_in_child, args=(engine, encoded, options, trace_memory, results))
+    process.start()
+    try:
+        return results.get(timeout=timeout)
+    except queue.Empty:
+        return {"status": "timeout"}
+    finally:
+        if process.is_alive():
+            process.terminate()
+        process.join()
+
+
+def run_benchmark(name, encoded, engine, options, timeout=DEFAULT_TIMEOUT, measure_memory=True):
+    """
+    Times the solve without tracing, then (if measure_memory) repeats it under tracemalloc for the peak memory,
+    since tracing slows everything down too much to time the same run.
+    """
+    result = {"name": name, "size": decode_board(encoded).size, "engine": engine, "options": options}
+    result.update(_run_isolated(engine, encoded, options, False, timeout))
+    if measure_memory and result["status"] == "ok":
+        traced = _run_isolated(engine, encoded, options, True, timeout)
+        result["peak_memory"] = traced.get("peak_memory")
+    return result
+
+
+def run_key(result):
+    return result["name"], result["engine"], json.dumps(result["options"], sort_keys=True)
+
+
+def find_regressions(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Descriptions of every way a run did worse than the baseline run of the same puzzle and configuration."""
+    baseline_runs = {run_key(run): run for run in baseline["runs"]}
+    regressions = []
+    for result in results["runs"]:
+        base = baseline_runs.get(run_key(result))
+        if base is None:
+            continue
+        if base["status"] == "ok" and result["status"] != "ok":
+            regressions.append(f"{result['name']}: {result['status']} (was ok)")
+            continue
+        if base.get("search_status") == "complete" and result.get("search_status", "complete") != "complete":
+            regressions.append(f"{result['name']}: search {result['search_status']} (was complete)")
+        for metric in COMPARED_METRICS:
+            new, old = result.get(metric), base.get(metric)
+            if new is None or old is None or new <= old * (1 + tolerance):
+                continue
+            if metric == "wall_time" and new - old < MIN_REGRESSION_SECONDS:
+                continue
+            regressions.append(f"{result['name']}: {metric} {old} -> {new} ({new / old - 1:+.0%})" if old
+                               else f"{result['name']}: {metric} {old} -> {new}")
+    return regressions
+
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count(), "commit": commit}
+
+
+def parse_option(text):
+    """key=value, with the value read as JSON when it is one (true, 3, ...) and as a string otherwise."""
+    key, separator, value = text.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"Expected key=value, got '{text}'")
+    try:
+        return key, json.loads(value)
+    except json.JSONDecodeError:
+        return key, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the solver over the puzzle corpus.")
+    parser.add_argument("--corpus", default=CORPUS_PATH)
+    parser.add_argument("--sizes", type=int, nargs="*", help="only run puzzles of these sizes")
+    parser.add_argument("--names", nargs="*", help="only run these puzzles")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="solver")
+    parser.add_argument("--option", type=parse_option, action="append", default=[],
+                        help="keyword argument for the engine, e.g. break_symmetry=false (repeatable)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds per puzzle")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    options = dict(args.option)
+    runs = []
+    for name, encoded in load_corpus(args.corpus):
+        if args.names and name not in args.names:
+            continue
+        if args.sizes and decode_board(encoded).size not in args.sizes:
+            continue
+        result = run_benchmark(name, encoded, args.engine, options, args.timeout, not args.no_memory)
+        runs.append(result)
+        memory = f"{result['peak_memory'] / 2 ** 20:7.1f}MiB" if result.get("peak_memory") is not None else ""
+        timing = f"{result['wall_time']:8.3f}s" if "wall_time" in result else ""
+        print(f"{name:>16} {result['size']:>3} {result['status']:>8} {timing} "
+              f"nodes {result.get('nodes', '-')} backtracks {result.get('backtracks', '-')} {memory}")
+
+    results = {"environment": environment(), "runs": runs}
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
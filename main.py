@@ -1,13 +1,6 @@
-from package.io import scrape_board, load_board_from_image, load_board_from_text
-from package.Solver import Solver
+from package.batch import main
 
-# board = scrape_board(5)
-# board = load_board_from_text("error_board.txt")
-board = load_board_from_image("examples/empty_10.png")
-
-
-print(board)
-
-solns = Solver(board).solve()
-
-print(solns[0])
+# e.g. python main.py examples/error_board.txt examples/*.png --timeout 30
+# see python main.py --help for every option
+if __name__ == "__main__":
+    main()
@@ -2,11 +2,18 @@ from __future__ import annotations
 from typing import List, Tuple, Iterator
 
 from package.Loc import Loc
-from package.Cell import Cell, Cells
+from package.Cell import CELL_CODES, CELL_TO_CODE, Cell, Cells
 
 type LocCell = Tuple[Loc, Cell]
 type BoardSection = Cell | List[Cell] | List[List[Cell]]
 
+# the two cells held by every byte of a snapshot, None for bytes holding a code that doesn't exist
+_BYTE_TO_CELLS = [
+    (CELL_CODES[byte >> 4], CELL_CODES[byte & 0x0F]) if byte >> 4 < len(CELL_CODES) and byte & 0x0F < len(CELL_CODES)
+    else None
+    for byte in range(256)
+]
+
 class Board:
     BORDER_CHAR = '▢'
     PRINT_SPACING = 1
@@ -83,6 +90,31 @@ class Board:
         new_board = [[cell for cell in row] for row in self.board]
         return Board(new_board)
 
+    @staticmethod
+    def byte_size(size: int) -> int:
+        """Length of to_bytes() for a board of the given size: the size, then two cells per byte."""
+        return 1 + (size * size + 1) // 2
+
+    def to_bytes(self) -> bytes:
+        """A snapshot of the board, 4 bits per cell (codes from CELL_CODES) column by column, as stored."""
+        codes = [CELL_TO_CODE[cell] for column in self.board for cell in column]
+        if len(codes) % 2:
+            codes.append(0)
+        return bytes([self.size]) + bytes(high << 4 | low for high, low in zip(codes[0::2], codes[1::2]))
+
+    @staticmethod
+    def from_bytes(data: bytes | memoryview) -> Board:
+        size = data[0]
+        if len(data) < Board.byte_size(size):
+            raise ValueError(f"Snapshot of {len(data)} bytes is too short for a board of size {size}")
+        cells = []
+        for byte in data[1:Board.byte_size(size)]:
+            pair = _BYTE_TO_CELLS[byte]
+            if pair is None:
+                raise ValueError(f"Unknown cell code in snapshot byte {byte:#04x}")
+            cells.extend(pair)
+        return Board([cells[x * size:(x + 1) * size] for x in range(size)])
+
 
 def undecided_board(size: int) -> Board:
     """Create an empty board of the given size."""
@@ -0,0 +1,153 @@
+from __future__ import annotations
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Callable, Iterable, Iterator, List
+from PIL import Image
+from selenium import webdriver
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions
+from selenium.webdriver.support.ui import WebDriverWait
+import numpy as np
+import atexit
+import threading
+from package.Board import Board
+from package.image_io import image_to_board
+from package.io import PUZZLE_BOARD_CSS_SELECTOR, SHAKASHAKA_BASE_URL, generate_shakashaka_puzzle_url
+
+DEFAULT_POOL_SIZE = 2
+PAGE_LOAD_TIMEOUT = 10
+WINDOW_SIZE = (2000, 2000)
+
+_default_pool: BrowserPool | None = None
+_default_pool_lock = threading.Lock()
+
+
+def headless_chrome() -> webdriver.Chrome:
+    options = Options()
+    options.add_argument("--headless")
+    options.add_argument(f"--window-size={WINDOW_SIZE[0]},{WINDOW_SIZE[1]}")
+    return webdriver.Chrome(options=options)
+
+
+class BrowserPool:
+    """
+    A fixed number of warm headless browser sessions shared by every scrape.
+    Sessions are started on first use and reused until the pool is closed; a session that errors is
+    thrown away and replaced on the next checkout. With every session in use, a checkout waits until one is
+    returned or thrown away, or the pool is closed. Screenshots never touch the disk.
+
+    base_url points the pool at a different copy of the site, e.g. a local static stand-in.
+    driver_factory creates a session and defaults to headless Chrome.
+    """
+    def __init__(self, size: int = DEFAULT_POOL_SIZE, base_url: str = SHAKASHAKA_BASE_URL,
+                 timeout: float = PAGE_LOAD_TIMEOUT, driver_factory: Callable[[], webdriver.Remote] = headless_chrome):
+        if size < 1:
+            raise ValueError(f"Pool size must be positive, got {size}")
+        self.size = size
+        self.base_url = base_url
+        self.timeout = timeout
+        self.driver_factory = driver_factory
+        # guards _idle, _started and _closed, and wakes checkouts waiting for a session
+        self._condition = threading.Condition()
+        self._idle: List[webdriver.Remote] = []
+        self._started = 0
+        self._closed = False
+
+    @contextmanager
+    def session(self) -> Iterator[webdriver.Remote]:
+        """Checks out a session for the duration of the block, starting one if the pool isn't full yet."""
+        driver = self._checkout()
+        try:
+            yield driver
+        except WebDriverException:
+            self._discard(driver)
+            raise
+        except BaseException:
+            self._release(driver)
+            raise
+        self._release(driver)
+
+    def _checkout(self) -> webdriver.Remote:
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise ValueError("Browser pool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._started < self.size:
+                    self._started += 1
+                    break
+                self._condition.wait()
+        try:
+            return self.driver_factory()
+        except Exception:
+            with self._condition:
+                self._started -= 1
+                self._condition.notify()
+            raise
+
+    def _release(self, driver: webdriver.Remote) -> None:
+        with self._condition:
+            if not self._closed:
+                self._idle.append(driver)
+                self._condition.notify()
+                return
+        self._discard(driver)
+
+    def _discard(self, driver: webdriver.Remote) -> None:
+        with self._condition:
+            self._started -= 1
+            self._condition.notify()
+        try:
+            driver.quit()
+        except WebDriverException:
+            pass
+
+    def capture(self, url: str) -> np.ndarray:
+        """Loads the page and returns a screenshot of just the puzzle board as an RGB array."""
+        with self.session() as driver:
+            driver.get(url)
+            # wait until the board is laid out instead of sleeping for a fixed time
+            board_element = WebDriverWait(driver, self.timeout).until(
+                expected_conditions.visibility_of_element_located((By.CSS_SELECTOR, PUZZLE_BOARD_CSS_SELECTOR))
+            )
+            WebDriverWait(driver, self.timeout).until(
+                lambda _: board_element.size['width'] > 0 and board_element.size['height'] > 0
+            )
+            png = board_element.screenshot_as_png
+        return np.array(Image.open(BytesIO(png)).convert("RGB"))
+
+    def scrape_board(self, grid_size: int) -> Board:
+        return image_to_board(self.capture(generate_shakashaka_puzzle_url(grid_size, self.base_url)))
+
+    def scrape_boards(self, grid_sizes: Iterable[int]) -> List[Board]:
+        """Scrapes one board per requested size, using every session in the pool at once. Results are in request order."""
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            return list(executor.map(self.scrape_board, grid_sizes))
+
+    def close(self) -> None:
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._condition.notify_all()
+        for driver in idle:
+            driver.quit()
+
+    def __enter__(self) -> BrowserPool:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def default_browser_pool() -> BrowserPool:
+    """The pool scrape_board uses when it isn't given one, started on first use and closed at exit."""
+    global _default_pool
+    with _default_pool_lock:
+        if _default_pool is None:
+            _default_pool = BrowserPool()
+            atexit.register(_default_pool.close)
+        return _default_pool
@@ -43,3 +43,15 @@ class Cells:
     OPTIONS = {DECIDED_EMPTY, *TRIANGLES}
     ALL = {ZERO, ONE, TWO, THREE, FOUR, BLACK, UNDECIDED, DECIDED_EMPTY, LOWER_LEFT, LOWER_RIGHT, UPPER_LEFT, UPPER_RIGHT}
 
+
+# 4 bit codes for cells in binary formats; the order is part of those formats and must not change
+CELL_CODES = [
+    Cells.UNDECIDED, Cells.DECIDED_EMPTY, Cells.BLACK,
+    Cells.ZERO, Cells.ONE, Cells.TWO, Cells.THREE, Cells.FOUR,
+    Cells.LOWER_LEFT, Cells.LOWER_RIGHT, Cells.UPPER_LEFT, Cells.UPPER_RIGHT,
+]
+CELL_TO_CODE = {cell: code for code, cell in enumerate(CELL_CODES)}
+
+# bit i of an option mask is set when OPTION_CODES[i] is still possible; the order is part of the format
+OPTION_CODES = [Cells.DECIDED_EMPTY, Cells.LOWER_LEFT, Cells.LOWER_RIGHT, Cells.UPPER_LEFT, Cells.UPPER_RIGHT]
+OPTION_TO_BIT = {cell: 1 << i for i, cell in enumerate(OPTION_CODES)}
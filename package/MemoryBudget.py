@@ -0,0 +1,94 @@
+from __future__ import annotations
+from typing import Any, Dict
+import os
+import sys
+import threading
+import time
+
+# how a search stands against its budget, from least to most memory used; levels only ever go up during a solve
+NORMAL = 0
+# no more threads are started and lookahead caches are dropped
+SEQUENTIAL = 1
+# solutions are counted instead of kept
+COUNT_ONLY = 2
+# the search stops
+EXCEEDED = 3
+
+# what solve() and count_solutions() leave in solver.status
+COMPLETE = "complete"
+COUNTED = "count_only"
+MEMORY_EXCEEDED = "memory_exceeded"
+
+# seconds between memory readings
+DEFAULT_CHECK_INTERVAL = 0.05
+
+
+def process_memory() -> int:
+    """
+    Bytes of memory the process holds: its resident set size where /proc has it, and otherwise its peak
+    resident set size, which never goes down but is the best the standard library offers elsewhere.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryBudget:
+    """
+    A limit in bytes on the memory of the process a solve runs in, shared by a solver and every copy of it.
+    As the process passes each fraction of the limit, the search gives something up: at sequential_at it stops
+    starting threads and drops its lookahead caches, at count_only_at it counts the solutions it finds instead
+    of keeping them, and at the limit it stops. Memory is read at most every check_interval seconds.
+    """
+    def __init__(self, limit: int, sequential_at: float = 0.7, count_only_at: float = 0.85,
+                 check_interval: float = DEFAULT_CHECK_INTERVAL):
+        if limit <= 0:
+            raise ValueError(f"limit must be positive, got {limit}")
+        if not 0 < sequential_at <= count_only_at <= 1:
+            raise ValueError(f"Expected 0 < sequential_at <= count_only_at <= 1, got {sequential_at}, {count_only_at}")
+        self.limit = limit
+        self.sequential_at = sequential_at
+        self.count_only_at = count_only_at
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Starts afresh for a new solve."""
+        self.level = NORMAL
+        self.peak = 0
+        # solutions found but not kept, once in COUNT_ONLY
+        self.dropped = 0
+        self._next_check = 0.0
+
+    def check(self) -> int:
+        """The current level, reading the process's memory first if check_interval has passed since the last reading."""
+        now = time.monotonic()
+        if now < self._next_check or self.level == EXCEEDED:
+            return self.level
+        with self._lock:
+            self._next_check = now + self.check_interval
+            used = process_memory()
+            self.peak = max(self.peak, used)
+            if used >= self.limit:
+                level = EXCEEDED
+            elif used >= self.limit * self.count_only_at:
+                level = COUNT_ONLY
+            elif used >= self.limit * self.sequential_at:
+                level = SEQUENTIAL
+            else:
+                level = NORMAL
+            self.level = max(self.level, level)
+            return self.level
+
+    def record_dropped(self, count: int) -> None:
+        with self._lock:
+            self.dropped += count
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"limit": self.limit, "level": self.level, "peak": self.peak, "dropped": self.dropped}
@@ -0,0 +1,142 @@
+from __future__ import annotations
+from package.Board import Board
+from package.encoding import decode_board, encode_board, pack_board, record_size, unpack_board
+from array import array
+from typing import Iterable, Iterator, Tuple
+import mmap
+import os
+import struct
+
+# binary corpus header: magic, format version, largest board size a record can hold, reserved
+BINARY_MAGIC = b"SHKB"
+BINARY_VERSION = 1
+BINARY_HEADER = struct.Struct("<4sBBH")
+
+
+class PuzzleCorpus:
+    """
+    Random access to every board in a single corpus file, through a read-only memory map so
+    only the boards that are actually read are paged in. The puzzle id of a board is its position in the file.
+
+    Two layouts are understood: text files with one encode_board line per board, which are indexed
+    by the offsets of their lines, and binary files of fixed width records, which need no index at all.
+    A text line may start with a name for its board ('empty_5 5:.X.a2.dX.j2.X'), and lines starting with '#'
+    are comments; neither blank lines nor comments count towards puzzle ids.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._map = None
+        try:
+            self._open()
+        except BaseException:
+            self.close()
+            raise
+
+    def _open(self) -> None:
+        path = self.path
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(path) > 0 else None
+        self.is_binary = self._map is not None and self._map[:len(BINARY_MAGIC)] == BINARY_MAGIC
+
+        if self.is_binary:
+            _, version, self.max_size, _ = BINARY_HEADER.unpack_from(self._map, 0)
+            if version != BINARY_VERSION:
+                raise ValueError(f"Unsupported corpus version {version} in '{path}'")
+            self.record_size = record_size(self.max_size)
+            body_length = len(self._map) - BINARY_HEADER.size
+            if body_length % self.record_size != 0:
+                raise ValueError(f"Corpus '{path}' ends in the middle of a record")
+            self._count = body_length // self.record_size
+        elif self._map is not None:
+            self._starts, self._ends = array('q'), array('q')
+            start = 0
+            while start < len(self._map):
+                end = self._map.find(b"\n", start)
+                if end == -1:
+                    end = len(self._map)
+                # skip blank lines and comments
+                if end > start and self._map[start] != ord('#'):
+                    self._starts.append(start)
+                    self._ends.append(end)
+                start = end + 1
+            self._count = len(self._starts)
+        else:
+            self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, puzzle_id: int) -> Board:
+        if puzzle_id < 0:
+            puzzle_id += self._count
+        if not 0 <= puzzle_id < self._count:
+            raise IndexError(f"Puzzle id {puzzle_id} out of range for a corpus of {self._count}")
+        if self.is_binary:
+            start = BINARY_HEADER.size + puzzle_id * self.record_size
+            return unpack_board(self._map[start:start + self.record_size])
+        _, encoded = self._line(puzzle_id)
+        return decode_board(encoded)
+
+    def name(self, puzzle_id: int) -> str | None:
+        """The name a text line gives its board, or None."""
+        if puzzle_id < 0:
+            puzzle_id += self._count
+        if not 0 <= puzzle_id < self._count:
+            raise IndexError(f"Puzzle id {puzzle_id} out of range for a corpus of {self._count}")
+        if self.is_binary:
+            return None
+        name, _ = self._line(puzzle_id)
+        return name
+
+    def _line(self, puzzle_id: int) -> Tuple[str | None, str]:
+        """The name (or None) and the encoded board of a text line."""
+        fields = self._map[self._starts[puzzle_id]:self._ends[puzzle_id]].decode('ascii').split()
+        if len(fields) == 1:
+            return None, fields[0]
+        if len(fields) == 2:
+            return fields[0], fields[1]
+        raise ValueError(f"Expected '[<name>] <size>:<cells>' on line {puzzle_id} of '{self.path}', got {len(fields)} fields")
+
+    def __iter__(self) -> Iterator[Board]:
+        for puzzle_id in range(self._count):
+            yield self[puzzle_id]
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._file.close()
+
+    def __enter__(self) -> PuzzleCorpus:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def write_text(path: str, boards: Iterable[Board]) -> int:
+        """Writes one encoded line per board, puzzles or solutions. Returns the number written."""
+        count = 0
+        with open(path, 'w', encoding='ascii') as file:
+            for board in boards:
+                file.write(encode_board(board) + "\n")
+                count += 1
+        return count
+
+    @staticmethod
+    def write_binary(path: str, boards: Iterable[Board], max_size: int | None = None) -> int:
+        """
+        Writes fixed width records, puzzles or solutions. Without max_size the boards are
+        collected first to find the largest one. Returns the number written.
+        """
+        if max_size is None:
+            boards = list(boards)
+            max_size = max((board.size for board in boards), default=0)
+        if not 0 <= max_size <= 255:
+            raise ValueError(f"Binary records hold boards up to size 255, got {max_size}")
+        count = 0
+        with open(path, 'wb') as file:
+            file.write(BINARY_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, max_size, 0))
+            for board in boards:
+                file.write(pack_board(board, max_size))
+                count += 1
+        return count
@@ -0,0 +1,258 @@
+from __future__ import annotations
+from package.Cell import Cell, Cells
+from package.Loc import Loc
+from package.Board import Board
+from package.SolutionValidator import SolutionValidator
+from package.empty_logic import axis_rectangle_closure
+from package.triangle_logic import CHUNK_DELTA_TO_TRIANGLE
+from package.util import AXIS_NEIGHBORS
+from functools import lru_cache
+from typing import Dict, List, Set, Tuple, Iterator
+
+# the corner cells around a chunk, as offsets from its lower left cell, with the triangle each one holds
+CHUNK_CELLS = [(int(delta.x + 0.5), int(delta.y + 0.5), triangle) for delta, triangle in CHUNK_DELTA_TO_TRIANGLE.items()]
+
+
+@lru_cache(maxsize=None)
+def _neighbor_table(size: int) -> Dict[Loc, List[Loc]]:
+    """The axis neighbors of every loc on a board of the given size, so enumeration doesn't redo the Loc arithmetic."""
+    return {
+        Loc(x, y): [Loc(x + dx, y + dy) for dx, dy in AXIS_NEIGHBORS if 0 <= x + dx < size and 0 <= y + dy < size]
+        for x in range(size) for y in range(size)
+    }
+
+
+class Piece:
+    """
+    A single white rectangle that could appear in a solution, axis aligned or diagonal.
+    Maps every loc it covers to the cell it puts there.
+    """
+    def __init__(self, cells: Dict[Loc, Cell], is_axis: bool):
+        self.cells = cells
+        self.is_axis = is_axis
+
+    def __repr__(self) -> str:
+        kind = "axis" if self.is_axis else "diagonal"
+        return f"Piece({kind}, {len(self.cells)} cells)"
+
+
+class RectangleSolver:
+    """
+    Solves the puzzle at the level of whole rectangles instead of cells.
+
+    Every white region of a solution is an axis rectangle of empty cells or a diagonal rectangle,
+    so a solution is an exact cover of the free cells (every cell that is not black or a number) by such pieces.
+    Candidate pieces are enumerated up front, filtered against the number clues and the cells already decided
+    on the board, and a cover is chosen with Knuth's Algorithm X
+    (dancing links, with dicts of sets standing in for the linked lists).
+
+    Two axis pieces must not share an edge, or their empty cells would merge into one region.
+    Each such edge is a secondary column: it never has to be covered, but at most one piece may use it.
+    Diagonal pieces never expose a white edge to the outside, so they need no secondary columns.
+    """
+
+    def __init__(self, board: Board):
+        self.board = board
+        self.size = board.size
+        self.free_locs = {loc for loc, cell in board if cell.is_undecided_or_empty or cell.is_triangle}
+        # cells already decided, which a piece covering them has to put there as well
+        self.decided = {loc: cell for loc, cell in board if cell == Cells.DECIDED_EMPTY or cell.is_triangle}
+        self.numbers = {loc: cell.number for loc, cell in board if cell.is_number}
+        self.pieces: List[Piece] = []
+        self.piece_number_deltas: List[Dict[Loc, Tuple[int, int]]] = []
+        self.neighbors = _neighbor_table(self.size)
+
+        # number loc -> [triangles placed next to it, nontriangles placed next to it]
+        # (cells off the board count as nontriangles)
+        self.number_counts: Dict[Loc, List[int]] = {}
+        for loc in self.numbers:
+            fixed_nontriangles = 4 - sum(1 for neighbor in self.neighbors[loc] if neighbor in self.free_locs)
+            self.number_counts[loc] = [0, fixed_nontriangles]
+
+        self._enumerate_pieces()
+        self._build_columns()
+
+    def _enumerate_pieces(self) -> None:
+        for piece in self._axis_pieces():
+            self._add_piece(piece)
+        for piece in self._diagonal_pieces():
+            self._add_piece(piece)
+
+    def _add_piece(self, piece: Piece) -> None:
+        if any(self.decided.get(loc, cell) != cell for loc, cell in piece.cells.items()):
+            return
+        deltas = self._number_deltas(piece)
+        if self._fits_numbers(deltas):
+            self.pieces.append(piece)
+            self.piece_number_deltas.append(deltas)
+
+    def _axis_pieces(self) -> Iterator[Piece]:
+        for x_min in range(self.size):
+            for y_min in range(self.size):
+                if Loc(x_min, y_min) not in self.free_locs:
+                    continue
+                # grow upwards and rightwards, stopping a row as soon as a blocked cell is hit
+                y_limit = self.size
+                for x_max in range(x_min, self.size):
+                    y_max = y_min
+                    while y_max < y_limit and Loc(x_max, y_max) in self.free_locs:
+                        y_max += 1
+                    y_limit = y_max
+                    if y_limit == y_min:
+                        break
+                    for top in range(y_min, y_limit):
+                        locs = axis_rectangle_closure({Loc(x_min, y_min), Loc(x_max, top)})
+                        yield Piece({loc: Cells.DECIDED_EMPTY for loc in locs}, is_axis=True)
+
+    def _diagonal_pieces(self) -> Iterator[Piece]:
+        """
+        A diagonal rectangle is a diamond of chunks (the cell corners its triangles point at),
+        given by its leftmost chunk and the number of up-right and down-right steps.
+        A cell around one chunk holds that chunk's triangle, a cell between two chunks is empty.
+        Chunks are numbered here by the lower left cell around them, so they range over 0 .. size - 2.
+        """
+        chunk_max = self.size - 2
+
+        def in_range(x: int, y: int) -> bool:
+            return 0 <= x <= chunk_max and 0 <= y <= chunk_max
+
+        for left_x in range(chunk_max + 1):
+            for left_y in range(chunk_max + 1):
+                up_right_steps = 0
+                while in_range(left_x + up_right_steps, left_y + up_right_steps):
+                    down_right_steps = 0
+                    while in_range(left_x + up_right_steps + down_right_steps, left_y + up_right_steps - down_right_steps) \
+                            and in_range(left_x + down_right_steps, left_y - down_right_steps):
+                        piece = self._diagonal_piece(left_x, left_y, up_right_steps, down_right_steps)
+                        if piece is not None:
+                            yield piece
+                        down_right_steps += 1
+                    up_right_steps += 1
+
+    def _diagonal_piece(self, left_x: int, left_y: int, up_right_steps: int, down_right_steps: int) -> Piece | None:
+        cells: Dict[Loc, Cell] = {}
+        for up_right in range(up_right_steps + 1):
+            for down_right in range(down_right_steps + 1):
+                chunk_x = left_x + up_right + down_right
+                chunk_y = left_y + up_right - down_right
+                for dx, dy, triangle in CHUNK_CELLS:
+                    loc = Loc(chunk_x + dx, chunk_y + dy)
+                    if loc not in self.free_locs:
+                        return None
+                    cells[loc] = Cells.DECIDED_EMPTY if loc in cells else triangle
+        return Piece(cells, is_axis=False)
+
+    def _number_deltas(self, piece: Piece) -> Dict[Loc, Tuple[int, int]]:
+        """How many triangles and nontriangles the piece places next to each number."""
+        deltas: Dict[Loc, Tuple[int, int]] = {}
+        for loc, cell in piece.cells.items():
+            for neighbor in self.neighbors[loc]:
+                if neighbor in self.numbers:
+                    triangles, nontriangles = deltas.get(neighbor, (0, 0))
+                    if cell.is_triangle:
+                        deltas[neighbor] = (triangles + 1, nontriangles)
+                    else:
+                        deltas[neighbor] = (triangles, nontriangles + 1)
+        return deltas
+
+    def _fits_numbers(self, deltas: Dict[Loc, Tuple[int, int]]) -> bool:
+        for number_loc, (triangles, nontriangles) in deltas.items():
+            required = self.numbers[number_loc]
+            fixed_nontriangles = self.number_counts[number_loc][1]
+            if triangles > required or nontriangles + fixed_nontriangles > 4 - required:
+                return False
+        return True
+
+    def _build_columns(self) -> None:
+        # columns are numbered so the search only hashes ints: the free locs come first (primary columns),
+        # then the edges between two free locs (secondary columns), keyed by the ids of their locs
+        loc_ids: Dict[Loc, int] = {loc: i for i, loc in enumerate(self.free_locs)}
+        free_neighbor_ids = {loc: [loc_ids[neighbor] for neighbor in self.neighbors[loc] if neighbor in loc_ids]
+                             for loc in self.free_locs}
+        self.num_primary = len(loc_ids)
+        edge_ids: Dict[Tuple[int, int], int] = {}
+        self.columns: Dict[int, Set[int]] = {i: set() for i in range(self.num_primary)}
+        self.rows: Dict[int, List[int]] = {}
+
+        for i, piece in enumerate(self.pieces):
+            cell_ids = [loc_ids[loc] for loc in piece.cells]
+            row = list(cell_ids)
+            if piece.is_axis:
+                inside = set(cell_ids)
+                for loc, loc_id in zip(piece.cells, cell_ids):
+                    for neighbor_id in free_neighbor_ids[loc]:
+                        if neighbor_id not in inside:
+                            edge = (loc_id, neighbor_id) if loc_id < neighbor_id else (neighbor_id, loc_id)
+                            row.append(edge_ids.setdefault(edge, self.num_primary + len(edge_ids)))
+            for column in row:
+                self.columns.setdefault(column, set()).add(i)
+            self.rows[i] = row
+
+        self.uncovered: Set[int] = set(range(self.num_primary))
+
+    def solve(self, max_solutions: int | None = None) -> list[Board]:
+        """
+        Solve the puzzle and return all possible solutions,
+        or stop as soon as max_solutions have been found (2 is enough to tell whether a puzzle is unique).
+        """
+        solutions = []
+        for chosen in self._search([]):
+            board = self.board.copy()
+            for i in chosen:
+                for loc, cell in self.pieces[i].cells.items():
+                    board[loc] = cell
+            if SolutionValidator(board).validate():
+                solutions.append(board)
+                if max_solutions is not None and len(solutions) >= max_solutions:
+                    break
+        return solutions
+
+    def _search(self, chosen: List[int]) -> Iterator[List[int]]:
+        if not self.uncovered:
+            yield list(chosen)
+            return
+
+        column = min(self.uncovered, key=lambda column: len(self.columns[column]))
+
+        for i in list(self.columns[column]):
+            if self._update_numbers(i, 1):
+                removed = self._select(i)
+                chosen.append(i)
+                yield from self._search(chosen)
+                chosen.pop()
+                self._deselect(i, removed)
+            self._update_numbers(i, -1)
+
+    def _update_numbers(self, i: int, sign: int) -> bool:
+        """Add (or with sign -1, take back) the piece's contribution to its numbers. Returns False if a number is exceeded."""
+        satisfiable = True
+        for number_loc, (triangles, nontriangles) in self.piece_number_deltas[i].items():
+            counts = self.number_counts[number_loc]
+            counts[0] += sign * triangles
+            counts[1] += sign * nontriangles
+            required = self.numbers[number_loc]
+            if counts[0] > required or counts[1] > 4 - required:
+                satisfiable = False
+        return satisfiable
+
+    def _select(self, i: int) -> List[Set[int]]:
+        removed = []
+        for column in self.rows[i]:
+            for other in self.columns[column]:
+                for other_column in self.rows[other]:
+                    if other_column != column:
+                        self.columns[other_column].discard(other)
+            removed.append(self.columns.pop(column))
+            if column < self.num_primary:
+                self.uncovered.discard(column)
+        return removed
+
+    def _deselect(self, i: int, removed: List[Set[int]]) -> None:
+        for column in reversed(self.rows[i]):
+            self.columns[column] = removed.pop()
+            if column < self.num_primary:
+                self.uncovered.add(column)
+            for other in self.columns[column]:
+                for other_column in self.rows[other]:
+                    if other_column != column:
+                        self.columns[other_column].add(other)
@@ -0,0 +1,95 @@
+from __future__ import annotations
+from package.Board import Board
+from package.Cell import Cell
+from package.Loc import Loc
+from typing import TYPE_CHECKING, Any, Dict, List
+import json
+import os
+import threading
+import time
+
+if TYPE_CHECKING:
+    from package.Solver import Solver
+
+
+class SearchHooks:
+    """
+    Callbacks for search events. Subclass and override the events you care about, then pass
+    instances to Solver(hooks=[...]). Branches run on several threads, so hooks must be thread safe.
+    The solver passed in is the one the event happened in; solver.depth is its depth in the search tree.
+    """
+    def on_branch_entered(self, solver: Solver, loc: Loc, cell: Cell) -> None:
+        """A new branch is about to try cell at loc."""
+
+    def on_branch_exited(self, solver: Solver, loc: Loc, cell: Cell, solutions: int) -> None:
+        """The branch that tried cell at loc is done, having found this many solutions."""
+
+    def on_assignment(self, solver: Solver, loc: Loc, cell: Cell) -> None:
+        """A cell was placed, by a branching decision or because it was the only option left."""
+
+    def on_contradiction(self, solver: Solver, loc: Loc | None, reason: str) -> None:
+        """A rule (named as in SolverStats.RULES) found the state impossible, at loc if it is tied to one cell."""
+
+    def on_solution(self, solver: Solver, board: Board) -> None:
+        """A finished board passed validation."""
+
+    def on_backtrack(self, solver: Solver, loc: Loc | None, cell: Cell | None) -> None:
+        """The search gave up on placing cell at loc, or on a finished board that failed validation."""
+
+
+class ChromeTraceExporter(SearchHooks):
+    """
+    Records the search as Chrome trace events (chrome://tracing, Perfetto), one track per thread.
+    Every branch is a slice named after the cell it tried, so hot subtrees show up as wide stacks.
+    Contradictions, solutions and backtracks are instant events; assignments are left out unless asked for,
+    since there are far more of them than of anything else.
+    """
+    def __init__(self, include_assignments: bool = False):
+        self.include_assignments = include_assignments
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._pid = os.getpid()
+
+    def _add(self, phase: str, name: str, category: str, args: Dict[str, Any] | None = None) -> None:
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": phase,
+            "ts": (time.perf_counter() - self._start) * 1e6,
+            "pid": self._pid,
+            "tid": threading.get_ident(),
+        }
+        if phase == "i":
+            event["s"] = "t"
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    def on_branch_entered(self, solver, loc, cell):
+        self._add("B", f"{loc} {cell}", "branch", {"depth": solver.depth})
+
+    def on_branch_exited(self, solver, loc, cell, solutions):
+        self._add("E", f"{loc} {cell}", "branch", {"solutions": solutions})
+
+    def on_assignment(self, solver, loc, cell):
+        if self.include_assignments:
+            self._add("i", f"{loc} {cell}", "assignment")
+
+    def on_contradiction(self, solver, loc, reason):
+        self._add("i", reason, "contradiction", {"loc": str(loc)} if loc is not None else None)
+
+    def on_solution(self, solver, board):
+        self._add("i", "solution", "solution", {"board": str(board)})
+
+    def on_backtrack(self, solver, loc, cell):
+        self._add("i", "backtrack", "backtrack", {"loc": str(loc), "cell": str(cell)} if loc is not None else None)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"traceEvents": list(self.events), "displayTimeUnit": "ms"}
+
+    def write(self, path: str) -> None:
+        with open(path, 'w') as file:
+            json.dump(self.to_dict(), file)
@@ -0,0 +1,77 @@
+from __future__ import annotations
+from multiprocessing import resource_tracker, shared_memory
+from typing import Tuple
+import sys
+from package.Board import Board
+from package.Undecided import Undecided
+
+
+class SharedStates:
+    """
+    A block of shared memory holding a fixed number of search states (Board and Undecided snapshots)
+    for boards of one size, one per slot. A producer puts a state into a slot and hands the consumer only
+    the slot number, through a queue or pipe; the consumer decodes it straight out of the shared block,
+    so the state itself is never pickled or sent. Which slots are free is left to the caller.
+
+    Pickling a SharedStates (e.g. passing it to a worker process) attaches the worker to the same block.
+    The process that created the block should unlink() it once every process is done with it.
+    """
+    def __init__(self, size: int, slots: int, name: str | None = None):
+        self.size = size
+        self.slots = slots
+        self.board_bytes = Board.byte_size(size)
+        self.slot_bytes = self.board_bytes + Undecided.byte_size(size)
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=slots * self.slot_bytes)
+        else:
+            # attaching processes leave the block to its creator, rather than have it unlinked when they exit
+            if sys.version_info >= (3, 13):
+                self.memory = shared_memory.SharedMemory(name=name, track=False)
+            else:
+                # before 3.13 attaching registers the block with the resource tracker. A worker shares the tracker
+                # of the process that started it, where the creator has registered the block already, so only
+                # a process with a tracker of its own takes the block back off it
+                shared_tracker = resource_tracker._resource_tracker._fd is not None
+                self.memory = shared_memory.SharedMemory(name=name)
+                if not shared_tracker:
+                    resource_tracker.unregister(self.memory._name, "shared_memory")
+
+    @property
+    def name(self) -> str:
+        return self.memory.name
+
+    def _slot(self, slot: int) -> memoryview:
+        if not 0 <= slot < self.slots:
+            raise IndexError(f"Slot {slot} out of range for {self.slots} slots")
+        start = slot * self.slot_bytes
+        return self.memory.buf[start:start + self.slot_bytes]
+
+    def put(self, slot: int, board: Board, undecided: Undecided) -> None:
+        if board.size != self.size:
+            raise ValueError(f"Board of size {board.size} does not fit in slots for size {self.size}")
+        view = self._slot(slot)
+        view[:self.board_bytes] = board.to_bytes()
+        view[self.board_bytes:] = undecided.to_bytes(self.size)
+        view.release()
+
+    def get(self, slot: int) -> Tuple[Board, Undecided]:
+        view = self._slot(slot)
+        try:
+            return Board.from_bytes(view[:self.board_bytes]), Undecided.from_bytes(view[self.board_bytes:])
+        finally:
+            view.release()
+
+    def __reduce__(self):
+        return SharedStates, (self.size, self.slots, self.name)
+
+    def close(self) -> None:
+        self.memory.close()
+
+    def unlink(self) -> None:
+        self.memory.unlink()
+
+    def __enter__(self) -> SharedStates:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
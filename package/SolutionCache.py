@@ -0,0 +1,116 @@
+from __future__ import annotations
+from package.Board import Board
+from package.Cell import Cells
+from package.encoding import decode_board, encode_board
+from package.symmetry import canonical_form, inverse_transform, transform_board
+from typing import List
+import hashlib
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+# seconds to wait on another process holding the database lock
+DATABASE_TIMEOUT = 30
+
+
+def clue_board(board: Board) -> Board:
+    """The puzzle the board belongs to: its numbers and black cells, with every other cell undecided."""
+    return Board([[cell if cell.is_number or cell == Cells.BLACK else Cells.UNDECIDED for cell in column]
+                  for column in board.board])
+
+def is_puzzle(board: Board) -> bool:
+    """Whether the board holds nothing but clues, so its solutions only depend on its clue layout."""
+    return all(cell.is_number or cell == Cells.BLACK or cell == Cells.UNDECIDED for _, cell in board)
+
+
+class SolutionCache:
+    """
+    A persistent store of solved puzzles in a SQLite database, shared by every process that opens the same file.
+
+    Puzzles are keyed by a hash of their clue layout in canonical orientation, so a rotated or mirrored copy of a
+    puzzle hits the same entry. Solutions are stored as encode_board lines in that orientation and mapped back
+    onto the board that was asked for. Once the stored solutions take up more than max_bytes,
+    the least recently used puzzles are evicted.
+    """
+    def __init__(self, path: str, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=DATABASE_TIMEOUT, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS solutions ("
+                "key TEXT PRIMARY KEY, puzzle TEXT NOT NULL, solutions TEXT NOT NULL, "
+                "size INTEGER NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used)")
+
+    @staticmethod
+    def _canonical(board: Board):
+        canonical, transform = canonical_form(clue_board(board))
+        puzzle = encode_board(canonical)
+        return hashlib.sha256(puzzle.encode('ascii')).hexdigest(), puzzle, transform
+
+    def get(self, board: Board) -> List[Board] | None:
+        """The cached solutions of the puzzle, oriented like board, or None if it hasn't been solved before."""
+        key, puzzle, transform = self._canonical(board)
+        with self._lock:
+            row = self._connection.execute("SELECT puzzle, solutions FROM solutions WHERE key = ?", (key,)).fetchone()
+            # the stored puzzle is compared as well, so a hash collision is a miss rather than a wrong answer
+            if row is None or row[0] != puzzle:
+                self.misses += 1
+                return None
+            with self._connection:
+                self._connection.execute("UPDATE solutions SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        back = inverse_transform(transform)
+        return [transform_board(decode_board(line), back) for line in row[1].splitlines()]
+
+    def put(self, board: Board, solutions: List[Board]) -> None:
+        key, puzzle, transform = self._canonical(board)
+        encoded = "\n".join(encode_board(transform_board(solution, transform)) for solution in solutions)
+        size = len(key) + len(puzzle) + len(encoded)
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO solutions (key, puzzle, solutions, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, puzzle, encoded, size, time.time()),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        to_free = total - self.max_bytes
+        rows = self._connection.execute("SELECT key, size FROM solutions ORDER BY last_used")
+        evicted = []
+        for key, size in rows:
+            if to_free <= 0:
+                break
+            evicted.append((key,))
+            to_free -= size
+        self._connection.executemany("DELETE FROM solutions WHERE key = ?", evicted)
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM solutions").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM solutions")
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> SolutionCache:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
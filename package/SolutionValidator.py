@@ -7,9 +7,13 @@ from package.number_logic import validate_number
 
     
 class SolutionValidator:
-    def __init__(self, board: Board):
+    def __init__(self, board: Board, validated: Set[Loc] | None = None):
+        """
+        validated: locs belonging to regions that are already known to be closed and valid.
+        These are skipped as starting points, so only the remaining regions are walked.
+        """
         self.board = board
-        self.visited: Set[Loc] = set()
+        self.visited: Set[Loc] = set(validated) if validated else set()
         
     def validate(self, verbose: bool = False) -> bool:
         # First need to deal with diagonal rectangles, so that when we do axis rectangles, 
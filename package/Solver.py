@@ -1,27 +1,109 @@
 from __future__ import annotations
 from package.Cell import Cell, Cells
-from package.util import SURROUNDING_DELTAS
+from package.util import SURROUNDING_DELTAS, AXIS_NEIGHBORS
 from package.Loc import Loc
 from package.Board import Board
 from package.Undecided import Undecided, all_opts_undecided
 from package.SolutionValidator import SolutionValidator
-from package.empty_logic import deduce_consequences_empty, is_empty_still_possible
-from package.triangle_logic import deduce_consequences_triangle, is_triangle_still_possible
+from package.SolverStats import SolverStats, DEDUCE_EMPTY, DEDUCE_TRIANGLE, NUMBER_RULE, SURROUNDING_RULE, SOLVED_CHECK
+from package.SolutionCache import SolutionCache, is_puzzle
+from package.SearchHooks import SearchHooks
+from package.MemoryBudget import MemoryBudget, SEQUENTIAL, COUNT_ONLY, EXCEEDED, COMPLETE, COUNTED, MEMORY_EXCEEDED
+from package.checkpoint import DEFAULT_CHECKPOINT_INTERVAL, Checkpoint, load_checkpoint
+from package.component_logic import independent_components, isolate_component
+from package.empty_logic import deduce_consequences_empty, is_empty_still_possible, closed_axis_rectangle
+from package.triangle_logic import deduce_consequences_triangle, is_triangle_still_possible, DiagonalRectangleValidator
 from package.number_logic import update_opts_around_number
-from typing import Tuple
+from package.symmetry import Transform, board_symmetries, board_key, transform_board, transform_cell, transform_loc
+from typing import Callable, Dict, Iterable, Tuple, Set
 from concurrent.futures import ThreadPoolExecutor, as_completed
+import random
 import threading
+import time
 import os
 
+# subproblem counts count_solutions() remembers before it starts forgetting the oldest
+DEFAULT_MAX_MEMO = 200_000
+
+# how the cell to branch on is chosen among the undecided cells with the fewest options:
+# whichever comes first, a random one, or the one with the most decided neighbors
+FEWEST_OPTIONS = "fewest_options"
+RANDOM_BRANCHING = "random"
+MOST_CONSTRAINED = "most_constrained"
+BRANCHINGS = (FEWEST_OPTIONS, RANDOM_BRANCHING, MOST_CONSTRAINED)
+
 class Solver:
     """
     A class to encapsulate the Shakashaka puzzle solving process.
     Maintains board and undecided state internally to avoid passing them around.
     """
     
-    def __init__(self, board: Board, undecided: Undecided | None = None):
+    def __init__(self, board: Board, undecided: Undecided | None = None,
+                 stats: SolverStats | None = None,
+                 validated: Set[Loc] | None = None,
+                 measure_validation: bool = False,
+                 break_symmetry: bool = True,
+                 cache: SolutionCache | None = None,
+                 depth: int = 0,
+                 hooks: Iterable[SearchHooks] = (),
+                 checkpoint_path: str | None = None,
+                 checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+                 branching: str = FEWEST_OPTIONS,
+                 seed: int | None = None,
+                 probe_level: int = 0,
+                 memory_budget: MemoryBudget | None = None):
+        """
+        validated: locs of white regions already proven closed and valid
+        measure_validation: also run a full validation at each solved leaf to measure the time saved
+        break_symmetry: only search one branch per symmetric option at the root of a self-symmetric board
+        cache: persistent store solve() checks before searching and fills afterwards
+        depth: number of branching decisions above this solver in the search tree
+        hooks: callbacks for search events; with none registered the search skips all event handling
+        checkpoint_path: file solve() saves what is left of the search to every checkpoint_interval seconds,
+            and resumes from if it already exists; it is removed once the search is done
+        branching: how the cell to branch on is picked among those with the fewest options, one of BRANCHINGS
+        seed: with a seed, the options of every branching cell are tried in a random order (and random branching
+            picks its cells) from a generator seeded with it, so differently seeded solvers walk the tree differently
+        probe_level: before branching, try every option of up to this many of the cells with the fewest options,
+            and drop the ones that fail straight away
+        memory_budget: limit on the memory of the process, which the search falls back to cheaper strategies
+            as it nears and stops at, see solve()
+        """
+        if branching not in BRANCHINGS:
+            raise ValueError(f"Unknown branching '{branching}', expected one of {BRANCHINGS}")
+        if probe_level < 0:
+            raise ValueError(f"probe_level must not be negative, got {probe_level}")
         self.board = board
-        if undecided:
+        self.stats = stats if stats is not None else SolverStats()
+        self.validated: Set[Loc] = validated if validated is not None else set()
+        self.measure_validation = measure_validation
+        self.break_symmetry = break_symmetry
+        self.cache = cache
+        self.depth = depth
+        self.hooks: Tuple[SearchHooks, ...] = tuple(hooks)
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        self.branching = branching
+        self.probe_level = probe_level
+        # shared by a solver and all its copies, so the whole search draws from one sequence
+        self.rng = random.Random(seed) if seed is not None or branching == RANDOM_BRANCHING else None
+        self.memory_budget = memory_budget
+        # solutions of the whole puzzle each solution found below this solver stands for, when the root broke symmetry
+        self.solution_weight = 1
+        # with hooks, branch() links each child to its parent, so on_branch_exited can be emitted for a branch
+        # once the caller is done with everything below it: the option that made this solver, the parent,
+        # whether on_branch_entered was emitted, the children still open and the solutions found below
+        self.entered: Tuple[Loc, Cell] | None = None
+        self.parent: Solver | None = None
+        self.branch_open = False
+        self.open_children = 0
+        self.solutions_below = 0
+        # how the last solve() or count_solutions() ended, and how many solutions it found in all
+        self.status = COMPLETE
+        self.solution_count: int | None = None
+        # the fraction of the whole search tree below this solver, splitting every branching evenly among its options
+        self.share = 1.0
+        if undecided is not None:
             self.undecided = undecided
         else:
             self.undecided = all_opts_undecided(board)
@@ -46,45 +128,395 @@ class Solver:
                 if not update_opts_around_number(self.board, self.undecided, loc, cell):
                     raise ValueError(f"Invalid board state: {loc} with {cell} cannot be satisfied")
             
-    def copy(self) -> Solver:
+    def copy(self, options: int = 1) -> Solver:
         """
-        Create a copy of the solver with the current board and undecided state.
+        Create a copy of the solver with the current board and undecided state, one level further down the search tree,
+        for one of options branches. The copy records into its own stats, which the caller merges back once it is done.
         """
-        return Solver(self.board.copy(), self.undecided.copy())
+        solver = Solver(self.board.copy(), self.undecided.copy(),
+                      stats=SolverStats(),
+                      validated=self.validated.copy(),
+                      measure_validation=self.measure_validation,
+                      break_symmetry=self.break_symmetry,
+                      depth=self.depth + 1,
+                      hooks=self.hooks,
+                      branching=self.branching,
+                      probe_level=self.probe_level,
+                      memory_budget=self.memory_budget)
+        solver.rng = self.rng
+        solver.share = self.share / options
+        solver.solution_weight = self.solution_weight
+        return solver
 
     def solve(self) -> list[Board]:
-        """Solve the puzzle and return all possible solutions."""
+        """
+        Solve the puzzle and return all possible solutions.
+        With a memory budget, status says whether they are all there: complete, count_only when some were only
+        counted (solution_count still has them all), or memory_exceeded when the search stopped before it was done.
+        """
+        if self.memory_budget is not None:
+            self.memory_budget.reset()
+        # only boards holding nothing but clues are cached, partly solved boards would need their own entries
+        if self.cache is None or not is_puzzle(self.board):
+            return self._finish(self._solve())
+        
+        solutions = self.cache.get(self.board)
+        if solutions is not None:
+            return self._finish(solutions)
+        solutions = self._finish(self._solve())
+        if self.status == COMPLETE:
+            self.cache.put(self.board, solutions)
+        return solutions
+
+    def _finish(self, solutions: list[Board]) -> list[Board]:
+        """Sets status and solution_count for the solutions a solve found."""
+        dropped = self.memory_budget.dropped if self.memory_budget is not None else 0
+        self.solution_count = len(solutions) + dropped
+        if self.memory_budget is not None and self.memory_budget.level == EXCEEDED:
+            self.status = MEMORY_EXCEEDED
+        elif dropped:
+            self.status = COUNTED
+        else:
+            self.status = COMPLETE
+        return solutions
+
+    def _solve(self) -> list[Board]:
+        if self.checkpoint_path is not None:
+            return self._solve_with_checkpoints()
+        if self.break_symmetry and self.undecided:
+            symmetries = board_symmetries(self.board)
+            if len(symmetries) > 1:
+                return self._solve_symmetric(symmetries)
+        return self._search()
+
+    def _solve_symmetric(self, symmetries: list[Transform]) -> list[Board]:
+        """
+        Break symmetry at the root. If a symmetry of the board fixes a cell and maps one of its options onto another,
+        the subtrees under those two options are images of each other. So we only search one option per orbit,
+        and recover the rest of the solutions by applying the cell's symmetries to what we find.
+        Each solution under an option then stands for as many solutions as the option's orbit has options,
+        which is what it counts for when it is only counted.
+        """
+        root = self._choose_symmetric_root(symmetries)
+        if root is None:
+            return self._search()
+        
+        loc, stabilizer, representatives = root
+        solutions = {}
+        for opt in representatives:
+            solver = self.copy(len(representatives))
+            solver.solution_weight = len({transform_cell(opt, transform) for transform in stabilizer})
+            if self.hooks:
+                solver._emit('on_branch_entered', loc, opt)
+            solver.stats.record_decision()
+            if solver.make_assignment(loc, opt):
+                branch_solutions = solver._search()
+            else:
+                solver._backtrack(loc, opt)
+                branch_solutions = []
+            self.stats.merge(solver.stats)
+            if self.hooks:
+                solver._emit('on_branch_exited', loc, opt, len(branch_solutions))
+            for solution in branch_solutions:
+                for transform in stabilizer:
+                    image = transform_board(solution, transform)
+                    solutions.setdefault(board_key(image), image)
+        
+        return list(solutions.values())
+
+    def _solve_with_checkpoints(self) -> list[Board]:
+        """
+        Searches depth first on an explicit stack of states, rather than recursing over threads, so that what is
+        left of the search can be written to checkpoint_path every checkpoint_interval seconds and picked up again
+        by a later run. Saving costs one snapshot per pending state, and there are only as many of those as there
+        are options left along the current path, so it stays far below the interval.
+        Solutions are always kept here, since they go into the checkpoint; when the memory budget runs out,
+        what is left is saved and kept rather than removed, so a run with more memory can finish it.
+        """
+        puzzle = self.board.copy()
+        checkpoint = load_checkpoint(self.checkpoint_path, puzzle)
+        if checkpoint is not None:
+            self.stats = checkpoint.stats
+            solutions, symmetries = checkpoint.solutions, checkpoint.symmetries
+            stack = [Solver(board, undecided, validated=validated, measure_validation=self.measure_validation,
+                            break_symmetry=False, depth=depth, hooks=self.hooks, branching=self.branching,
+                            probe_level=self.probe_level, memory_budget=self.memory_budget)
+                     for board, undecided, validated, depth in checkpoint.frontier]
+            # how the search was split before the checkpoint is not kept, so what was left is shared out evenly
+            for solver in stack:
+                solver.rng = self.rng
+                solver.share = 1 / len(stack)
+        else:
+            solutions, children, symmetries = self.branch_root()
+            stack = []
+            self._push_children(stack, children)
+
+        def save() -> None:
+            frontier = [(state.board, state.undecided, state.validated, state.depth) for state in stack]
+            Checkpoint(puzzle, frontier, solutions, self.stats, symmetries).save(self.checkpoint_path)
+
+        last_saved = time.monotonic()
+        while stack:
+            if self.memory_budget is not None and stack[-1]._over_budget():
+                break
+            solver = stack.pop()
+            found, children = solver.branch()
+            solutions.extend(found)
+            self.stats.merge(solver.stats)
+            self._push_children(stack, children)
+            if time.monotonic() - last_saved >= self.checkpoint_interval:
+                save()
+                last_saved = time.monotonic()
+
+        if stack:
+            save()
+        elif os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        if not symmetries:
+            return solutions
+        images = {}
+        for solution in solutions:
+            for transform in symmetries:
+                image = transform_board(solution, transform)
+                images.setdefault(board_key(image), image)
+        return list(images.values())
+
+    def _push_children(self, stack: list[Solver], children: list[Solver]) -> None:
+        """Puts children on the stack so the first is searched next, counting the work already done on them now."""
+        for child in children:
+            self.stats.merge(child.stats)
+            child.stats = SolverStats()
+        stack.extend(reversed(children))
+
+    def branch_root(self) -> Tuple[list[Board], list[Solver], list[Transform]]:
+        """
+        branch() for the root of a search: when a symmetry of the board can be broken here as in _solve_symmetric,
+        the children are one option per orbit, and the transforms the solutions have to be mapped through
+        are returned as well (empty otherwise).
+        """
+        if self.break_symmetry and self.undecided:
+            symmetries = board_symmetries(self.board)
+            root = self._choose_symmetric_root(symmetries) if len(symmetries) > 1 else None
+            if root is not None:
+                loc, stabilizer, representatives = root
+                children = self._try_options(loc, representatives)
+                if self.hooks:
+                    if children:
+                        self.open_children = len(children)
+                    else:
+                        self._branch_done(0)
+                return [], children, stabilizer
+        solutions, children = self.branch()
+        return solutions, children, []
+
+    def count_solutions(self, max_memo: int = DEFAULT_MAX_MEMO) -> int:
+        """
+        The number of solutions, without building or keeping any of them, so memory stays flat however many there are.
+        The open cells are split into independent components whose counts multiply, and the count of every component
+        is remembered (up to max_memo of them), since the same component comes back under many other choices.
+        With a memory budget, the remembered counts are dropped once it gets tight, and if it runs out anyway
+        status is memory_exceeded and the count only covers what was searched.
+        """
+        if self.memory_budget is not None:
+            self.memory_budget.reset()
+        count, _ = self._count({}, max_memo, None)
+        self._finish_count(count)
+        return count
+
+    def _finish_count(self, count: int) -> None:
+        self.solution_count = count
+        exceeded = self.memory_budget is not None and self.memory_budget.level == EXCEEDED
+        self.status = MEMORY_EXCEEDED if exceeded else COMPLETE
+
+    def sample_solution(self, seed: int | None = None, max_memo: int = DEFAULT_MAX_MEMO) -> Tuple[int, Board | None]:
+        """
+        Counts the solutions as count_solutions() does and picks one of them uniformly at random on the way,
+        or None if there are none. Only one candidate is kept per remembered component.
+        """
+        if self.memory_budget is not None:
+            self.memory_budget.reset()
+        count, sample = self._count({}, max_memo, random.Random(seed))
+        self._finish_count(count)
+        return count, Board.from_bytes(sample) if sample is not None else None
+
+    def _count(self, memo: Dict[bytes, Tuple[int, bytes | None]], max_memo: int, rng: random.Random | None,
+               unsplit_at: int = -1) -> Tuple[int, bytes | None]:
+        """
+        The solutions of this state, and one of them picked uniformly (as Board.to_bytes()) if rng is given.
+        unsplit_at is the number of validated locs at which an ancestor was found to be a single component;
+        components only split as regions close, so until more are validated there is nothing to look for.
+        """
+        if self.memory_budget is not None and self._over_budget():
+            if self.hooks:
+                self._enter_branch()
+                self._branch_done(0)
+            return 0, None
+        if len(self.validated) == unsplit_at:
+            return self._count_branches(memo, max_memo, rng, unsplit_at)
+        components = independent_components(self.board, self.validated)
+        if len(components) <= 1:
+            return self._count_branches(memo, max_memo, rng, len(self.validated))
+
+        if self.hooks:
+            self._enter_branch()
+        total, sample = self._count_components(components, memo, max_memo, rng)
+        if self.hooks:
+            self._branch_done(total)
+        return total, sample
+
+    def _count_components(self, components: list[set[Loc]], memo: Dict[bytes, Tuple[int, bytes | None]],
+                          max_memo: int, rng: random.Random | None) -> Tuple[int, bytes | None]:
+        """The product of the counts of the components, each counted on its own or taken from memo."""
+        total = 1
+        sample = self.board.copy() if rng is not None else None
+        for component in components:
+            solver = self._isolate(component)
+            key = solver.board.to_bytes() + solver.undecided.to_bytes(self.board.size)
+            if key in memo:
+                count, component_sample = memo[key]
+            else:
+                count, component_sample = solver._count_branches(memo, max_memo, rng, len(solver.validated))
+                self.stats.merge(solver.stats)
+                if self.memory_budget is not None and self.memory_budget.level >= SEQUENTIAL:
+                    memo.clear()
+                elif len(memo) >= max_memo:
+                    del memo[next(iter(memo))]
+                memo[key] = (count, component_sample)
+            total *= count
+            if total == 0:
+                return 0, None
+            if sample is not None:
+                component_board = Board.from_bytes(component_sample)
+                for loc in component:
+                    sample[loc] = component_board[loc]
+        return total, sample.to_bytes() if sample is not None else None
+
+    def _count_branches(self, memo: Dict[bytes, Tuple[int, bytes | None]], max_memo: int, rng: random.Random | None,
+                        unsplit_at: int) -> Tuple[int, bytes | None]:
+        """
+        Counts by taking a search step and counting each child. A sample is kept from the children as they are
+        counted, replacing the one held with a child's own with probability child count / count so far.
+        """
+        found, children = self.branch()
+        if found:
+            return 1, found[0].to_bytes() if rng is not None else None
+        total = 0
+        sample = None
+        for child in children:
+            count, child_sample = child._count(memo, max_memo, rng, unsplit_at)
+            self.stats.merge(child.stats)
+            total += count
+            if rng is not None and count and rng.random() * total < count:
+                sample = child_sample
+        return total, sample
+
+    def _isolate(self, component: set[Loc]) -> Solver:
+        """A solver for just the component, with the cells of every other one made black."""
+        solver = Solver(isolate_component(self.board, component, self.validated),
+                      Undecided({loc: self.undecided.get_opts(loc).copy() for loc in component if loc in self.undecided.opts}),
+                      validated=self.validated.copy(),
+                      measure_validation=self.measure_validation,
+                      break_symmetry=False,
+                      depth=self.depth,
+                      hooks=self.hooks,
+                      branching=self.branching,
+                      probe_level=self.probe_level,
+                      memory_budget=self.memory_budget)
+        solver.rng = self.rng
+        return solver
+
+    def _choose_symmetric_root(self, symmetries: list[Transform]) -> Tuple[Loc, list[Transform], list[Cell]] | None:
+        """
+        Find the undecided cell whose options collapse the most under the symmetries fixing it.
+        Returns the cell, its stabilizer and one option per orbit, or None if no cell gains anything.
+        """
+        best = None
+        best_saving = 0
+        for loc, opts in self.undecided:
+            stabilizer = [transform for transform in symmetries if transform_loc(loc, transform, self.board.size) == loc]
+            if len(stabilizer) == 1:
+                continue
+            
+            representatives = []
+            covered = set()
+            for opt in sorted(opts, key=lambda cell: cell.char):
+                if opt in covered:
+                    continue
+                representatives.append(opt)
+                covered.update(transform_cell(opt, transform) for transform in stabilizer)
+            
+            saving = len(opts) - len(representatives)
+            if saving > best_saving:
+                best = (loc, stabilizer, representatives)
+                best_saving = saving
+        
+        return best
+
+    def _search(self) -> list[Board]:
+        """Search the subtree below the current state and return every solution in it."""
+        self.stats.record_node(self.depth)
+        if self.memory_budget is not None and self._over_budget():
+            return []
         if not self.undecided:
-            return [self.board] if self._is_solved() else []
+            if self._is_solved():
+                if self.hooks:
+                    self._emit('on_solution', self.board)
+                if self.memory_budget is not None and self.memory_budget.level >= COUNT_ONLY:
+                    self.memory_budget.record_dropped(self.solution_weight)
+                    return []
+                return [self.board]
+            self._backtrack(None, None)
+            return []
 
         solutions = []
 
-        loc, opts = self.undecided.get_undecided_with_minimal_opts()
+        loc, opts = self._choose_branch_cell()
         
         if len(opts) == 1:
-            if self.make_assignment(loc, next(iter(opts))):
-                return self.solve()
+            self.stats.record_propagation()
+            cell = next(iter(opts))
+            if self.make_assignment(loc, cell):
+                return self._search()
+            self._backtrack(loc, cell)
             return []
+
+        if self.probe_level:
+            total_opts = self.undecided.total_opts
+            if not self._probe():
+                self._backtrack(None, None)
+                return []
+            if self.undecided.total_opts < total_opts:
+                return self._search()
         
         # Use multithreading for multiple options with thread limit management
         # The current thread will also do work, so we include it in the distribution
-        def try_option(cell: Cell) -> list[Board]:
-            """Try a single option and return solutions."""
-            solver = self.copy()
+        def try_option(cell: Cell) -> Tuple[list[Board], SolverStats]:
+            """Try a single option and return solutions, with the stats of the branch."""
+            solver = self.copy(len(opts))
+            if self.hooks:
+                solver._emit('on_branch_entered', loc, cell)
+            solver.stats.record_decision()
             if solver.make_assignment(loc, cell):
-                return solver.solve()
-            return []
+                branch_solutions = solver._search()
+            else:
+                solver._backtrack(loc, cell)
+                branch_solutions = []
+            if self.hooks:
+                solver._emit('on_branch_exited', loc, cell, len(branch_solutions))
+            return branch_solutions, solver.stats
         
-        def try_multiple_options(cells: list[Cell]) -> list[Board]:
+        def try_multiple_options(cells: list[Cell]) -> Tuple[list[Board], SolverStats]:
             """Try multiple options sequentially in a single thread."""
             thread_solutions = []
+            thread_stats = SolverStats()
             for cell in cells:
                 try:
-                    cell_solutions = try_option(cell)
+                    cell_solutions, cell_stats = try_option(cell)
                     thread_solutions.extend(cell_solutions)
+                    thread_stats.merge(cell_stats)
                 except Exception as e:
                     print(f"Error trying option {cell} at {loc}: {e}")
-            return thread_solutions
+            return thread_solutions, thread_stats
         
         # Calculate available threads (child threads only)
         max_total_threads = min((os.cpu_count() or 4), 100)
@@ -92,8 +524,10 @@ class Solver:
         
         max_child_threads = max(0, max_total_threads - current_active_threads)
         max_child_threads = min(max_child_threads, len(opts) - 1) # don't need more child threads than opts - 1
+        if self.memory_budget is not None and self.memory_budget.level >= SEQUENTIAL:
+            max_child_threads = 0 # every thread holds its own copies of the state
         
-        opts_list = list(opts)
+        opts_list = self._option_order(opts)
         
         # Total workers = child threads + current thread
         total_workers = max_child_threads + 1
@@ -126,32 +560,239 @@ class Solver:
                 }
                 
                 # Current thread does its share of work while children work
-                current_thread_solutions = try_multiple_options(current_thread_assignment)
+                current_thread_solutions, current_thread_stats = try_multiple_options(current_thread_assignment)
                 solutions.extend(current_thread_solutions)
+                self.stats.merge(current_thread_stats)
                 
-                # Collect results from child threads
+                # Collect results from child threads, merging their stats here so only this thread touches ours
                 for future in as_completed(future_to_assignment):
                     try:
-                        new_solutions = future.result()
+                        new_solutions, new_stats = future.result()
                         solutions.extend(new_solutions)
+                        self.stats.merge(new_stats)
                     except Exception as e:
                         assignment = future_to_assignment[future]
                         print(f"Error trying options {assignment} at {loc}: {e}")
         else:
             # No child threads possible, current thread does all work
-            current_thread_solutions = try_multiple_options(current_thread_assignment)
+            current_thread_solutions, current_thread_stats = try_multiple_options(current_thread_assignment)
             solutions.extend(current_thread_solutions)
+            self.stats.merge(current_thread_stats)
 
         return solutions
 
+    def branch(self) -> Tuple[list[Board], list[Solver]]:
+        """
+        A single step of the search, for callers that keep the search tree themselves instead of recursing.
+        Makes forced assignments until the state is solved, contradicts itself or reaches a cell with several options.
+        Returns the solution at a solved leaf, or one child solver per option at that cell which survives its
+        assignment. The children record into their own stats, which the caller merges once it is done with them.
+
+        Hooks see the same branches as in the recursive search. A child's on_branch_entered is emitted once its own
+        branch() is called, after the assignment that made it, and on_branch_exited once everything below it is done,
+        so branches nest in the order the caller explores them. Options that fail straight away enter and exit here.
+        """
+        if self.hooks:
+            self._enter_branch()
+        solutions, children = self._branch_step()
+        if self.hooks:
+            if children:
+                self.open_children = len(children)
+            else:
+                self._branch_done(len(solutions))
+        return solutions, children
+
+    def _branch_step(self) -> Tuple[list[Board], list[Solver]]:
+        while True:
+            self.stats.record_node(self.depth)
+            if not self.undecided:
+                if self._is_solved():
+                    if self.hooks:
+                        self._emit('on_solution', self.board)
+                    return [self.board], []
+                self._backtrack(None, None)
+                return [], []
+
+            loc, opts = self._choose_branch_cell()
+            if len(opts) == 1:
+                self.stats.record_propagation()
+                cell = next(iter(opts))
+                if not self.make_assignment(loc, cell):
+                    self._backtrack(loc, cell)
+                    return [], []
+                continue
+
+            if self.probe_level:
+                total_opts = self.undecided.total_opts
+                if not self._probe():
+                    self._backtrack(None, None)
+                    return [], []
+                if self.undecided.total_opts < total_opts:
+                    continue
+
+            return [], self._try_options(loc, self._option_order(opts))
+
+    def _try_options(self, loc: Loc, cells: list[Cell]) -> list[Solver]:
+        """A child solver for every option at loc that survives its assignment, each one of len(cells) branches."""
+        children = []
+        for cell in cells:
+            solver = self.copy(len(cells))
+            solver.stats.record_decision()
+            if self.hooks:
+                solver.entered = (loc, cell)
+                solver.parent = self
+            if solver.make_assignment(loc, cell):
+                children.append(solver)
+            else:
+                if self.hooks:
+                    solver._enter_branch()
+                solver._backtrack(loc, cell)
+                self.stats.merge(solver.stats)
+                if self.hooks:
+                    solver.parent = None
+                    solver._emit('on_branch_exited', loc, cell, 0)
+        return children
+
+    def _enter_branch(self) -> None:
+        """Emits on_branch_entered for the option that made this solver, the first time its subtree is explored."""
+        if self.entered is not None and not self.branch_open:
+            self.branch_open = True
+            self._emit('on_branch_entered', *self.entered)
+
+    def _branch_done(self, solutions: int) -> None:
+        """
+        Everything below this solver is done, with solutions found besides those of its children: emits
+        on_branch_exited for it, and for every ancestor it was the last open child of.
+        """
+        self.solutions_below += solutions
+        solver = self
+        while True:
+            if solver.entered is not None:
+                solver._emit('on_branch_exited', *solver.entered, solver.solutions_below)
+            parent, solver.parent = solver.parent, None
+            if parent is None:
+                return
+            parent.solutions_below += solver.solutions_below
+            parent.open_children -= 1
+            if parent.open_children:
+                return
+            solver = parent
+
+    def _choose_branch_cell(self) -> Tuple[Loc, set[Cell]]:
+        """The next cell to assign and its options: one with a single option left if there is any, else by branching."""
+        loc, opts = self.undecided.get_undecided_with_minimal_opts()
+        if len(opts) == 1 or self.branching == FEWEST_OPTIONS:
+            return loc, opts
+        # sorted, since set order differs between runs and a seeded search should not
+        candidates = sorted(self.undecided.num_opt_sets[len(opts)], key=lambda loc: (loc.x, loc.y))
+        if self.branching == RANDOM_BRANCHING:
+            loc = self.rng.choice(candidates)
+        else:
+            loc = max(candidates, key=lambda loc: sum(self.board[loc + delta] != Cells.UNDECIDED
+                                                      for delta in SURROUNDING_DELTAS))
+        return loc, self.undecided.get_opts(loc)
+
+    def _option_order(self, opts: set[Cell]) -> list[Cell]:
+        """The order to try the options of a branching cell in: by character, or shuffled when seeded."""
+        ordered = sorted(opts, key=lambda cell: cell.char)
+        if self.rng is not None:
+            self.rng.shuffle(ordered)
+        return ordered
+
+    def _probe(self) -> bool:
+        """
+        Failed literal probing: assigns every option of up to probe_level of the cells with the fewest options
+        on a scratch copy of the state, and removes the options that contradict themselves straight away.
+        Returns False if that leaves a cell with no options at all.
+        """
+        candidates = []
+        for num_opts in range(2, 6):
+            candidates += sorted(self.undecided.num_opt_sets[num_opts], key=lambda loc: (loc.x, loc.y))
+            if len(candidates) >= self.probe_level:
+                break
+        for loc in candidates[:self.probe_level]:
+            for cell in sorted(self.undecided.get_opts(loc), key=lambda cell: cell.char):
+                # no hooks, the scratch assignments are not part of the search
+                scratch = Solver(self.board.copy(), self.undecided.copy(), validated=self.validated.copy(),
+                                 break_symmetry=False, depth=self.depth)
+                failed = not scratch.make_assignment(loc, cell)
+                self.stats.merge(scratch.stats)
+                if failed and not self.undecided.remove_opts(loc, cell):
+                    return False
+        return True
+
+    def _over_budget(self) -> bool:
+        """Checks the memory budget, dropping this state's lookahead caches once it is tight. True once it has run out."""
+        level = self.memory_budget.check()
+        if level >= SEQUENTIAL:
+            self.undecided.drop_projections()
+        return level == EXCEEDED
+
+    def _emit(self, event: str, *args) -> None:
+        for hook in self.hooks:
+            getattr(hook, event)(self, *args)
+
+    def _backtrack(self, loc: Loc | None, cell: Cell | None) -> None:
+        self.stats.record_backtrack()
+        if self.hooks:
+            self._emit('on_backtrack', loc, cell)
+
     def _is_solved(self) -> bool:
-        """Check if the current board state is a valid solution."""
-        return SolutionValidator(self.board).validate()
+        """
+        Check if the current board state is a valid solution.
+        Regions already proven closed and valid during search are not walked again.
+        """
+        start = time.perf_counter()
+        is_valid = SolutionValidator(self.board, self.validated).validate()
+        elapsed = time.perf_counter() - start
+        self.stats.record_leaf_validation(elapsed, len(self.validated))
+        self.stats.record_rule(SOLVED_CHECK, elapsed, 0, not is_valid)
+        if not is_valid and self.hooks:
+            self._emit('on_contradiction', None, SOLVED_CHECK)
+        
+        if is_valid and self.measure_validation:
+            start = time.perf_counter()
+            SolutionValidator(self.board).validate()
+            full_elapsed = time.perf_counter() - start
+            self.stats.record_validation_saving(full_elapsed - elapsed)
+        
+        return is_valid
+
+    def _record_closed_regions(self, loc: Loc) -> None:
+        """
+        Mark white regions touching loc as validated if they are fully decided and valid.
+        Once every cell of a region is decided it can never change again in this branch.
+        """
+        start = time.perf_counter()
+        for region_loc in [loc] + [loc + delta for delta in AXIS_NEIGHBORS]:
+            if region_loc in self.validated:
+                continue
+            
+            region_cell = self.board[region_loc]
+            if region_cell.is_triangle:
+                self._record_closed_diagonal_rectangle(region_loc)
+            elif region_cell == Cells.DECIDED_EMPTY:
+                self._record_closed_axis_rectangle(region_loc)
+        self.stats.record_region_tracking(time.perf_counter() - start)
+
+    def _record_closed_diagonal_rectangle(self, loc: Loc) -> None:
+        validator = DiagonalRectangleValidator(self.board, allow_undecided=False)
+        if validator.validate(loc):
+            self.validated.update(validator.validated_locs)
+
+    def _record_closed_axis_rectangle(self, loc: Loc) -> None:
+        # the empties inside a diagonal rectangle don't form an axis rectangle,
+        # those are left for the diagonal rectangle to validate
+        region = closed_axis_rectangle(self.board, loc)
+        if region is not None:
+            self.validated.update(region)
 
     def make_assignment(self, loc: Loc, cell: Cell) -> bool:
         """Update options after placing a cell, return False if contradiction found."""
         self.board[loc] = cell
         self.undecided.remove_loc(loc)
+        if self.hooks:
+            self._emit('on_assignment', loc, cell)
         
         try:
             if not self._deduce_consequences(loc, cell):
@@ -159,6 +800,8 @@ class Solver:
             
             if not self._update_surrounding_opts(loc, cell):
                 return False
+            
+            self._record_closed_regions(loc)
         except ValueError as e:
             print(f"Error during assignment of {loc} with {cell}: {e}")
             print(self.board)
@@ -172,26 +815,41 @@ class Solver:
     def _deduce_consequences(self, loc: Loc, cell: Cell) -> bool:
         """Deduce logical consequences of placing a cell at the given location."""
         if cell == Cells.DECIDED_EMPTY:
-            return deduce_consequences_empty(self.board, self.undecided, loc)
+            return self._apply_rule(DEDUCE_EMPTY, loc, deduce_consequences_empty, self.board, self.undecided, loc)
         elif cell.is_triangle:
-            return deduce_consequences_triangle(self.board, self.undecided, loc)
+            return self._apply_rule(DEDUCE_TRIANGLE, loc, deduce_consequences_triangle, self.board, self.undecided, loc)
         
         raise ValueError("Nonempty and nontriangle cell option")
 
+    def _apply_rule(self, rule: str, loc: Loc, deduction: Callable[..., bool], *args) -> bool:
+        """Run a deduction about loc, recording its time, the options it removed and whether it found a contradiction."""
+        start = time.perf_counter()
+        opts_before = self.undecided.total_opts
+        result = deduction(*args)
+        self.stats.record_rule(rule, time.perf_counter() - start, opts_before - self.undecided.total_opts, not result)
+        if not result and self.hooks:
+            self._emit('on_contradiction', loc, rule)
+        return result
+
     def _update_surrounding_opts(self, loc: Loc, cell: Cell) -> bool:
         """Update the possibilities of surrounding cells based on the new cell."""
         for delta in SURROUNDING_DELTAS:
             neighbor_loc = loc + delta
             if self.board[neighbor_loc] == Cells.UNDECIDED:
+                start = time.perf_counter()
                 neighbor_opts = self.undecided.get_opts(neighbor_loc)
                 to_remove = {opt for opt in neighbor_opts if not self._is_opt_still_possible(neighbor_loc, opt)}
                 
                 neighbor_has_opts_left = self.undecided.remove_opts(neighbor_loc, to_remove)
+                self.stats.record_rule(SURROUNDING_RULE, time.perf_counter() - start, len(to_remove), not neighbor_has_opts_left)
                 
                 if not neighbor_has_opts_left:
+                    if self.hooks:
+                        self._emit('on_contradiction', neighbor_loc, SURROUNDING_RULE)
                     return False
             elif self.board[neighbor_loc].is_number:
-                if not update_opts_around_number(self.board, self.undecided, neighbor_loc, self.board[neighbor_loc]):
+                if not self._apply_rule(NUMBER_RULE, neighbor_loc, update_opts_around_number,
+                                        self.board, self.undecided, neighbor_loc, self.board[neighbor_loc]):
                     return False
         return True
 
@@ -0,0 +1,147 @@
+from __future__ import annotations
+from typing import Any, Dict, List
+import json
+
+# rules the solver applies, in the order they are reported
+DEDUCE_EMPTY = "deduce_consequences_empty"
+DEDUCE_TRIANGLE = "deduce_consequences_triangle"
+NUMBER_RULE = "update_opts_around_number"
+SURROUNDING_RULE = "is_opt_still_possible"
+SOLVED_CHECK = "_is_solved"
+RULES = [DEDUCE_EMPTY, DEDUCE_TRIANGLE, NUMBER_RULE, SURROUNDING_RULE, SOLVED_CHECK]
+
+
+class SolverStats:
+    """
+    Counters collected over a search. Every branch of a solve records into its own instance,
+    which is merged into its parent's once the branch is done, so recording never needs a lock.
+    After solve() returns, solver.stats holds the totals for the whole search.
+    """
+    def __init__(self):
+        # search states visited, options tried at a branching cell, assignments forced because
+        # only one option was left, and assignments or finished boards that turned out to be contradictions
+        self.nodes = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        # per rule: contradictions found, options removed, seconds spent
+        self.rule_failures: Dict[str, int] = dict.fromkeys(RULES, 0)
+        self.rule_pruned: Dict[str, int] = dict.fromkeys(RULES, 0)
+        self.rule_time: Dict[str, float] = dict.fromkeys(RULES, 0.0)
+        self.leaf_validations = 0
+        self.leaf_validation_time = 0.0
+        self.locs_skipped_at_leaves = 0
+        self.region_tracking_time = 0.0
+        # per solved board: seconds saved compared to a full validation pass
+        # only filled in when the solver is asked to measure it
+        self.validation_time_saved: List[float] = []
+
+    def record_node(self, depth: int) -> None:
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def record_decision(self) -> None:
+        self.decisions += 1
+
+    def record_propagation(self) -> None:
+        self.propagations += 1
+
+    def record_backtrack(self) -> None:
+        self.backtracks += 1
+
+    def record_rule(self, rule: str, elapsed: float, pruned: int, failed: bool) -> None:
+        self.rule_time[rule] += elapsed
+        self.rule_pruned[rule] += pruned
+        if failed:
+            self.rule_failures[rule] += 1
+
+    def record_leaf_validation(self, elapsed: float, locs_skipped: int) -> None:
+        self.leaf_validations += 1
+        self.leaf_validation_time += elapsed
+        self.locs_skipped_at_leaves += locs_skipped
+
+    def record_region_tracking(self, elapsed: float) -> None:
+        self.region_tracking_time += elapsed
+
+    def record_validation_saving(self, saved: float) -> None:
+        self.validation_time_saved.append(saved)
+
+    def merge(self, other: SolverStats) -> None:
+        """Adds the counts of a finished branch to these."""
+        self.nodes += other.nodes
+        self.decisions += other.decisions
+        self.propagations += other.propagations
+        self.backtracks += other.backtracks
+        self.max_depth = max(self.max_depth, other.max_depth)
+        for rule in RULES:
+            self.rule_failures[rule] += other.rule_failures[rule]
+            self.rule_pruned[rule] += other.rule_pruned[rule]
+            self.rule_time[rule] += other.rule_time[rule]
+        self.leaf_validations += other.leaf_validations
+        self.leaf_validation_time += other.leaf_validation_time
+        self.locs_skipped_at_leaves += other.locs_skipped_at_leaves
+        self.region_tracking_time += other.region_tracking_time
+        self.validation_time_saved.extend(other.validation_time_saved)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "nodes": self.nodes,
+            "decisions": self.decisions,
+            "propagations": self.propagations,
+            "backtracks": self.backtracks,
+            "max_depth": self.max_depth,
+            "rules": {
+                rule: {
+                    "failures": self.rule_failures[rule],
+                    "pruned": self.rule_pruned[rule],
+                    "time": self.rule_time[rule],
+                }
+                for rule in RULES
+            },
+            "leaf_validations": self.leaf_validations,
+            "leaf_validation_time": self.leaf_validation_time,
+            "locs_skipped_at_leaves": self.locs_skipped_at_leaves,
+            "region_tracking_time": self.region_tracking_time,
+            "validation_time_saved": list(self.validation_time_saved),
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> SolverStats:
+        stats = SolverStats()
+        stats.nodes = data["nodes"]
+        stats.decisions = data["decisions"]
+        stats.propagations = data["propagations"]
+        stats.backtracks = data["backtracks"]
+        stats.max_depth = data["max_depth"]
+        for rule in RULES:
+            stats.rule_failures[rule] = data["rules"][rule]["failures"]
+            stats.rule_pruned[rule] = data["rules"][rule]["pruned"]
+            stats.rule_time[rule] = data["rules"][rule]["time"]
+        stats.leaf_validations = data["leaf_validations"]
+        stats.leaf_validation_time = data["leaf_validation_time"]
+        stats.locs_skipped_at_leaves = data["locs_skipped_at_leaves"]
+        stats.region_tracking_time = data["region_tracking_time"]
+        stats.validation_time_saved = list(data["validation_time_saved"])
+        return stats
+
+    def to_json(self, **kwargs) -> str:
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def __str__(self) -> str:
+        lines = [
+            f"nodes: {self.nodes}, decisions: {self.decisions}, propagations: {self.propagations}, "
+            f"backtracks: {self.backtracks}, max depth: {self.max_depth}",
+        ]
+        for rule in RULES:
+            lines.append(f"{rule}: {self.rule_failures[rule]} failures, {self.rule_pruned[rule]} options pruned "
+                         f"({self.rule_time[rule]:.4f}s)")
+        lines += [
+            f"leaf validations: {self.leaf_validations} ({self.leaf_validation_time:.4f}s)",
+            f"locs skipped at leaves: {self.locs_skipped_at_leaves}",
+            f"region tracking: {self.region_tracking_time:.4f}s",
+        ]
+        for i, saved in enumerate(self.validation_time_saved):
+            lines.append(f"solution {i}: validation time saved {saved * 1000:.3f}ms")
+        return "\n".join(lines)
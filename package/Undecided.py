@@ -1,9 +1,12 @@
 from __future__ import annotations
-from typing import Dict, Set, List, Iterable, Callable
-from package.Cell import Cell, Cells
+from typing import Dict, Set, List, Iterable, Callable, Hashable, Any
+from package.Cell import OPTION_CODES, OPTION_TO_BIT, Cell, Cells
 from package.Loc import Loc
 from package.Board import Board
 
+# the options held by every 5 bit mask
+_MASK_TO_OPTIONS = [frozenset(cell for i, cell in enumerate(OPTION_CODES) if mask >> i & 1) for mask in range(32)]
+
 class Undecided:
     """
     Stores all cells that are undecided, and their possible values
@@ -18,6 +21,13 @@ class Undecided:
             
             for loc, cells in opts.items():
                 self.num_opt_sets[len(cells)].add(loc)
+        
+        # options left over all cells, kept up to date so pruning can be measured cheaply
+        self.total_opts = sum(num_opts * len(locs) for num_opts, locs in enumerate(self.num_opt_sets))
+        
+        # cached lookahead results, each dropped as soon as any loc it looked at changes
+        self.projections: Dict[Hashable, Any] = {}
+        self.projection_watchers: Dict[Loc, Set[Hashable]] = {}
                 
     def __bool__(self) -> bool:
         """
@@ -34,8 +44,10 @@ class Undecided:
         
         num_opts = len(self.opts[loc])
         del self.opts[loc]
+        self.total_opts -= num_opts
         
         self.num_opt_sets[num_opts].discard(loc)
+        self._invalidate_projections(loc)
                 
     def has_opt(self, loc: Loc, cell: Cell) -> bool:
         """
@@ -91,11 +103,42 @@ class Undecided:
         self.opts[loc] = {cell for cell in self.opts[loc] if filter(cell)}
 
         new_num_opts = len(self.opts.get(loc))
+        self.total_opts += new_num_opts - prev_num_opts
 
         self.num_opt_sets[prev_num_opts].discard(loc)
         self.num_opt_sets[new_num_opts].add(loc)
+        
+        if new_num_opts != prev_num_opts:
+            self._invalidate_projections(loc)
 
         return new_num_opts > 0
+
+    def get_projection(self, key: Hashable) -> Any | None:
+        """
+        Get a cached lookahead result, or None if it was never computed or has been invalidated
+        """
+        return self.projections.get(key)
+
+    def set_projection(self, key: Hashable, value: Any, watched_locs: Iterable[Loc]) -> None:
+        """
+        Cache a lookahead result that stays valid until the options of any watched loc change
+        """
+        self.projections[key] = value
+        for loc in watched_locs:
+            self.projection_watchers.setdefault(loc, set()).add(key)
+
+    def drop_projections(self) -> None:
+        """
+        Forget every cached lookahead result, to free the memory they hold
+        """
+        self.projections = {}
+        self.projection_watchers = {}
+
+    def _invalidate_projections(self, loc: Loc) -> None:
+        keys = self.projection_watchers.pop(loc, None)
+        if keys:
+            for key in keys:
+                self.projections.pop(key, None)
     
     def get_undecided_with_minimal_opts(self) -> tuple[Loc, set[Cell]]:
         """
@@ -123,8 +166,47 @@ class Undecided:
     def copy(self) -> Undecided:
         opts_copy = {loc: cells.copy() for loc, cells in self.opts.items()}
         num_opt_sets_copy = [s.copy() for s in self.num_opt_sets]
-        return Undecided(opts_copy, num_opt_sets=num_opt_sets_copy)
+        undecided = Undecided(opts_copy, num_opt_sets=num_opt_sets_copy)
+        undecided.projections = self.projections.copy()
+        undecided.projection_watchers = {loc: keys.copy() for loc, keys in self.projection_watchers.items()}
+        return undecided
     
+    @staticmethod
+    def byte_size(size: int) -> int:
+        """Length of to_bytes() for a board of the given size: the size, then 5 bits per cell."""
+        return 1 + (5 * size * size + 7) // 8
+
+    def to_bytes(self, size: int) -> bytes:
+        """
+        A snapshot of the options left on a board of the given size: a 5 bit mask per cell (bits in OPTION_CODES
+        order), column by column like Board.to_bytes, 0 for decided cells. Cached projections are left out.
+        """
+        value = 0
+        for loc, opts in self.opts.items():
+            mask = 0
+            for opt in opts:
+                mask |= OPTION_TO_BIT[opt]
+            value |= mask << 5 * (loc.x * size + loc.y)
+        return bytes([size]) + value.to_bytes(Undecided.byte_size(size) - 1, 'little')
+
+    @staticmethod
+    def from_bytes(data: bytes | memoryview) -> Undecided:
+        size = data[0]
+        if len(data) < Undecided.byte_size(size):
+            raise ValueError(f"Snapshot of {len(data)} bytes is too short for options of a board of size {size}")
+        value = int.from_bytes(data[1:Undecided.byte_size(size)], 'little')
+        opts: Dict[Loc, set[Cell]] = {}
+        num_opt_sets: List[Set[Loc]] = [set() for _ in range(6)]
+        for x in range(size):
+            for y in range(size):
+                mask = value & 0x1F
+                value >>= 5
+                if mask:
+                    loc = Loc(x, y)
+                    opts[loc] = set(_MASK_TO_OPTIONS[mask])
+                    num_opt_sets[len(opts[loc])].add(loc)
+        return Undecided(opts, num_opt_sets)
+
     def __str__(self):
         loc_strings = []
         for loc_list in self.num_opt_sets:
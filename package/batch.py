@@ -0,0 +1,305 @@
+from __future__ import annotations
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, Iterable, Iterator, List, Tuple
+import argparse
+import glob
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+from package.Board import Board
+from package.MemoryBudget import MemoryBudget, COMPLETE, COUNTED, MEMORY_EXCEEDED
+from package.PuzzleCorpus import PuzzleCorpus
+from package.RectangleSolver import RectangleSolver
+from package.SolutionCache import SolutionCache
+from package.Solver import Solver
+from package.encoding import decode_board, encode_board
+from package.io import load_board_from_text
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+TEXT_EXTENSIONS = ('.txt',)
+ORDERS = ('input', 'completion')
+DEFAULT_TIMEOUT = 60.0
+
+# a puzzle to solve: its id in the output, how to load it ('text', 'image' or 'encoded'), and the path or encoding,
+# or 'error' and why it could not be found or read
+type PuzzleSpec = Tuple[str, str, str]
+
+
+def _error_message(e: Exception) -> str:
+    return f"{type(e).__name__}: {e}"
+
+
+def find_puzzles(paths: Iterable[str] = (), corpora: Iterable[str] = ()) -> Iterator[PuzzleSpec]:
+    """
+    Every puzzle in the given text board files, images, directories or glob patterns (in sorted order),
+    then every board of the given corpus files. Corpus boards are read lazily and get the id 'path:name'
+    if their line names them, 'path:index' otherwise.
+    A source or corpus board that can't be found or read is yielded as an 'error' spec rather than raised,
+    so it only fails its own puzzle.
+    """
+    for source in paths:
+        try:
+            if os.path.isdir(source):
+                matches = [os.path.join(source, filename) for filename in os.listdir(source)]
+            elif os.path.exists(source):
+                matches = [source]
+            else:
+                matches = glob.glob(source, recursive=True)
+                if not matches:
+                    raise ValueError(f"No puzzles found at '{source}'")
+        except (OSError, ValueError) as e:
+            yield source, 'error', _error_message(e)
+            continue
+        for path in sorted(matches):
+            if path.lower().endswith(TEXT_EXTENSIONS):
+                yield path, 'text', path
+            elif path.lower().endswith(IMAGE_EXTENSIONS):
+                yield path, 'image', path
+            elif not os.path.isdir(source):
+                yield path, 'error', f"ValueError: Unknown puzzle file type: '{path}'"
+
+    for path in corpora:
+        try:
+            corpus = PuzzleCorpus(path)
+        except Exception as e:
+            yield path, 'error', _error_message(e)
+            continue
+        with corpus:
+            for index in range(len(corpus)):
+                try:
+                    name = corpus.name(index)
+                    yield f"{path}:{name if name is not None else index}", 'encoded', encode_board(corpus[index])
+                except Exception as e:
+                    yield f"{path}:{index}", 'error', _error_message(e)
+
+
+def _guarded(puzzles: Iterable[PuzzleSpec]) -> Iterator[PuzzleSpec]:
+    """The puzzles, with an error raised while listing them turned into an 'error' spec that ends the list."""
+    try:
+        yield from puzzles
+    except Exception as e:
+        yield "<puzzles>", 'error', _error_message(e)
+
+
+def load_puzzle(kind: str, value: str) -> Board:
+    if kind == 'text':
+        return load_board_from_text(value)
+    if kind == 'image':
+        from package.image_io import load_board_from_image
+        return load_board_from_image(value)
+    if kind == 'encoded':
+        return decode_board(value)
+    raise ValueError(f"Unknown puzzle kind '{kind}'")
+
+
+def checkpoint_path_for(checkpoint_dir: str, board: Board) -> str:
+    """Where the search of a puzzle is checkpointed, named after the puzzle so a rerun finds it whatever its id."""
+    return os.path.join(checkpoint_dir, hashlib.sha256(encode_board(board).encode()).hexdigest()[:32] + ".checkpoint")
+
+
+def solve_with_solver(board: Board, cache_path: str | None, checkpoint_dir: str | None,
+                      memory_budget: int | None) -> Tuple[List[Board], str, int]:
+    """The solutions kept, the solver's status and the number of solutions found."""
+    checkpoint_path = checkpoint_path_for(checkpoint_dir, board) if checkpoint_dir is not None else None
+    budget = MemoryBudget(memory_budget) if memory_budget is not None else None
+    if cache_path is None:
+        solver = Solver(board, checkpoint_path=checkpoint_path, memory_budget=budget)
+        solutions = solver.solve()
+    else:
+        with SolutionCache(cache_path) as cache:
+            solver = Solver(board, cache=cache, checkpoint_path=checkpoint_path, memory_budget=budget)
+            solutions = solver.solve()
+    return solutions, solver.status, solver.solution_count
+
+
+def solve_with_rectangles(board: Board, cache_path: str | None, checkpoint_dir: str | None,
+                          memory_budget: int | None) -> Tuple[List[Board], str, int]:
+    if cache_path is not None:
+        raise ValueError("The solution cache is only used by the cell solver")
+    if checkpoint_dir is not None:
+        raise ValueError("Checkpoints are only written by the cell solver")
+    if memory_budget is not None:
+        raise ValueError("Memory budgets are only enforced by the cell solver")
+    solutions = RectangleSolver(board).solve()
+    return solutions, COMPLETE, len(solutions)
+
+
+ENGINES = {"solver": solve_with_solver, "rectangles": solve_with_rectangles}
+
+
+def _solve_in_child(spec: PuzzleSpec, engine: str, cache_path: str | None, checkpoint_dir: str | None,
+                    memory_budget: int | None, connection: Connection) -> None:
+    _, kind, value = spec
+    try:
+        board = load_puzzle(kind, value)
+        solutions, search_status, count = ENGINES[engine](board, cache_path, checkpoint_dir, memory_budget)
+        if search_status == MEMORY_EXCEEDED:
+            status = "memory_exceeded"
+        else:
+            status = "solved" if count else "unsolvable"
+        result = {
+            "status": status,
+            "size": board.size,
+            "solution": encode_board(solutions[0]) if solutions else None,
+            "solutions": count,
+        }
+        if search_status == COUNTED:
+            # the rest were only counted to stay within the memory budget
+            result["solutions_kept"] = len(solutions)
+    except Exception as e:
+        result = {"status": "error", "error": _error_message(e)}
+    connection.send(result)
+    connection.close()
+
+
+class _Running:
+    """A puzzle being solved in its own process."""
+    def __init__(self, index: int, spec: PuzzleSpec, engine: str, cache_path: str | None, checkpoint_dir: str | None,
+                 memory_budget: int | None, timeout: float | None):
+        self.index = index
+        self.spec = spec
+        self.connection, child_connection = multiprocessing.Pipe(duplex=False)
+        self.process = multiprocessing.Process(target=_solve_in_child,
+                                               args=(spec, engine, cache_path, checkpoint_dir, memory_budget,
+                                                     child_connection),
+                                               daemon=True)
+        self.start = time.perf_counter()
+        self.deadline = self.start + timeout if timeout is not None else None
+        self.process.start()
+        child_connection.close()
+
+    def finish(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.connection.close()
+        return {"id": self.spec[0], **result, "time": round(time.perf_counter() - self.start, 6)}
+
+    def collect(self) -> Dict[str, Any]:
+        """The result of a process that has sent one or exited."""
+        try:
+            result = self.connection.recv()
+        except EOFError:
+            self.process.join()
+            result = {"status": "error", "error": f"worker exited with code {self.process.exitcode}"}
+        return self.finish(result)
+
+
+def solve_batch(puzzles: Iterable[PuzzleSpec], workers: int | None = None, timeout: float | None = DEFAULT_TIMEOUT,
+                engine: str = "solver", order: str = "input", cache_path: str | None = None,
+                checkpoint_dir: str | None = None, memory_budget: int | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    Solves every puzzle, each in its own process with up to workers running at once, yielding one result dict
+    per puzzle: id, status (solved, unsolvable, timeout, memory_exceeded or error), the first solution in encode_board format,
+    the number of solutions and the seconds it took. A puzzle that runs past timeout is killed, and one that
+    raises or crashes its process is reported as an error, without affecting the rest of the batch.
+    order 'input' yields results in the order the puzzles were given, 'completion' as soon as each one is done.
+    With a checkpoint_dir, each search saves its progress there, so rerunning a batch that was killed
+    picks every unfinished puzzle up where it stopped.
+    With a memory_budget in bytes, each solve falls back to cheaper strategies as its process nears it, and stops
+    with status memory_exceeded rather than being killed for running out of memory.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine '{engine}', expected one of {sorted(ENGINES)}")
+    if order not in ORDERS:
+        raise ValueError(f"Unknown order '{order}', expected one of {ORDERS}")
+    workers = workers or os.cpu_count() or 1
+    if workers < 1:
+        raise ValueError(f"workers must be positive, got {workers}")
+
+    remaining = enumerate(_guarded(puzzles))
+    running: Dict[Connection, _Running] = {}
+    finished: Dict[int, Dict[str, Any]] = {}
+    next_index = 0
+    try:
+        while True:
+            while len(running) < workers:
+                job = next(remaining, None)
+                if job is None:
+                    break
+                index, (puzzle_id, kind, value) = job
+                if kind == 'error':
+                    # nothing to run, the error is its result
+                    result = {"id": puzzle_id, "status": "error", "error": value, "time": 0.0}
+                    if order == 'completion':
+                        yield result
+                    else:
+                        finished[index] = result
+                    continue
+                started = _Running(*job, engine, cache_path, checkpoint_dir, memory_budget, timeout)
+                running[started.connection] = started
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+            if not running:
+                break
+
+            deadlines = [job.deadline for job in running.values() if job.deadline is not None]
+            wait_time = max(0.0, min(deadlines) - time.perf_counter()) if deadlines else None
+            # a process that dies without sending anything makes its connection readable (with EOF) too
+            ready = wait(list(running), timeout=wait_time)
+            done = [running.pop(connection) for connection in ready]
+            results = [job.collect() for job in done]
+            now = time.perf_counter()
+            for connection, job in list(running.items()):
+                if job.deadline is not None and now >= job.deadline:
+                    del running[connection]
+                    done.append(job)
+                    results.append(job.finish({"status": "timeout"}))
+
+            for job, result in zip(done, results):
+                if order == 'completion':
+                    yield result
+                else:
+                    finished[job.index] = result
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+    finally:
+        for job in running.values():
+            job.finish({"status": "cancelled"})
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Solve many puzzles in parallel, writing one JSON result per line.")
+    parser.add_argument("paths", nargs="*",
+                        help="text boards, screenshots, directories of them, or glob patterns such as 'shots/**/*.png'")
+    parser.add_argument("--corpus", action="append", default=[],
+                        help="a PuzzleCorpus file (encode_board lines or binary records) to solve every board of (repeatable)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per cpu)")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="seconds per puzzle, 0 for no limit (default: %(default)s)")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default="solver")
+    parser.add_argument("--order", choices=ORDERS, default="input",
+                        help="write results in input order, or as soon as each puzzle finishes")
+    parser.add_argument("--cache", default=None, help="SolutionCache database to read and fill (solver engine only)")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help="save the progress of every search here (solver engine only), and resume from it on a rerun")
+    parser.add_argument("--memory-budget", type=float, default=None,
+                        help="MiB of memory each worker process may use (solver engine only)")
+    parser.add_argument("--output", default=None, help="write the results to this file instead of stdout")
+    args = parser.parse_args(argv)
+    if not args.paths and not args.corpus:
+        parser.error("no puzzles given")
+
+    puzzles = find_puzzles(args.paths, args.corpus)
+    if args.checkpoint_dir is not None:
+        os.makedirs(args.checkpoint_dir, exist_ok=True)
+    memory_budget = int(args.memory_budget * 2 ** 20) if args.memory_budget is not None else None
+    results = solve_batch(puzzles, args.workers, args.timeout or None, args.engine, args.order, args.cache,
+                          args.checkpoint_dir, memory_budget)
+    output = open(args.output, 'w') if args.output is not None else sys.stdout
+    try:
+        for result in results:
+            output.write(json.dumps(result) + "\n")
+            output.flush()
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+from __future__ import annotations
+from package.Board import Board
+from package.Loc import Loc
+from package.SolverStats import SolverStats
+from package.Undecided import Undecided
+from package.encoding import decode_board, encode_board
+from package.symmetry import Transform
+from typing import Any, Dict, List, Set, Tuple
+import base64
+import json
+import os
+
+CHECKPOINT_VERSION = 1
+# seconds between checkpoints when none is given
+DEFAULT_CHECKPOINT_INTERVAL = 60.0
+
+# a search state to resume from: the board, the options left on it, the regions already validated and its depth
+type SearchState = Tuple[Board, Undecided, Set[Loc], int]
+
+
+def encode_state(board: Board, undecided: Undecided, validated: Set[Loc], depth: int) -> Dict[str, Any]:
+    """A search state as JSON, with the board and the options left on it as base64 Board and Undecided snapshots."""
+    return {
+        "board": base64.b64encode(board.to_bytes()).decode(),
+        "opts": base64.b64encode(undecided.to_bytes(board.size)).decode(),
+        "validated": sorted([loc.x, loc.y] for loc in validated),
+        "depth": depth,
+    }
+
+
+def decode_state(state: Dict[str, Any]) -> SearchState:
+    board = Board.from_bytes(base64.b64decode(state["board"]))
+    undecided = Undecided.from_bytes(base64.b64decode(state["opts"]))
+    validated = {Loc(x, y) for x, y in state["validated"]}
+    return board, undecided, validated, state["depth"]
+
+
+class Checkpoint:
+    """
+    What is left of a search: the states still to explore, the solutions found so far and the stats up to now.
+    symmetries are the transforms the solutions still have to be mapped through when the search started
+    by breaking a symmetry of the puzzle, empty otherwise.
+    """
+    def __init__(self, puzzle: Board, frontier: List[SearchState], solutions: List[Board], stats: SolverStats,
+                 symmetries: List[Transform]):
+        self.puzzle = puzzle
+        self.frontier = frontier
+        self.solutions = solutions
+        self.stats = stats
+        self.symmetries = symmetries
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": CHECKPOINT_VERSION,
+            "puzzle": encode_board(self.puzzle),
+            "frontier": [encode_state(*state) for state in self.frontier],
+            "solutions": [encode_board(solution) for solution in self.solutions],
+            "stats": self.stats.to_dict(),
+            "symmetries": [list(transform) for transform in self.symmetries],
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> Checkpoint:
+        if data.get("version") != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {data.get('version')}, expected {CHECKPOINT_VERSION}")
+        return Checkpoint(decode_board(data["puzzle"]),
+                          [decode_state(state) for state in data["frontier"]],
+                          [decode_board(solution) for solution in data["solutions"]],
+                          SolverStats.from_dict(data["stats"]),
+                          [tuple(transform) for transform in data["symmetries"]])
+
+    def save(self, path: str) -> None:
+        """Writes the checkpoint to a temporary file first, so a crash while saving leaves the previous one intact."""
+        temporary_path = path + ".tmp"
+        with open(temporary_path, 'w') as file:
+            json.dump(self.to_dict(), file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary_path, path)
+
+
+def load_checkpoint(path: str, puzzle: Board) -> Checkpoint | None:
+    """The checkpoint saved at path, or None if there is none. Raises ValueError if it was saved for another puzzle."""
+    try:
+        with open(path) as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        return None
+    checkpoint = Checkpoint.from_dict(data)
+    if encode_board(checkpoint.puzzle) != encode_board(puzzle):
+        raise ValueError(f"Checkpoint '{path}' was saved for a different puzzle")
+    return checkpoint
@@ -0,0 +1,23 @@
+from functools import lru_cache
+from typing import Callable, Dict
+
+CLOSURE_CACHE_SIZE = 4096
+
+_caches: Dict[str, Callable] = {}
+
+def closure_cache(func: Callable) -> Callable:
+    """
+    Bounded LRU memoization for closure shapes. Cached functions should take a normalized
+    shape and return geometry relative to an anchor, so callers only need to translate the result.
+    """
+    cached = lru_cache(maxsize=CLOSURE_CACHE_SIZE)(func)
+    _caches[f"{func.__module__}.{func.__name__}"] = cached
+    return cached
+
+def closure_cache_info() -> Dict[str, tuple]:
+    """Hits, misses, maxsize and current size of every closure cache."""
+    return {name: cached.cache_info() for name, cached in _caches.items()}
+
+def clear_closure_caches() -> None:
+    for cached in _caches.values():
+        cached.cache_clear()
@@ -0,0 +1,87 @@
+from package.Board import Board
+from package.Cell import Cells
+from package.Loc import Loc
+from functools import lru_cache
+from typing import Dict, List, Set, Tuple
+
+
+@lru_cache(maxsize=None)
+def _neighbor_indices(size: int) -> Tuple[List[List[int]], List[List[int]]]:
+    """For every cell (as x * size + y), the cells touching it including at a corner, and those sharing an edge."""
+    surrounding: List[List[int]] = []
+    axis: List[List[int]] = []
+    for x in range(size):
+        for y in range(size):
+            surrounding.append([nx * size + ny for nx in (x - 1, x, x + 1) for ny in (y - 1, y, y + 1)
+                                if (nx, ny) != (x, y) and 0 <= nx < size and 0 <= ny < size])
+            axis.append([nx * size + ny for nx, ny in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1))
+                         if 0 <= nx < size and 0 <= ny < size])
+    return surrounding, axis
+
+
+def _unsettled_cells(board: Board, validated: Set[Loc]) -> List[bool]:
+    """
+    For every cell (as x * size + y), whether it is in a white region that can still change:
+    undecided, empty or a triangle, and not in a region already proven closed and valid.
+    """
+    unsettled = [cell.is_undecided_or_empty or cell.is_triangle for column in board.board for cell in column]
+    for loc in validated:
+        unsettled[int(loc.x) * board.size + int(loc.y)] = False
+    return unsettled
+
+
+def independent_components(board: Board, validated: Set[Loc]) -> List[Set[Loc]]:
+    """
+    Splits the cells of the white regions that can still change into components whose solutions don't depend
+    on each other: cells are in the same component when they touch, even only at a corner, or are next to the same
+    number. Every such region lies within one component, and every number only counts cells of one besides
+    settled ones, so a board is solved exactly when each of its components is. Regions in validated are closed,
+    so they can no longer grow into any component and are left out.
+    """
+    size = board.size
+    surrounding, axis = _neighbor_indices(size)
+    unsettled = _unsettled_cells(board, validated)
+    cells = [cell for column in board.board for cell in column]
+    # cells linked through a number they are next to
+    linked: Dict[int, List[int]] = {}
+    for i, cell in enumerate(cells):
+        if cell.is_number:
+            neighbors = [j for j in axis[i] if unsettled[j]]
+            for j in neighbors:
+                linked.setdefault(j, []).extend(neighbors)
+
+    seen = [False] * (size * size)
+    components = []
+    for start in range(size * size):
+        if not unsettled[start] or seen[start]:
+            continue
+        seen[start] = True
+        stack = [start]
+        component = set()
+        while stack:
+            i = stack.pop()
+            component.add(Loc(i // size, i % size))
+            for j in surrounding[i] + linked.get(i, []):
+                if unsettled[j] and not seen[j]:
+                    seen[j] = True
+                    stack.append(j)
+        components.append(component)
+    return components
+
+
+def isolate_component(board: Board, component: Set[Loc], validated: Set[Loc]) -> Board:
+    """
+    A copy of the board with the cells of every other component made black, along with the numbers next to them,
+    so that solving the copy solves the component alone. Closed regions are kept as they are.
+    """
+    size = board.size
+    _, axis = _neighbor_indices(size)
+    unsettled = _unsettled_cells(board, validated)
+    masked = [unsettled[x * size + y] and Loc(x, y) not in component for x in range(size) for y in range(size)]
+    isolated = board.copy()
+    for x in range(size):
+        for y in range(size):
+            i = x * size + y
+            if masked[i] or (board.board[x][y].is_number and any(masked[j] for j in axis[i])):
+                isolated.board[x][y] = Cells.BLACK
+    return isolated
@@ -0,0 +1,360 @@
+from __future__ import annotations
+from collections import deque
+from typing import Any, Deque, Dict, List, Tuple
+import argparse
+import asyncio
+import json
+import multiprocessing
+import queue
+import socket
+import threading
+import time
+from package.Board import Board
+from package.Solver import Solver
+from package.checkpoint import decode_state, encode_state
+from package.encoding import decode_board, encode_board
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8766
+# subproblems the coordinator splits the root into before handing any out
+DEFAULT_INITIAL_TASKS = 32
+# seconds to wait before asking busy workers for work again, after none of them had any to give
+STEAL_RETRY_DELAY = 0.1
+# seconds a worker keeps trying to reach a coordinator that isn't listening yet
+CONNECT_TIMEOUT = 30.0
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+# local workers are started from a clean server process, so they don't inherit the coordinator's sockets
+WORKER_CONTEXT = multiprocessing.get_context("forkserver")
+
+
+def encode_solver(solver: Solver) -> Dict[str, Any]:
+    """The search state of a solver as JSON, in the format checkpoints use."""
+    return encode_state(solver.board, solver.undecided, solver.validated, solver.depth)
+
+
+def decode_solver(state: Dict[str, Any]) -> Solver:
+    board, undecided, validated, depth = decode_state(state)
+    return Solver(board, undecided, validated=validated, break_symmetry=False, depth=depth)
+
+
+def split_root(board: Board, count: int) -> Tuple[List[Board], List[Solver]]:
+    """
+    Expands the search breadth first until there are at least count states to hand out (or nothing left),
+    returning the solutions found on the way and the states of the frontier.
+    """
+    frontier: Deque[Solver] = deque([Solver(board, break_symmetry=False)])
+    solutions: List[Board] = []
+    while frontier and len(frontier) < count:
+        found, children = frontier.popleft().branch()
+        solutions.extend(found)
+        frontier.extend(children)
+    return solutions, list(frontier)
+
+
+def _send(writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+    writer.write(json.dumps(message).encode() + b"\n")
+
+
+class _WorkerConnection:
+    def __init__(self, name: str, writer: asyncio.StreamWriter):
+        self.name = name
+        self.writer = writer
+        self.task: int | None = None
+        self.stealing = False
+        self.started = 0.0
+        # when the worker last answered a steal request with nothing to give
+        self.refused = float("-inf")
+
+
+class Coordinator:
+    """
+    Serves subproblems of one puzzle to workers over TCP, as JSON lines, and collects their solutions.
+
+    The root is split breadth first into initial_tasks states. Each worker searches one state at a time,
+    depth first, and streams every solution it finds. When a worker is idle and nothing is queued,
+    the coordinator asks the longest running busy worker to give up the shallow half of its stack, which
+    becomes new tasks. If a worker disconnects before finishing, its task is queued again from the start;
+    the solutions it already sent are kept, and solutions are stored by their encoding so repeats are dropped.
+    """
+    def __init__(self, board: Board, initial_tasks: int = DEFAULT_INITIAL_TASKS):
+        self.board = board
+        self.initial_tasks = initial_tasks
+        self.solutions: Dict[str, Board] = {}
+        self.pending: Deque[Tuple[int, Dict[str, Any]]] = deque()
+        self.tasks: Dict[int, Dict[str, Any]] = {}
+        self.workers: Dict[str, _WorkerConnection] = {}
+        self.nodes = 0
+        self.requeued = 0
+        self.steals = 0
+        self._next_task = 0
+        self._next_worker = 0
+        self._finished: asyncio.Event | None = None
+        self._retry: asyncio.TimerHandle | None = None
+
+    def _add_task(self, state: Dict[str, Any]) -> None:
+        task_id = self._next_task
+        self._next_task += 1
+        self.tasks[task_id] = state
+        self.pending.append((task_id, state))
+
+    def _add_solutions(self, boards: List[Board]) -> None:
+        for board in boards:
+            self.solutions.setdefault(encode_board(board), board)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.Server:
+        """Splits the root and starts listening for workers. await finished() for the solutions."""
+        self._finished = asyncio.Event()
+        solutions, frontier = split_root(self.board, self.initial_tasks)
+        self._add_solutions(solutions)
+        for solver in frontier:
+            self._add_task(encode_solver(solver))
+        if not self.tasks:
+            self._finished.set()
+        return await asyncio.start_server(self._handle_worker, host, port, limit=MAX_MESSAGE_BYTES)
+
+    async def finished(self) -> List[Board]:
+        await self._finished.wait()
+        for worker in self.workers.values():
+            _send(worker.writer, {"type": "stop"})
+        return list(self.solutions.values())
+
+    async def _handle_worker(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        worker = _WorkerConnection(f"worker-{self._next_worker}", writer)
+        self._next_worker += 1
+        self.workers[worker.name] = worker
+        try:
+            if self._finished.is_set():
+                _send(writer, {"type": "stop"})
+                return
+            self._assign()
+            while line := await reader.readline():
+                self._on_message(worker, json.loads(line))
+                await writer.drain()
+        except (ConnectionError, json.JSONDecodeError, asyncio.LimitOverrunError, ValueError):
+            pass
+        finally:
+            del self.workers[worker.name]
+            if worker.task is not None:
+                # the worker died with this task unfinished, so it is searched again from the start
+                self.pending.appendleft((worker.task, self.tasks[worker.task]))
+                self.requeued += 1
+            writer.close()
+            self._assign()
+
+    def _on_message(self, worker: _WorkerConnection, message: Dict[str, Any]) -> None:
+        kind = message["type"]
+        if kind == "solution":
+            self._add_solutions([decode_board(message["board"])])
+        elif kind == "split":
+            worker.stealing = False
+            for state in message["states"]:
+                self._add_task(state)
+            if message["states"]:
+                self.steals += 1
+            else:
+                worker.refused = time.monotonic()
+        elif kind == "done":
+            self.tasks.pop(message["task"], None)
+            worker.task = None
+            worker.stealing = False
+            self.nodes += message["nodes"]
+        self._assign()
+
+    def _assign(self) -> None:
+        idle = [worker for worker in self.workers.values() if worker.task is None]
+        for worker in idle:
+            if not self.pending:
+                break
+            worker.task, state = self.pending.popleft()
+            worker.started = time.monotonic()
+            _send(worker.writer, {"type": "task", "task": worker.task, "state": state})
+
+        if not self.pending and not any(worker.task is not None for worker in self.workers.values()):
+            if not self.tasks:
+                self._finished.set()
+            return
+        self._rebalance()
+
+    def _rebalance(self) -> None:
+        """Asks one busy worker per idle worker to give up part of its stack."""
+        idle = sum(1 for worker in self.workers.values() if worker.task is None)
+        if not idle or self.pending:
+            return
+        now = time.monotonic()
+        busy = [worker for worker in self.workers.values() if worker.task is not None and not worker.stealing]
+        # a worker that just had nothing to give is left alone for a while, rather than asked again at once
+        askable = sorted((worker for worker in busy if now - worker.refused >= STEAL_RETRY_DELAY),
+                         key=lambda worker: worker.started)
+        for worker in askable[:idle]:
+            worker.stealing = True
+            _send(worker.writer, {"type": "steal", "task": worker.task})
+        if len(askable) < len(busy) and self._retry is None:
+            def retry():
+                self._retry = None
+                self._assign()
+            self._retry = asyncio.get_running_loop().call_later(STEAL_RETRY_DELAY, retry)
+
+
+class Worker:
+    """
+    Connects to a coordinator and searches the states it is given, depth first with an explicit stack,
+    so that when asked it can give away the shallow half of the stack (the largest untouched subtrees).
+    A reader thread takes messages off the socket while the search runs on the calling thread.
+    """
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, connect_timeout: float = CONNECT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.tasks_done = 0
+        self._tasks: queue.Queue = queue.Queue()
+        self._steal_requested = threading.Event()
+        self._socket: socket.socket | None = None
+
+    def _connect(self) -> socket.socket:
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                return socket.create_connection((self.host, self.port))
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise
+                time.sleep(0.1)
+
+    def _send(self, message: Dict[str, Any]) -> None:
+        self._socket.sendall(json.dumps(message).encode() + b"\n")
+
+    def _read_messages(self) -> None:
+        with self._socket.makefile("r") as file:
+            for line in file:
+                message = json.loads(line)
+                if message["type"] == "steal":
+                    self._steal_requested.set()
+                elif message["type"] == "task":
+                    self._tasks.put(message)
+                elif message["type"] == "stop":
+                    break
+        self._tasks.put(None)
+
+    def run(self) -> None:
+        self._socket = self._connect()
+        reader = threading.Thread(target=self._read_messages, daemon=True)
+        reader.start()
+        try:
+            while (message := self._tasks.get()) is not None:
+                self._run_task(message["task"], decode_solver(message["state"]))
+        except OSError:
+            pass
+        finally:
+            self._socket.close()
+
+    def _run_task(self, task: int, root: Solver) -> None:
+        # a steal request that arrived after the previous task finished is stale
+        self._steal_requested.clear()
+        stack = [root]
+        nodes = 0
+        while stack:
+            if self._steal_requested.is_set():
+                self._steal_requested.clear()
+                given = stack[:len(stack) // 2]
+                del stack[:len(given)]
+                self._send({"type": "split", "task": task, "states": [encode_solver(solver) for solver in given]})
+            solver = stack.pop()
+            solutions, children = solver.branch()
+            nodes += solver.stats.nodes
+            for solution in solutions:
+                self._send({"type": "solution", "task": task, "board": encode_board(solution)})
+            stack.extend(children)
+        self._send({"type": "done", "task": task, "nodes": nodes})
+        self.tasks_done += 1
+
+
+def run_worker(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+    Worker(host, port).run()
+
+
+def start_local_workers(count: int, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> List[multiprocessing.Process]:
+    processes = [WORKER_CONTEXT.Process(target=run_worker, args=(host, port), daemon=True) for _ in range(count)]
+    for process in processes:
+        process.start()
+    return processes
+
+
+async def solve_distributed(board: Board, workers: int = 2, host: str = DEFAULT_HOST, port: int = 0,
+                            initial_tasks: int = DEFAULT_INITIAL_TASKS) -> Tuple[List[Board], Coordinator]:
+    """Solves the board with a coordinator and workers local worker processes, all on this machine."""
+    coordinator = Coordinator(board, initial_tasks)
+    server = await coordinator.serve(host, port)
+    port = server.sockets[0].getsockname()[1]
+    processes = start_local_workers(workers, host, port)
+    try:
+        async with server:
+            solutions = await coordinator.finished()
+    finally:
+        for process in processes:
+            process.join(1.0)
+            if process.is_alive():
+                process.terminate()
+    return solutions, coordinator
+
+
+def _load_board(source: str) -> Board:
+    from package.batch import find_puzzles, load_puzzle
+    _, kind, value = next(find_puzzles([source]))
+    return load_puzzle(kind, value)
+
+
+async def _coordinate(args: argparse.Namespace) -> None:
+    coordinator = Coordinator(_load_board(args.board), args.initial_tasks)
+    start = time.perf_counter()
+    server = await coordinator.serve(args.host, args.port)
+    print(f"coordinator listening on {args.host}:{args.port} with {len(coordinator.tasks)} tasks")
+    async with server:
+        solutions = await coordinator.finished()
+    _report(solutions, coordinator, time.perf_counter() - start)
+
+
+def _report(solutions: List[Board], coordinator: Coordinator, elapsed: float) -> None:
+    for solution in solutions:
+        print(solution)
+    print(f"{len(solutions)} solutions in {elapsed:.2f}s, {coordinator.nodes} nodes, "
+          f"{coordinator.steals} steals, {coordinator.requeued} tasks requeued")
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Split one puzzle's search across worker processes over TCP.")
+    subparsers = parser.add_subparsers(dest="role", required=True)
+
+    coordinator = subparsers.add_parser("coordinator", help="serve a puzzle's subproblems and collect the solutions")
+    coordinator.add_argument("board", help="text board or screenshot to solve")
+    coordinator.add_argument("--host", default=DEFAULT_HOST, help="address to listen on, e.g. 0.0.0.0 for other machines")
+    coordinator.add_argument("--port", type=int, default=DEFAULT_PORT)
+    coordinator.add_argument("--initial-tasks", type=int, default=DEFAULT_INITIAL_TASKS)
+
+    worker = subparsers.add_parser("worker", help="search subproblems served by a coordinator")
+    worker.add_argument("--host", default=DEFAULT_HOST, help="address of the coordinator")
+    worker.add_argument("--port", type=int, default=DEFAULT_PORT)
+    worker.add_argument("--processes", type=int, default=1, help="worker processes to run on this machine")
+
+    local = subparsers.add_parser("local", help="run a coordinator and worker processes on localhost")
+    local.add_argument("board", help="text board or screenshot to solve")
+    local.add_argument("--workers", type=int, default=multiprocessing.cpu_count())
+    local.add_argument("--initial-tasks", type=int, default=DEFAULT_INITIAL_TASKS)
+    args = parser.parse_args(argv)
+
+    if args.role == "coordinator":
+        asyncio.run(_coordinate(args))
+    elif args.role == "worker":
+        if args.processes == 1:
+            run_worker(args.host, args.port)
+        else:
+            for process in start_local_workers(args.processes, args.host, args.port):
+                process.join()
+    else:
+        start = time.perf_counter()
+        solutions, coordinator = asyncio.run(solve_distributed(_load_board(args.board), args.workers,
+                                                               initial_tasks=args.initial_tasks))
+        _report(solutions, coordinator, time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,10 @@
 from package.Board import Board
 from package.Cell import Cell, Cells
 from package.Loc import Loc
-from typing import Set, Callable
+from typing import Set, Callable, Tuple
 from package.Undecided import Undecided
 from package.util import AXIS_NEIGHBORS
+from package.closure_cache import closure_cache
 
 def get_connected_satisfying_condition(board: Board, loc: Loc, condition: Callable[[Cell], bool]) -> list[Loc]:
     visited = set()
@@ -26,6 +27,11 @@ def get_connected_satisfying_condition(board: Board, loc: Loc, condition: Callab
 
     return satisfying
 
+@closure_cache
+def _axis_rectangle_shape(width: int, height: int) -> Tuple[Tuple[int, int], ...]:
+    """Offsets of every cell in a width x height axis rectangle, relative to its bottom left corner."""
+    return tuple((dx, dy) for dx in range(width) for dy in range(height))
+
 def axis_rectangle_closure(loc_set: set[Loc]) -> set[Loc]:
     if not loc_set:
         raise ValueError("Expected non-empty set")
@@ -35,22 +41,42 @@ def axis_rectangle_closure(loc_set: set[Loc]) -> set[Loc]:
     y_min = int(min(loc.y for loc in loc_set))
     y_max = int(max(loc.y for loc in loc_set))
 
-    return {Loc(x, y) for x in range(x_min, x_max + 1) for y in range(y_min, y_max + 1)}
+    shape = _axis_rectangle_shape(x_max - x_min + 1, y_max - y_min + 1)
+    return {Loc(x_min + dx, y_min + dy) for dx, dy in shape}
+
+@closure_cache
+def _diagonal_rectangle_shape(u_length: int, v_length: int, parity: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    Offsets of the cells in a diagonal rectangle spanning u_length x v_length in diagonal coordinates,
+    relative to its anchor. parity is that of the anchor's u + v, which decides which diagonal points are cells.
+    """
+    offsets = []
+    for du in range(u_length + 1):
+        for dv in range(parity, parity + v_length + 1):
+            if (du + dv) % 2 == 0:
+                offsets.append(((du + dv) // 2, (dv - du) // 2))
+    return tuple(offsets)
 
 def diagonal_rectangle_closure(loc_set: set[Loc]) -> set[Loc]:
     """
     translate to diagonal coordinates, find the axis rectangle closure, and translate back
     x = (0.5, -0.5), y = (0.5, 0.5)
     """
-    diagonal_locs = {Loc(loc.x - loc.y, loc.x + loc.y) for loc in loc_set}
-    diagonal_closure_in_diagonal_coords = axis_rectangle_closure(diagonal_locs)
-    diagonal_closure_in_axis_coords = set()
-    for loc in diagonal_closure_in_diagonal_coords:
-        axis_coords = 0.5 * Loc(loc.x + loc.y, -loc.x + loc.y)
-        if axis_coords.is_integral():
-            diagonal_closure_in_axis_coords.add(axis_coords)
-            
-    return diagonal_closure_in_axis_coords
+    if not loc_set:
+        raise ValueError("Expected non-empty set")
+
+    u_min = int(min(loc.x - loc.y for loc in loc_set))
+    u_max = int(max(loc.x - loc.y for loc in loc_set))
+    v_min = int(min(loc.x + loc.y for loc in loc_set))
+    v_max = int(max(loc.x + loc.y for loc in loc_set))
+    parity = (u_min + v_min) % 2
+
+    # anchor at (u_min, v_min - parity) in diagonal coordinates, which is always integral in axis coordinates
+    anchor_x = (u_min + v_min - parity) // 2
+    anchor_y = (v_min - parity - u_min) // 2
+
+    shape = _diagonal_rectangle_shape(u_max - u_min, v_max - v_min, parity)
+    return {Loc(anchor_x + dx, anchor_y + dy) for dx, dy in shape}
     
 
 def set_forms_rectangle(loc_set: set[Loc]) -> bool:
@@ -60,6 +86,29 @@ def set_forms_rectangle(loc_set: set[Loc]) -> bool:
     expected = axis_rectangle_closure(loc_set)
     return expected == loc_set
 
+def closed_axis_rectangle(board: Board, initial_empty_loc: Loc) -> set[Loc] | None:
+    """
+    Returns the region of initial_empty_loc if it is fully decided and forms an axis rectangle, else None.
+    Bails out as soon as an undecided cell is reached, so open regions are cheap to reject.
+    """
+    visited = {initial_empty_loc}
+    to_visit = [initial_empty_loc]
+
+    while to_visit:
+        current = to_visit.pop()
+        for delta in AXIS_NEIGHBORS:
+            neighbor = current + delta
+            if neighbor in visited:
+                continue
+            cell = board[neighbor]
+            if cell == Cells.UNDECIDED:
+                return None
+            if cell == Cells.DECIDED_EMPTY:
+                visited.add(neighbor)
+                to_visit.append(neighbor)
+
+    return visited if set_forms_rectangle(visited) else None
+
 def validate_axis_rectangle(board: Board, initial_empty_loc: Loc) -> bool:
     if not board[initial_empty_loc].is_undecided_or_empty:
         return False
@@ -0,0 +1,161 @@
+from __future__ import annotations
+from package.Board import Board
+from package.Cell import CELL_CODES, CELL_TO_CODE, Cell, Cells
+from typing import Dict, List
+
+# One character per cell for the compact line format. Any character may be followed by a lowercase letter,
+# which repeats it: 'a' means the cell appears 2 times in a row, 'b' 3 times, up to 'z' for 27 times.
+CELL_TO_CHAR: Dict[Cell, str] = {
+    Cells.UNDECIDED: '.',
+    Cells.DECIDED_EMPTY: '_',
+    Cells.BLACK: 'X',
+    Cells.ZERO: '0',
+    Cells.ONE: '1',
+    Cells.TWO: '2',
+    Cells.THREE: '3',
+    Cells.FOUR: '4',
+    Cells.LOWER_LEFT: 'A',
+    Cells.LOWER_RIGHT: 'B',
+    Cells.UPPER_LEFT: 'C',
+    Cells.UPPER_RIGHT: 'D',
+}
+CHAR_TO_CELL: Dict[str, Cell] = {char: cell for cell, char in CELL_TO_CHAR.items()}
+RUN_LENGTH_CHARS = "abcdefghijklmnopqrstuvwxyz"
+MAX_RUN = len(RUN_LENGTH_CHARS) + 1
+
+# puzz.link style URLs, which only hold the clues of a puzzle
+URL_PREFIX = "https://puzz.link/p?"
+URL_PUZZLE_NAME = "shakashaka"
+# 'g' skips one undecided cell, 'z' skips 20
+URL_SKIP_CHARS = "ghijklmnopqrstuvwxyz"
+NUMBER_CELLS = [Cells.ZERO, Cells.ONE, Cells.TWO, Cells.THREE, Cells.FOUR]
+
+
+def reading_order(board: Board) -> List[Cell]:
+    """The cells of the board as printed: top row first, left to right."""
+    return [board.board[x][y] for y in reversed(range(board.size)) for x in range(board.size)]
+
+def board_from_reading_order(cells: List[Cell], size: int) -> Board:
+    if len(cells) != size * size:
+        raise ValueError(f"Expected {size * size} cells for a {size}x{size} board, got {len(cells)}")
+    return Board([[cells[(size - 1 - y) * size + x] for y in range(size)] for x in range(size)])
+
+def encode_board(board: Board) -> str:
+    """
+    One line holding the size and the run length encoded cells, e.g. '5:.X.a2.dX.j2.X' for examples/empty_5.png.
+    Works for puzzles and for (partial) solutions alike.
+    """
+    chars = [CELL_TO_CHAR[cell] for cell in reading_order(board)]
+    body = []
+    i = 0
+    while i < len(chars):
+        run = 1
+        while i + run < len(chars) and chars[i + run] == chars[i] and run < MAX_RUN:
+            run += 1
+        body.append(chars[i] if run == 1 else chars[i] + RUN_LENGTH_CHARS[run - 2])
+        i += run
+    return f"{board.size}:{''.join(body)}"
+
+def decode_board(line: str) -> Board:
+    size_string, separator, body = line.strip().partition(':')
+    if not separator or not size_string.isdigit():
+        raise ValueError(f"Expected '<size>:<cells>', got '{line.strip()}'")
+    cells = []
+    for char in body:
+        if char in CHAR_TO_CELL:
+            cells.append(CHAR_TO_CELL[char])
+        elif char in RUN_LENGTH_CHARS and cells:
+            cells.extend([cells[-1]] * (RUN_LENGTH_CHARS.index(char) + 1))
+        else:
+            raise ValueError(f"Unknown character '{char}' in encoded board")
+    return board_from_reading_order(cells, int(size_string))
+
+def board_to_url(board: Board) -> str:
+    """
+    The puzzle as a puzz.link URL. Numbers are written in hex with the count of empty cells after them (up to 2) added
+    in steps of 5, black cells are '.', and runs of up to 20 undecided cells are 'g' to 'z'.
+    Only the clues can be written, so any triangle or decided cell is an error.
+    """
+    body = []
+    skipped = 0
+    cells = reading_order(board)
+    i = 0
+    while i < len(cells):
+        cell = cells[i]
+        if cell == Cells.UNDECIDED:
+            skipped += 1
+            if skipped == len(URL_SKIP_CHARS):
+                body.append(URL_SKIP_CHARS[skipped - 1])
+                skipped = 0
+            i += 1
+            continue
+        if skipped:
+            body.append(URL_SKIP_CHARS[skipped - 1])
+            skipped = 0
+        if cell.is_number:
+            gap = 0
+            while gap < 2 and i + 1 + gap < len(cells) and cells[i + 1 + gap] == Cells.UNDECIDED:
+                gap += 1
+            body.append(format(cell.number + 5 * gap, 'x'))
+            i += 1 + gap
+        elif cell == Cells.BLACK:
+            body.append('.')
+            i += 1
+        else:
+            raise ValueError(f"URLs can only hold puzzles, found '{cell}'")
+    if skipped:
+        body.append(URL_SKIP_CHARS[skipped - 1])
+    return f"{URL_PREFIX}{URL_PUZZLE_NAME}/{board.size}/{board.size}/{''.join(body)}"
+
+def board_from_url(url: str) -> Board:
+    """Reads a full puzz.link URL, or just its 'shakashaka/<columns>/<rows>/<body>' part."""
+    _, found, rest = url.strip().partition(URL_PUZZLE_NAME + "/")
+    parts = rest.split('/')
+    if not found or len(parts) != 3 or not parts[0].isdigit() or not parts[1].isdigit():
+        raise ValueError(f"Not a shakashaka URL: '{url}'")
+    columns, rows, body = int(parts[0]), int(parts[1]), parts[2]
+    if columns != rows:
+        raise ValueError(f"Only square boards are supported, got {columns}x{rows}")
+
+    cells = []
+    for char in body:
+        if '0' <= char <= '4':
+            cells.append(NUMBER_CELLS[int(char)])
+        elif '5' <= char <= '9' or 'a' <= char <= 'e':
+            value = int(char, 16)
+            cells.append(NUMBER_CELLS[value % 5])
+            cells.extend([Cells.UNDECIDED] * (value // 5))
+        elif char == '.':
+            cells.append(Cells.BLACK)
+        elif char in URL_SKIP_CHARS:
+            cells.extend([Cells.UNDECIDED] * (URL_SKIP_CHARS.index(char) + 1))
+        else:
+            raise ValueError(f"Unknown character '{char}' in URL")
+    # trailing undecided cells may be left out
+    cells.extend([Cells.UNDECIDED] * (columns * rows - len(cells)))
+    return board_from_reading_order(cells[:columns * rows], columns)
+
+def record_size(max_size: int) -> int:
+    """Bytes in one binary record for boards up to max_size: the size, then two cells per byte."""
+    return 1 + (max_size * max_size + 1) // 2
+
+def pack_board(board: Board, max_size: int) -> bytes:
+    """A fixed width record of record_size(max_size) bytes, cells in reading order, zero padded."""
+    if board.size > max_size:
+        raise ValueError(f"Board of size {board.size} does not fit in records for size {max_size}")
+    codes = [CELL_TO_CODE[cell] for cell in reading_order(board)]
+    codes.extend([0] * (2 * (record_size(max_size) - 1) - len(codes)))
+    return bytes([board.size]) + bytes(high << 4 | low for high, low in zip(codes[0::2], codes[1::2]))
+
+def unpack_board(record: bytes | memoryview) -> Board:
+    record = bytes(record)
+    size = record[0]
+    if size * size > 2 * (len(record) - 1):
+        raise ValueError(f"Record of {len(record)} bytes is too short for a board of size {size}")
+    codes = []
+    for byte in record[1:1 + (size * size + 1) // 2]:
+        codes.append(byte >> 4)
+        codes.append(byte & 0x0F)
+    if max(codes, default=0) >= len(CELL_CODES):
+        raise ValueError("Unknown cell code in record")
+    return board_from_reading_order([CELL_CODES[code] for code in codes[:size * size]], size)
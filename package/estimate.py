@@ -0,0 +1,228 @@
+from __future__ import annotations
+from package.Board import Board
+from package.SearchHooks import SearchHooks
+from package.Solver import Solver
+from package.SolverStats import SolverStats
+from package.io import load_board_from_text
+from typing import Any, Dict, List, Tuple
+import argparse
+import json
+import random
+import statistics
+import threading
+import time
+
+DEFAULT_PROBES = 32
+
+
+class TreeEstimate:
+    """
+    The size of a search tree estimated from random probes, in branches (options tried at a branching cell,
+    as counted by on_branch_entered and SolverStats.decisions). low and high are the smallest and largest estimate
+    a single probe makes of the whole tree on its own, which vary by orders of magnitude.
+    seconds is the time the top of the tree took to expand plus branches times the time the probes took
+    per branch they tried.
+    """
+    def __init__(self, branches: float, probe_estimates: List[float], seconds_per_branch: float, root_time: float,
+                 probe_time: float):
+        self.probes = len(probe_estimates)
+        self.branches = branches
+        self.low = min(probe_estimates)
+        self.high = max(probe_estimates)
+        self.seconds_per_branch = seconds_per_branch
+        self.seconds = root_time + self.branches * seconds_per_branch
+        self.probe_time = probe_time
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "probes": self.probes,
+            "branches": self.branches,
+            "low": self.low,
+            "high": self.high,
+            "seconds": self.seconds,
+            "probe_time": self.probe_time,
+        }
+
+
+def _options_tried(solver: Solver, children: List[Solver]) -> int:
+    """
+    The options tried by the last branch step of a solver with fresh stats: every option tried records a decision,
+    the ones that failed in the solver's stats and the rest in their own.
+    """
+    return solver.stats.decisions + sum(child.stats.decisions for child in children)
+
+
+def probe(solver: Solver, rng: random.Random) -> Tuple[float, int]:
+    """
+    One of Knuth's random probes: follows a single random path from the solver's state to a leaf, and estimates
+    the tree below it as if every level had as many options as the ones seen on the path.
+    Returns the estimated number of branches and the number of branches the probe itself tried.
+    The solver is used up by the probe.
+    """
+    estimate = 0.0
+    weight = 1.0
+    tried_total = 0
+    while True:
+        solver.stats = SolverStats()
+        _, children = solver.branch()
+        tried = _options_tried(solver, children)
+        estimate += weight * tried
+        tried_total += tried
+        if not children:
+            return estimate, tried_total
+        weight *= len(children)
+        solver = rng.choice(children)
+
+
+def _expand_top(board: Board, width: int) -> Tuple[List[Solver], int]:
+    """
+    Branches the top of the search tree level by level, the root as solve() would, until a level has at least width
+    states or the tree runs out. Returns that level and the options tried above it.
+    """
+    root = Solver(board.copy())
+    root.stats = SolverStats()
+    _, level, _ = root.branch_root()
+    tried = _options_tried(root, level)
+    while level and len(level) < width:
+        below = []
+        for solver in level:
+            solver.stats = SolverStats()
+            _, children = solver.branch()
+            tried += _options_tried(solver, children)
+            below.extend(children)
+        level = below
+    return level, tried
+
+
+def estimate_tree_size(board: Board, probes: int = DEFAULT_PROBES, seed: int | None = None) -> TreeEstimate:
+    """
+    Estimates how many branches solving the board takes, and how long, without solving it.
+    Search trees here are lopsided, with nearly all the work often under one of the first few options, which a probe
+    from the root only finds now and then. So the top levels are branched in full, until a level is a quarter as wide
+    as there are probes, and the probes are spread evenly over the states on that level. The estimate is the branches
+    above it plus the mean of the probes from each state, which needs far fewer probes for the same accuracy.
+    Each probe costs about as much as one path of the search, so this is cheap next to the search on hard boards.
+    """
+    if probes < 1:
+        raise ValueError(f"probes must be positive, got {probes}")
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    level, top_tried = _expand_top(board, max(1, probes // 4))
+    top_time = time.perf_counter() - start
+    if not level:
+        return TreeEstimate(top_tried, [top_tried], 0.0, top_time, top_time)
+
+    below: List[List[float]] = [[] for _ in level]
+    tried = 0
+    for i in range(max(probes, len(level))):
+        state = level[i % len(level)]
+        estimate, probe_tried = probe(Solver(state.board.copy(), state.undecided.copy(), validated=state.validated.copy(),
+                                             break_symmetry=False, depth=state.depth), rng)
+        below[i % len(level)].append(estimate)
+        tried += probe_tried
+    branches = top_tried + sum(statistics.fmean(estimates) for estimates in below)
+    # what each probe alone says of the whole tree, as if it were a probe through the top levels
+    single_estimates = [top_tried + len(level) * estimate for estimates in below for estimate in estimates]
+    elapsed = time.perf_counter() - start
+    return TreeEstimate(branches, single_estimates, (elapsed - top_time) / max(tried, 1), top_time, elapsed)
+
+
+class ProgressEstimate:
+    """
+    A snapshot of a running search: branches entered so far, the fraction of the search tree finished,
+    and the estimated total branches and seconds left, None until there is anything to estimate them from.
+    """
+    def __init__(self, branches: int, done: float, elapsed: float, estimated_branches: float | None,
+                 remaining_seconds: float | None):
+        self.branches = branches
+        self.done = done
+        self.elapsed = elapsed
+        self.estimated_branches = estimated_branches
+        self.remaining_seconds = remaining_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "branches": self.branches,
+            "done": self.done,
+            "elapsed": self.elapsed,
+            "estimated_branches": self.estimated_branches,
+            "remaining_seconds": self.remaining_seconds,
+        }
+
+
+class SearchEstimator(SearchHooks):
+    """
+    Estimates the size and time left of a running search. Pass it as Solver(board, hooks=[estimator])
+    and poll estimate() from any thread.
+
+    Each solver covers a share of the search tree, splitting every branching evenly among its options, and the shares
+    of the leaves reached so far add up to the fraction done. That fraction says little about the work left: on
+    lopsided trees the options that lead nowhere hold most of the share and are finished within the first
+    branches, and the rest of the search fills in what little share is left. So the total is the probes' estimate
+    until the search passes it, and only then the branches so far extrapolated by the fraction done.
+    Without probes only the latter is used. The time left is the branches left at the rate the search has gone so far.
+    """
+    def __init__(self, tree: TreeEstimate | None = None):
+        self.tree = tree
+        self.branches = 0
+        self.done = 0.0
+        self._start: float | None = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def for_board(board: Board, probes: int = DEFAULT_PROBES, seed: int | None = None) -> SearchEstimator:
+        return SearchEstimator(estimate_tree_size(board, probes, seed))
+
+    def probe(self, board: Board, probes: int = DEFAULT_PROBES, seed: int | None = None) -> None:
+        """Runs the probes for an estimator created without them, e.g. once a search turns out to take a while."""
+        self.tree = estimate_tree_size(board, probes, seed)
+
+    def _started(self) -> None:
+        if self._start is None:
+            self._start = time.perf_counter()
+
+    def on_branch_entered(self, solver, loc, cell):
+        with self._lock:
+            self._started()
+            self.branches += 1
+
+    def on_assignment(self, solver, loc, cell):
+        if self._start is None:
+            with self._lock:
+                self._started()
+
+    def on_solution(self, solver, board):
+        with self._lock:
+            self.done += solver.share
+
+    def on_backtrack(self, solver, loc, cell):
+        with self._lock:
+            self.done += solver.share
+
+    def estimate(self) -> ProgressEstimate:
+        with self._lock:
+            branches = self.branches
+            done = min(self.done, 1.0)
+            elapsed = time.perf_counter() - self._start if self._start is not None else 0.0
+        if self.tree is None and done == 0:
+            return ProgressEstimate(branches, done, elapsed, None, None)
+        extrapolated = branches / done if done > 0 else branches
+        estimated_branches = max(self.tree.branches, extrapolated) if self.tree is not None else extrapolated
+        if branches:
+            remaining_seconds = (estimated_branches - branches) * elapsed / branches
+        else:
+            remaining_seconds = self.tree.seconds if self.tree is not None else None
+        return ProgressEstimate(branches, done, elapsed, estimated_branches, remaining_seconds)
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Estimate how long a board takes to solve, without solving it.")
+    parser.add_argument("board", help="text board to estimate")
+    parser.add_argument("--probes", type=int, default=DEFAULT_PROBES)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+    print(json.dumps(estimate_tree_size(load_board_from_text(args.board), args.probes, args.seed).to_dict()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from package.Board import Board, undecided_board
+from package.Cell import Cells
+from package.RectangleSolver import Piece, RectangleSolver
+from package.SolutionValidator import SolutionValidator
+from package.number_logic import count_adjacent_triangles
+from package.util import AXIS_NEIGHBORS
+from typing import Iterator, List, Set, Tuple
+import argparse
+import os
+import random
+
+NUMBER_CELLS = [Cells.ZERO, Cells.ONE, Cells.TWO, Cells.THREE, Cells.FOUR]
+# chance that a cell the fill reaches is left black instead of starting a new rectangle
+BLACK_PROBABILITY = 0.25
+# chance that a new rectangle is diagonal, when a diagonal one fits
+DIAGONAL_PROBABILITY = 0.5
+# solutions that turn out not to be unique even with every clue shown are thrown away, up to this many times
+MAX_ATTEMPTS = 1000
+
+
+class _Shape:
+    """A piece that fits on an empty board, with its cells and the cells bordering it as ints (x * size + y)."""
+    def __init__(self, piece: Piece, size: int):
+        self.piece = piece
+        self.cells = frozenset(loc.x * size + loc.y for loc in piece.cells)
+        self.border = frozenset(
+            (loc.x + delta.x) * size + loc.y + delta.y
+            for loc in piece.cells for delta in AXIS_NEIGHBORS
+            if 0 <= loc.x + delta.x < size and 0 <= loc.y + delta.y < size
+        ) - self.cells
+        self.weight = 1 / len(piece.cells) ** 2
+
+
+@lru_cache(maxsize=None)
+def _shapes_by_cell(size: int) -> List[List[_Shape]]:
+    """For every cell (as x * size + y), every rectangle that fits on an empty board of the given size and covers it."""
+    by_cell: List[List[_Shape]] = [[] for _ in range(size * size)]
+    for piece in RectangleSolver(undecided_board(size)).pieces:
+        shape = _Shape(piece, size)
+        for cell in shape.cells:
+            by_cell[cell].append(shape)
+    return by_cell
+
+
+def random_solution(size: int, rng: random.Random) -> Board:
+    """
+    A random solved board: cells are visited in random order and each one is left black or covered by a random
+    rectangle that fits among the ones already placed. Smaller rectangles are favoured so there are enough
+    black cells to put clues on. Axis rectangles may not share an edge, or they would merge into one region.
+    """
+    shapes_by_cell = _shapes_by_cell(size)
+    board = Board([[Cells.BLACK for _ in range(size)] for _ in range(size)])
+    taken: Set[int] = set()
+    axis_cells: Set[int] = set()
+
+    def fits(shape: _Shape) -> bool:
+        return taken.isdisjoint(shape.cells) and (not shape.piece.is_axis or axis_cells.isdisjoint(shape.border))
+
+    cells = list(range(size * size))
+    rng.shuffle(cells)
+    for cell in cells:
+        if cell in taken:
+            continue
+        if rng.random() < BLACK_PROBABILITY:
+            taken.add(cell)
+            continue
+        candidates = [shape for shape in shapes_by_cell[cell] if fits(shape)]
+        diagonal = [shape for shape in candidates if not shape.piece.is_axis]
+        if diagonal and rng.random() < DIAGONAL_PROBABILITY:
+            candidates = diagonal
+        if not candidates:
+            taken.add(cell)
+            continue
+        shape = rng.choices(candidates, weights=[shape.weight for shape in candidates])[0]
+        for loc, piece_cell in shape.piece.cells.items():
+            board[loc] = piece_cell
+        taken.update(shape.cells)
+        if shape.piece.is_axis:
+            axis_cells.update(shape.cells)
+    return board
+
+
+def clues_from_solution(solution: Board) -> Board:
+    """The puzzle with every black cell numbered with its count of adjacent triangles."""
+    puzzle = Board([[Cells.UNDECIDED for _ in range(solution.size)] for _ in range(solution.size)])
+    for loc, cell in solution:
+        if cell == Cells.BLACK:
+            puzzle[loc] = NUMBER_CELLS[count_adjacent_triangles(solution, loc)]
+    return puzzle
+
+
+def has_unique_solution(puzzle: Board) -> bool:
+    return len(RectangleSolver(puzzle).solve(max_solutions=2)) == 1
+
+
+def generate_puzzle(size: int, seed: int | None = None, difficulty: float = 1.0) -> Tuple[Board, Board]:
+    """
+    A random puzzle with exactly one solution, and that solution.
+    Starting from every black cell numbered, clues are removed in random order as long as the solution stays unique.
+    difficulty is the fraction of clues that removal is attempted on: 0 keeps every clue,
+    1 gives a minimal puzzle where no remaining clue can be dropped.
+    """
+    if not 0 <= difficulty <= 1:
+        raise ValueError(f"Difficulty must be between 0 and 1, got {difficulty}")
+    rng = random.Random(seed)
+    for _ in range(MAX_ATTEMPTS):
+        solution = random_solution(size, rng)
+        if not SolutionValidator(solution).validate():
+            continue
+        puzzle = clues_from_solution(solution)
+        if has_unique_solution(puzzle):
+            break
+    else:
+        raise ValueError(f"Could not generate a unique {size}x{size} puzzle in {MAX_ATTEMPTS} attempts")
+
+    clue_locs = [loc for loc, cell in puzzle if cell.is_number]
+    rng.shuffle(clue_locs)
+    for loc in clue_locs[:round(difficulty * len(clue_locs))]:
+        number = puzzle[loc]
+        puzzle[loc] = Cells.BLACK
+        if not has_unique_solution(puzzle):
+            puzzle[loc] = number
+
+    # the solution shows the clues the puzzle kept, as a solver's would
+    for loc, cell in puzzle:
+        if cell != Cells.UNDECIDED:
+            solution[loc] = cell
+    return puzzle, solution
+
+
+def _generate_one(args: Tuple[int, int, float]) -> Tuple[Board, Board]:
+    return generate_puzzle(*args)
+
+
+def generate_puzzles(count: int, size: int, seed: int = 0, difficulty: float = 1.0,
+                     workers: int | None = None) -> Iterator[Tuple[Board, Board]]:
+    """
+    Yields count (puzzle, solution) pairs, generated across a process pool.
+    Puzzle i always comes from seed + i, so the output doesn't depend on the number of workers.
+    """
+    jobs = [(size, seed + i, difficulty) for i in range(count)]
+    if workers == 1:
+        yield from map(_generate_one, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_generate_one, jobs, chunksize=max(1, count // (4 * (workers or os.cpu_count() or 1))))
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Generate random puzzles with a unique solution.")
+    parser.add_argument("--size", type=int, default=10)
+    parser.add_argument("--count", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--difficulty", type=float, default=1.0,
+                        help="fraction of clues to try removing, from 0 (all clues kept) to 1 (minimal puzzles)")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per cpu)")
+    parser.add_argument("--output-dir", default=None,
+                        help="write each puzzle as a text file loadable with load_board_from_text instead of printing it")
+    parser.add_argument("--solutions", action="store_true", help="also write (or print) each solution")
+    args = parser.parse_args(argv)
+
+    if args.output_dir is not None:
+        os.makedirs(args.output_dir, exist_ok=True)
+    puzzles = generate_puzzles(args.count, args.size, args.seed, args.difficulty, args.workers)
+    for i, (puzzle, solution) in enumerate(puzzles):
+        name = f"{args.size}x{args.size}_{args.seed + i}"
+        if args.output_dir is None:
+            print(name)
+            print(puzzle)
+            if args.solutions:
+                print(solution)
+            continue
+        with open(os.path.join(args.output_dir, name + ".txt"), 'w') as file:
+            file.write(str(puzzle) + "\n")
+        if args.solutions:
+            with open(os.path.join(args.output_dir, name + "_solution.txt"), 'w') as file:
+                file.write(str(solution) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,318 @@
+from PIL import Image
+import numpy as np
+import os
+from functools import lru_cache
+from package.Board import Board
+from package.Cell import Cells
+from package.Loc import Loc
+
+# Mapping template filenames to Cell types
+TEMPLATE_FILENAME_TO_CELL_TYPE = {
+    'black': Cells.BLACK,
+    'undecided': Cells.UNDECIDED,
+    'zero': Cells.ZERO,
+    'one': Cells.ONE,
+    'two': Cells.TWO,
+    'three': Cells.THREE,
+    'four': Cells.FOUR,
+    'lower_left': Cells.LOWER_LEFT,
+    'lower_right': Cells.LOWER_RIGHT,
+    'upper_left': Cells.UPPER_LEFT,
+    'upper_right': Cells.UPPER_RIGHT,
+    'empty': Cells.DECIDED_EMPTY
+}
+WHITE_THRESHOLD = 240
+CELL_SIZE = 25
+GRID_LINE_WIDTH = 1
+# grid detection: board sizes considered, how far apart a line and its surroundings are compared,
+# how much darker a line has to be, how many grid sizes per axis are checked against the templates
+# (and how close to the best projection score they have to be),
+# and how far (as a fraction of the pitch) a line may be snapped from its evenly spaced position
+MAX_GRID_SIZE = 40
+MIN_CELL_PITCH = 8
+LINE_DISTANCES = (2, 3, 5, 8)
+LINE_CONTRAST = 20
+GRID_SIZE_CANDIDATES = 5
+GRID_SIZE_MIN_RELATIVE_SCORE = 0.6
+LINE_SNAP_FRACTION = 0.15
+# relative margin between the best and second best template below which a match is ambiguous
+AMBIGUOUS_MARGIN = 0.5
+# pixel offsets tried again for ambiguous cells when the board isn't at the native scale
+ALIGNMENT_SHIFTS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1) if (dx, dy) != (0, 0)]
+
+def _line_profile(gray):
+    """
+    For each column, the fraction of rows in which it stands out from the pixels a few columns to either side,
+    i.e. looks like part of a thin vertical line. Several distances are tried so lines widened by scaling still count.
+    """
+    profile = np.zeros(gray.shape[1], dtype=np.float32)
+    for distance in LINE_DISTANCES:
+        if gray.shape[1] <= 2 * distance:
+            break
+        center = gray[:, distance:-distance]
+        darker = (center < gray[:, :-2 * distance] - LINE_CONTRAST) & (center < gray[:, 2 * distance:] - LINE_CONTRAST)
+        profile[distance:-distance] = np.maximum(profile[distance:-distance], darker.mean(axis=0))
+    return profile
+
+def _widen(profile):
+    """Let a line that resampling smeared across two pixels count at either of them."""
+    padded = np.pad(profile, 1)
+    return np.maximum(np.maximum(padded[:-2], padded[1:-1]), padded[2:])
+
+def _grid_size_scores(profile):
+    """
+    Scores every grid size by how much more line-like the predicted grid lines are than the predicted cell centers.
+    The crop starts and ends on the outer grid lines, so a grid size fixes both the pitch and the offset.
+    """
+    length = len(profile)
+    profile = _widen(profile)
+    scores = {}
+    for grid_size in range(2, MAX_GRID_SIZE + 1):
+        pitch = (length - 1) / grid_size
+        if pitch < MIN_CELL_PITCH:
+            break
+        lines = np.rint(np.arange(1, grid_size) * pitch).astype(int)
+        centers = np.rint((np.arange(grid_size) + 0.5) * pitch).astype(int)
+        scores[grid_size] = profile[lines].mean() - profile[centers].mean()
+    return scores
+
+def _refine_lines(profile, grid_size):
+    """
+    Grid line centers along one axis for the given grid size, in continuous pixel coordinates
+    (pixel i covers [i, i + 1)). Each interior line is found near where an even pitch puts it, at the
+    centroid of its line-like pixels, so a pitch that is slightly off doesn't add up across the board and
+    lines that scaling spread over several pixels are still centered. The outer lines sit at the very edge
+    of the crop, where the profile says nothing, so they are extrapolated from the interior ones.
+    """
+    length = len(profile)
+    pitch = (length - 1) / grid_size
+    window = max(1, int(pitch * LINE_SNAP_FRACTION))
+    widened = _widen(profile)
+    
+    centers = np.arange(grid_size + 1) * pitch + 0.5
+    for i in range(1, grid_size):
+        expected = int(round(i * pitch))
+        low = max(0, expected - window)
+        high = min(length, expected + window + 1)
+        peak = low + int(np.argmax(widened[low:high]))
+        
+        # centroid of the strong pixels around the peak
+        low = max(0, peak - window)
+        high = min(length, peak + window + 1)
+        weights = profile[low:high]
+        weights = np.where(weights >= 0.5 * weights.max(), weights, 0)
+        if weights.sum() > 0:
+            centers[i] = np.dot(np.arange(low, high), weights) / weights.sum() + 0.5
+    
+    if grid_size > 2:
+        pitch = (centers[grid_size - 1] - centers[1]) / (grid_size - 2)
+    if grid_size > 1:
+        centers[0] = centers[1] - pitch
+        centers[grid_size] = centers[grid_size - 1] + pitch
+    return centers
+
+def detect_grid(image):
+    """
+    Work out where the grid lines of the cropped board are from its row and column intensity projections.
+    The projections narrow the grid size down to a few candidates per axis, and the candidate whose cells
+    best match the templates wins. Rows and columns are measured separately, so the crop doesn't need to be square.
+    Returns the x positions of the vertical lines and the y positions of the horizontal ones.
+    """
+    gray = image[..., :3].astype(np.float32).mean(axis=-1)
+    column_profile = _line_profile(gray)
+    row_profile = _line_profile(gray.T)
+    
+    candidates = set()
+    for profile in [column_profile, row_profile]:
+        scores = _grid_size_scores(profile)
+        if not scores:
+            continue
+        # a multiple of the true grid size puts half its lines on cell centers, so it scores about half as well
+        best_score = max(scores.values())
+        plausible = [grid_size for grid_size, score in scores.items() if score >= GRID_SIZE_MIN_RELATIVE_SCORE * best_score]
+        candidates.update(sorted(plausible, key=scores.get, reverse=True)[:GRID_SIZE_CANDIDATES])
+    
+    if not candidates:
+        raise ValueError(f"Image of shape {image.shape} is too small to hold a board")
+    
+    def grid_for(grid_size):
+        return _refine_lines(column_profile, grid_size), _refine_lines(row_profile, grid_size)
+    
+    def fit(grid):
+        scores = score_cells(extract_cells_from_board(image, grid))
+        return scores.min(axis=-1).mean()
+    
+    return min((grid_for(grid_size) for grid_size in candidates), key=fit)
+
+def is_native_grid(grid):
+    """Whether the grid lines sit exactly where a screenshot at the native cell size puts them."""
+    column_lines, row_lines = grid
+    native_lines = np.arange(len(column_lines)) * (CELL_SIZE + GRID_LINE_WIDTH) + 0.5
+    return np.allclose(column_lines, native_lines) and np.allclose(row_lines, native_lines)
+
+def extract_cells_from_board(image, grid=None, shift=(0, 0)):
+    """
+    Returns every cell of the board as one array of shape (columns, rows, cell height, cell width, 3),
+    so cells[x][y] is the cell in column x, row y counted from the top.
+    grid is the output of detect_grid, and is detected if not given. shift moves every cell by (dx, dy) pixels.
+    At the native scale the result is a strided view and nothing is copied.
+    """
+    if grid is None:
+        grid = detect_grid(image)
+    column_lines, row_lines = grid
+    grid_size = len(column_lines) - 1
+    
+    if is_native_grid(grid) and shift == (0, 0):
+        # each cell is followed by a grid line, so the grid splits evenly into pitch x pitch blocks
+        native_pitch = CELL_SIZE + GRID_LINE_WIDTH  # grid lines are 1 wide, so we add 1 to the cell size
+        end = GRID_LINE_WIDTH + grid_size * native_pitch
+        grid_image = image[GRID_LINE_WIDTH:end, GRID_LINE_WIDTH:end, :3]
+        blocks = grid_image.reshape(grid_size, native_pitch, grid_size, native_pitch, 3)[:, :CELL_SIZE, :, :CELL_SIZE]
+        # (rows, height, columns, width, channels) -> (columns, rows, height, width, channels)
+        return blocks.transpose(2, 0, 1, 3, 4)
+    
+    column_starts, cell_width = _cell_spans(column_lines, image.shape[1], shift[0])
+    row_starts, cell_height = _cell_spans(row_lines, image.shape[0], shift[1])
+    rows = row_starts[:, None] + np.arange(cell_height)
+    columns = column_starts[:, None] + np.arange(cell_width)
+    # gather all cells at once: (rows, height, columns, width, channels)
+    blocks = image[rows[:, :, None, None], columns[None, None, :, :], :3]
+    return blocks.transpose(2, 0, 1, 3, 4)
+
+def _cell_spans(lines, length, shift=0):
+    """Start pixel of every cell along one axis, and the size every cell is cut to."""
+    pitch = (lines[-1] - lines[0]) / (len(lines) - 1)
+    line_width = pitch * GRID_LINE_WIDTH / (CELL_SIZE + GRID_LINE_WIDTH)
+    cell_size = max(1, int(round(pitch - line_width)))
+    starts = np.rint(lines[:-1] + line_width / 2).astype(int) + shift
+    return np.clip(starts, 0, length - cell_size), cell_size
+
+def load_templates():
+    folder = os.path.join(os.path.dirname(__file__), 'templates')
+    
+    templates = {}
+    for filename in sorted(os.listdir(folder)):
+        if filename.endswith(".png"):
+            name = filename[:-4]
+            template = Image.open(os.path.join(folder, filename)).convert("RGB")
+            cell_type = TEMPLATE_FILENAME_TO_CELL_TYPE[name]
+            templates[cell_type] = np.array(template)
+    
+    return templates
+
+@lru_cache(maxsize=None)
+def load_template_stack(cell_height=CELL_SIZE, cell_width=CELL_SIZE):
+    """
+    Loads the templates from disk once per cell size, resampled to that size if it isn't the native one.
+    Returns the cell types and a float32 array of shape (templates, pixels) holding each flattened template, in the same order.
+    """
+    templates = load_templates()
+    cell_types = list(templates)
+    resized = []
+    for cell_type in cell_types:
+        template = templates[cell_type]
+        if template.shape[:2] != (cell_height, cell_width):
+            template = np.array(Image.fromarray(template).resize((cell_width, cell_height), Image.BILINEAR))
+        resized.append(template.reshape(-1))
+    return cell_types, np.stack(resized).astype(np.float32)
+
+def score_cells(cells):
+    """
+    Mean squared error of every cell against every template, in one batched operation.
+    cells has shape (..., height, width, 3); the result has shape (..., templates).
+    """
+    cell_height, cell_width, channels = cells.shape[-3:]
+    if channels != 3:
+        raise ValueError(f"Expected RGB cells, got {channels} channels")
+    _, stack = load_template_stack(cell_height, cell_width)
+    batch_shape = cells.shape[:-3]
+    
+    flat = cells.reshape(-1, stack.shape[1]).astype(np.float32)
+    # |c - t|^2 = |c|^2 - 2 c.t + |t|^2, done in floats so nothing wraps around like uint8 would
+    squared_distance = (
+        np.einsum('ij,ij->i', flat, flat)[:, None]
+        - 2 * flat @ stack.T
+        + np.einsum('ij,ij->i', stack, stack)[None, :]
+    )
+    return (squared_distance / stack.shape[1]).reshape(*batch_shape, len(stack))
+
+def classify_scores(scores):
+    """
+    Classify every cell from its template scores, returning the board columns (bottom row first, as Board expects)
+    and a (columns, rows) array of confidence margins in the same orientation.
+    The margin is how much worse the second best template matched, relative to it:
+    0 means two templates matched equally well, 1 means the best template matched perfectly.
+    """
+    cell_types, _ = load_template_stack()
+    two_best = np.partition(scores, 1, axis=-1)[..., :2]
+    best_index = np.argmin(scores, axis=-1)
+    margins = 1 - two_best[..., 0] / np.maximum(two_best[..., 1], np.finfo(np.float32).eps)
+    
+    board = [[cell_types[i] for i in reversed(column)] for column in best_index]
+    return board, margins[:, ::-1]
+
+def classify_cells_with_margins(cells):
+    return classify_scores(score_cells(np.asarray(cells)))
+
+def classify_board_image(image, grid=None):
+    """
+    Classify the cells of a cropped board image, returning the board columns and margins like classify_scores.
+    Off the native scale a cell can be cut a pixel off, so ambiguous cells are matched again
+    at every one pixel shift and keep their best score.
+    """
+    if grid is None:
+        grid = detect_grid(image)
+    scores = score_cells(extract_cells_from_board(image, grid))
+    if is_native_grid(grid):
+        return classify_scores(scores)
+    
+    _, margins = classify_scores(scores)
+    ambiguous = (margins < AMBIGUOUS_MARGIN)[:, ::-1]
+    if ambiguous.any():
+        for shift in ALIGNMENT_SHIFTS:
+            shifted = extract_cells_from_board(image, grid, shift)[ambiguous]
+            scores[ambiguous] = np.minimum(scores[ambiguous], score_cells(shifted))
+    return classify_scores(scores)
+
+def classify_cells(cells):
+    board, _ = classify_cells_with_margins(cells)
+    return board
+
+def ambiguous_locs(margins, threshold=AMBIGUOUS_MARGIN):
+    """Locations of the cells whose best template only narrowly beat the runner up."""
+    return [Loc(int(x), int(y)) for x, y in zip(*np.nonzero(margins < threshold))]
+            
+
+def crop_board_image(image):
+    # from the middle of each edge of the image, find the first non-white pixel
+    height, width, _ = image.shape
+    non_white = np.any(image[..., :3] < WHITE_THRESHOLD, axis=-1)
+    middle_row = non_white[height // 2]
+    middle_column = non_white[:, width // 2]
+    if not middle_row.any() or not middle_column.any():
+        raise ValueError("Could not find a board in the image")
+    
+    left = np.argmax(middle_row)
+    right = width - 1 - np.argmax(middle_row[::-1])
+    top = np.argmax(middle_column)
+    bottom = height - 1 - np.argmax(middle_column[::-1])
+        
+    return image[top:bottom + 1, left:right + 1]
+            
+def image_to_board(image, verbose=False):
+    board, margins = classify_board_image(image)
+    
+    if verbose:
+        for loc in ambiguous_locs(margins):
+            print(f"Ambiguous cell at {loc}: classified as {board[loc.x][loc.y]} with margin {margins[loc.x, loc.y]:.3f}")
+    
+    return Board(board)
+
+def load_board_from_image(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Image file '{path}' does not exist")
+    
+    pil_image = Image.open(path).convert("RGB")
+    image = np.array(pil_image)
+    cropped = crop_board_image(image)
+    return image_to_board(cropped)
@@ -0,0 +1,209 @@
+from __future__ import annotations
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Dict, Iterator, List, Tuple
+from PIL import Image
+import argparse
+import glob
+import numpy as np
+import os
+import time
+from package.Board import Board
+from package.image_io import crop_board_image, image_to_board, load_template_stack
+from package.io import CHAR_TO_CELL
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+STAGES = ('decode', 'crop', 'classify')
+# how many images may be in flight per worker before we stop submitting and wait for results
+PENDING_PER_WORKER = 2
+
+# a worker's result: path, board columns as chars (None on failure), seconds spent per stage, and the failed stage and error
+type WorkerResult = Tuple[str, List[List[str]] | None, Dict[str, float], Tuple[str, str] | None]
+
+
+class StageStats:
+    def __init__(self):
+        self.processed = 0
+        self.failures = 0
+        self.busy_time = 0.0
+
+    def record(self, elapsed: float, failed: bool) -> None:
+        self.processed += 1
+        self.busy_time += elapsed
+        if failed:
+            self.failures += 1
+
+
+class IngestStats:
+    """
+    Per stage counts and timings for one ingestion run. Stages run inside the workers,
+    so busy time is summed over all of them and can exceed the wall time.
+    """
+    def __init__(self):
+        self.stages = {stage: StageStats() for stage in STAGES}
+        self.failed_paths: List[Tuple[str, str, str]] = []
+        self.start_time = time.perf_counter()
+        self.end_time: float | None = None
+
+    @property
+    def wall_time(self) -> float:
+        end = self.end_time if self.end_time is not None else time.perf_counter()
+        return end - self.start_time
+
+    def record(self, result: WorkerResult) -> None:
+        path, _, timings, failure = result
+        for stage, elapsed in timings.items():
+            self.stages[stage].record(elapsed, failure is not None and failure[0] == stage)
+        if failure is not None:
+            self.failed_paths.append((path, *failure))
+
+    def __str__(self) -> str:
+        wall_time = self.wall_time
+        lines = [f"wall time: {wall_time:.2f}s"]
+        for stage, stats in self.stages.items():
+            throughput = stats.processed / wall_time if wall_time > 0 else 0.0
+            lines.append(f"{stage}: {stats.processed} images, {stats.failures} failed, "
+                         f"{stats.busy_time:.2f}s busy, {throughput:.1f} images/s")
+        for path, stage, error in self.failed_paths:
+            lines.append(f"failed at {stage}: {path}: {error}")
+        return "\n".join(lines)
+
+
+def find_image_paths(source: str) -> List[str]:
+    """Every image in a directory, or every image matching a glob pattern, in sorted order."""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, filename) for filename in os.listdir(source)]
+    else:
+        paths = glob.glob(source, recursive=True)
+    return sorted(path for path in paths if path.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(path))
+
+
+def source_root(source: str) -> str:
+    """The directory a source's images are found under: the directory itself, or the part of a glob before any pattern."""
+    if os.path.isdir(source):
+        return source
+    parts = []
+    for part in os.path.dirname(source).split(os.sep):
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or os.curdir
+
+
+def output_paths(paths: List[str], root: str, output_dir: str) -> Dict[str, str]:
+    """
+    The text file each image's board is written to, at the image's path relative to root inside output_dir,
+    so images with the same name in different directories don't overwrite each other.
+    Raises ValueError if two images would still share a file, e.g. 'a.png' and 'a.jpg'.
+    """
+    outputs: Dict[str, str] = {}
+    images: Dict[str, str] = {}
+    for path in paths:
+        output = os.path.join(output_dir, os.path.splitext(os.path.relpath(path, root))[0] + ".txt")
+        if output in images:
+            raise ValueError(f"'{images[output]}' and '{path}' would both be written to '{output}'")
+        images[output] = path
+        outputs[path] = output
+    return outputs
+
+
+def _init_worker() -> None:
+    # load the native templates once per worker instead of once per image
+    load_template_stack()
+
+
+def _ingest_one(path: str) -> WorkerResult:
+    timings: Dict[str, float] = {}
+    stage = STAGES[0]
+    try:
+        start = time.perf_counter()
+        image = np.array(Image.open(path).convert("RGB"))
+        timings[stage] = time.perf_counter() - start
+
+        stage = 'crop'
+        start = time.perf_counter()
+        cropped = crop_board_image(image)
+        timings[stage] = time.perf_counter() - start
+
+        stage = 'classify'
+        start = time.perf_counter()
+        board = image_to_board(cropped)
+        timings[stage] = time.perf_counter() - start
+    except Exception as e:
+        timings[stage] = time.perf_counter() - start
+        return path, None, timings, (stage, f"{type(e).__name__}: {e}")
+    # send back chars rather than Cells, the parent maps them back onto the shared Cells instances
+    return path, [[cell.char for cell in column] for column in board.board], timings, None
+
+
+def ingest_images(source: str | List[str], workers: int | None = None, max_pending: int | None = None,
+                  stats: IngestStats | None = None) -> Iterator[Tuple[str, Board]]:
+    """
+    Decode, crop and classify every image in a directory or glob (or a list of paths) in a process pool,
+    yielding (path, Board) as each one finishes. Images that fail are left out and recorded in stats.
+    At most max_pending images are in flight at once, so a slow consumer doesn't pile up finished boards.
+    """
+    paths = find_image_paths(source) if isinstance(source, str) else list(source)
+    workers = workers or os.cpu_count() or 1
+    max_pending = max_pending or PENDING_PER_WORKER * workers
+    if max_pending < 1:
+        raise ValueError(f"max_pending must be positive, got {max_pending}")
+    stats = stats if stats is not None else IngestStats()
+
+    remaining = iter(paths)
+    pending = set()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        try:
+            for path in remaining:
+                pending.add(executor.submit(_ingest_one, path))
+                if len(pending) >= max_pending:
+                    break
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    result = future.result()
+                    stats.record(result)
+                    next_path = next(remaining, None)
+                    if next_path is not None:
+                        pending.add(executor.submit(_ingest_one, next_path))
+                    path, columns, _, _ = result
+                    if columns is not None:
+                        yield path, Board([[CHAR_TO_CELL[char] for char in column] for column in columns])
+        finally:
+            for future in pending:
+                future.cancel()
+            stats.end_time = time.perf_counter()
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Read boards from a directory or glob of screenshots.")
+    parser.add_argument("source", help="directory of images, or a glob pattern such as 'shots/**/*.png'")
+    parser.add_argument("--workers", type=int, default=None, help="number of worker processes (default: one per cpu)")
+    parser.add_argument("--max-pending", type=int, default=None,
+                        help=f"images in flight at once (default: {PENDING_PER_WORKER} per worker)")
+    parser.add_argument("--output-dir", default=None,
+                        help="write each board as a text file loadable with load_board_from_text instead of printing it, "
+                             "at the image's path below the directory or the start of the glob")
+    args = parser.parse_args(argv)
+
+    paths = find_image_paths(args.source)
+    outputs = None
+    if args.output_dir is not None:
+        try:
+            outputs = output_paths(paths, source_root(args.source), args.output_dir)
+        except ValueError as e:
+            parser.error(str(e))
+    stats = IngestStats()
+    for path, board in ingest_images(paths, args.workers, args.max_pending, stats):
+        if outputs is None:
+            print(path)
+            print(board)
+        else:
+            os.makedirs(os.path.dirname(outputs[path]), exist_ok=True)
+            with open(outputs[path], 'w') as file:
+                file.write(str(board) + "\n")
+    print(stats)
+
+
+if __name__ == "__main__":
+    main()
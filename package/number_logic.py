@@ -12,13 +12,16 @@ def validate_number(board: Board, loc: Loc) -> bool:
     if not board[loc].is_number:
         raise ValueError(f"Cell at {loc} is not a number cell.")
 
+    return count_adjacent_triangles(board, loc) == board[loc].number
+
+def count_adjacent_triangles(board: Board, loc: Loc) -> int:
+    """The number a clue at loc would need to show."""
     adjacent_triangles = 0
     for delta in AXIS_NEIGHBORS:
         neighbor_loc = loc + delta
         if board[neighbor_loc].is_triangle:
             adjacent_triangles += 1
-
-    return adjacent_triangles == board[loc].number
+    return adjacent_triangles
 
 def update_opts_around_number(board: Board, undecided: Undecided, loc: Loc, cell: Cell) -> bool:
     # Update the possibilities of surrounding cells based on the new cell
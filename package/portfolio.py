@@ -0,0 +1,247 @@
+from __future__ import annotations
+from multiprocessing.connection import Connection, wait
+from typing import Any, Dict, Iterable, List
+import argparse
+import datetime
+import json
+import multiprocessing
+import time
+from package.Board import Board
+from package.Cell import Cells
+from package.RectangleSolver import RectangleSolver
+from package.Solver import Solver, BRANCHINGS, FEWEST_OPTIONS, MOST_CONSTRAINED, RANDOM_BRANCHING
+from package.encoding import decode_board, encode_board
+from package.io import load_board_from_text
+
+ENGINES = ('solver', 'rectangles')
+DEFAULT_TIMEOUT = 300.0
+# fractions of the cells that are clues (numbers or black cells) below which a board is sparse, then medium
+DENSITY_BUCKETS = ((0.15, 'sparse'), (0.3, 'medium'))
+
+
+class SolverConfig:
+    """
+    One way of solving a board that a portfolio races against the others: the engine, and for the cell solver
+    its branching, seed, probe level and whether it breaks symmetry at the root. Every configuration searches
+    the whole tree, so whichever finishes first has found every solution.
+    """
+    def __init__(self, name: str, engine: str = 'solver', branching: str = FEWEST_OPTIONS, seed: int | None = None,
+                 probe_level: int = 0, break_symmetry: bool = True):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {ENGINES}")
+        if branching not in BRANCHINGS:
+            raise ValueError(f"Unknown branching '{branching}', expected one of {BRANCHINGS}")
+        self.name = name
+        self.engine = engine
+        self.branching = branching
+        self.seed = seed
+        self.probe_level = probe_level
+        self.break_symmetry = break_symmetry
+
+    def solve(self, board: Board) -> List[Board]:
+        if self.engine == 'rectangles':
+            return RectangleSolver(board).solve()
+        return Solver(board, break_symmetry=self.break_symmetry, branching=self.branching, seed=self.seed,
+                      probe_level=self.probe_level).solve()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "engine": self.engine,
+            "branching": self.branching,
+            "seed": self.seed,
+            "probe_level": self.probe_level,
+            "break_symmetry": self.break_symmetry,
+        }
+
+    @staticmethod
+    def from_dict(data: Dict[str, Any]) -> SolverConfig:
+        return SolverConfig(**data)
+
+
+DEFAULT_PORTFOLIO = [
+    SolverConfig("default"),
+    SolverConfig("most-constrained", branching=MOST_CONSTRAINED),
+    SolverConfig("random-1", branching=RANDOM_BRANCHING, seed=1),
+    SolverConfig("probe-8", probe_level=8),
+    SolverConfig("rectangles", engine='rectangles'),
+]
+
+
+def board_class(board: Board) -> str:
+    """The class a board's winners are logged under: its size and how dense its clues are, e.g. '10x10/sparse'."""
+    clues = sum(1 for _, cell in board if cell.is_number or cell == Cells.BLACK)
+    density = clues / (board.size * board.size)
+    bucket = next((name for limit, name in DENSITY_BUCKETS if density < limit), 'dense')
+    return f"{board.size}x{board.size}/{bucket}"
+
+
+class PortfolioResult:
+    """
+    The outcome of a race: status (solved, unsolvable, timeout or error), the solutions and the configuration
+    that found them first, the seconds it took, and the error of every configuration that failed on the way.
+    """
+    def __init__(self, status: str, solutions: List[Board], winner: SolverConfig | None, seconds: float,
+                 errors: Dict[str, str]):
+        self.status = status
+        self.solutions = solutions
+        self.winner = winner
+        self.seconds = seconds
+        self.errors = errors
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "status": self.status,
+            "solution": encode_board(self.solutions[0]) if self.solutions else None,
+            "solutions": len(self.solutions),
+            "winner": self.winner.name if self.winner is not None else None,
+            "time": round(self.seconds, 6),
+            "errors": self.errors,
+        }
+
+
+def _solve_in_child(config: Dict[str, Any], encoded_board: str, connection: Connection) -> None:
+    try:
+        solutions = SolverConfig.from_dict(config).solve(decode_board(encoded_board))
+        result = {"solutions": [encode_board(solution) for solution in solutions]}
+    except Exception as e:
+        result = {"error": f"{type(e).__name__}: {e}"}
+    connection.send(result)
+    connection.close()
+
+
+def solve_portfolio(board: Board, configs: Iterable[SolverConfig] = DEFAULT_PORTFOLIO,
+                    timeout: float | None = DEFAULT_TIMEOUT, log_path: str | None = None) -> PortfolioResult:
+    """
+    Solves the board with every configuration at once, each in its own process, returns as soon as the first
+    one finishes and terminates the rest. A configuration that raises or crashes drops out of the race without
+    ending it; the status is error only if all of them do. The processes share the machine's cores, so on a
+    machine with fewer cores than configurations each one runs slower than it would alone.
+    With a log_path, the outcome is appended to it as a JSON line for winner_summary().
+    """
+    configs = list(configs)
+    if not configs:
+        raise ValueError("A portfolio needs at least one configuration")
+    names = [config.name for config in configs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Configuration names must be unique, got {names}")
+
+    encoded_board = encode_board(board)
+    start = time.perf_counter()
+    deadline = start + timeout if timeout is not None else None
+    running: Dict[Connection, tuple[SolverConfig, multiprocessing.Process]] = {}
+    for config in configs:
+        connection, child_connection = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=_solve_in_child,
+                                          args=(config.to_dict(), encoded_board, child_connection), daemon=True)
+        process.start()
+        child_connection.close()
+        running[connection] = (config, process)
+
+    errors: Dict[str, str] = {}
+    result = None
+    try:
+        while running and result is None:
+            wait_time = max(0.0, deadline - time.perf_counter()) if deadline is not None else None
+            # a process that dies without sending anything makes its connection readable (with EOF) too
+            ready = wait(list(running), timeout=wait_time)
+            if not ready:
+                break
+            for connection in ready:
+                config, process = running.pop(connection)
+                try:
+                    message = connection.recv()
+                except EOFError:
+                    process.join()
+                    message = {"error": f"worker exited with code {process.exitcode}"}
+                connection.close()
+                if "error" in message:
+                    errors[config.name] = message["error"]
+                    continue
+                solutions = [decode_board(solution) for solution in message["solutions"]]
+                result = PortfolioResult("solved" if solutions else "unsolvable", solutions, config,
+                                         time.perf_counter() - start, errors)
+                break
+    finally:
+        for connection, (_, process) in running.items():
+            if process.is_alive():
+                process.terminate()
+            process.join()
+            connection.close()
+
+    if result is None:
+        status = "error" if len(errors) == len(configs) else "timeout"
+        result = PortfolioResult(status, [], None, time.perf_counter() - start, errors)
+    if log_path is not None:
+        log_result(log_path, board, configs, result)
+    return result
+
+
+def log_result(log_path: str, board: Board, configs: List[SolverConfig], result: PortfolioResult) -> None:
+    entry = {
+        "at": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        "class": board_class(board),
+        "board": encode_board(board),
+        "status": result.status,
+        "winner": result.winner.to_dict() if result.winner is not None else None,
+        "time": round(result.seconds, 6),
+        "configs": [config.name for config in configs],
+    }
+    with open(log_path, 'a') as file:
+        file.write(json.dumps(entry) + "\n")
+
+
+def winner_summary(log_path: str) -> Dict[str, Dict[str, int]]:
+    """Per board class in a portfolio log, how many races each configuration won, most wins first."""
+    wins: Dict[str, Dict[str, int]] = {}
+    with open(log_path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            if entry["winner"] is not None:
+                class_wins = wins.setdefault(entry["class"], {})
+                class_wins[entry["winner"]["name"]] = class_wins.get(entry["winner"]["name"], 0) + 1
+    return {board_class: dict(sorted(class_wins.items(), key=lambda item: -item[1]))
+            for board_class, class_wins in sorted(wins.items())}
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Race differently configured solvers on a board, "
+                                                 "keeping the first to finish.")
+    parser.add_argument("board", nargs="?", help="text board to solve")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT,
+                        help="seconds before giving up, 0 for no limit (default: %(default)s)")
+    parser.add_argument("--config", action="append", default=[],
+                        help="name of a default configuration to race (repeatable, default: all of them)")
+    parser.add_argument("--configs", default=None,
+                        help="JSON file with a list of configurations to race instead of the default ones")
+    parser.add_argument("--log", default=None, help="append the outcome to this JSON lines file")
+    parser.add_argument("--summary", action="store_true", help="print the wins per board class in --log and exit")
+    args = parser.parse_args(argv)
+
+    if args.summary:
+        if args.log is None:
+            parser.error("--summary needs --log")
+        print(json.dumps(winner_summary(args.log), indent=2))
+        return
+    if args.board is None:
+        parser.error("no board given")
+
+    if args.configs is not None:
+        with open(args.configs) as file:
+            configs = [SolverConfig.from_dict(config) for config in json.load(file)]
+    else:
+        configs = DEFAULT_PORTFOLIO
+    if args.config:
+        by_name = {config.name: config for config in configs}
+        unknown = [name for name in args.config if name not in by_name]
+        if unknown:
+            parser.error(f"unknown configurations {unknown}, expected some of {sorted(by_name)}")
+        configs = [by_name[name] for name in args.config]
+    result = solve_portfolio(load_board_from_text(args.board), configs, args.timeout or None, args.log)
+    print(json.dumps(result.to_dict()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,458 @@
+from __future__ import annotations
+from multiprocessing.connection import Connection
+from typing import Any, AsyncIterator, Dict, List, Tuple
+import argparse
+import asyncio
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from package.Board import Board
+from package.Solver import Solver
+from package.encoding import decode_board, encode_board
+from package.estimate import DEFAULT_PROBES, SearchEstimator
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# seconds between progress events sent by a running solve
+PROGRESS_INTERVAL = 0.5
+# seconds a cancelled worker gets to exit after SIGTERM before it is killed
+TERMINATE_GRACE = 1.0
+FINAL_STATUSES = ("solved", "unsolvable", "cancelled", "timeout", "error")
+MAX_REQUEST_BYTES = 1024 * 1024
+# workers are forked from a clean server process rather than from the service itself,
+# so they don't inherit its sockets and keep client connections open after the response is sent
+WORKER_CONTEXT = multiprocessing.get_context("forkserver")
+WORKER_CONTEXT.set_forkserver_preload(["package.service"])
+
+
+class ProgressReporter(SearchEstimator):
+    """
+    Sends a progress message down the connection at most every interval seconds: branches entered so far,
+    cells assigned so far, how many cells are decided on the board it last saw, and the estimate of what is left.
+    The estimate's probes of the board are only run when the first message is due, so jobs done by then never pay
+    for them; probes=0 leaves them out.
+    """
+    def __init__(self, connection: Connection, board: Board, interval: float = PROGRESS_INTERVAL,
+                 probes: int = DEFAULT_PROBES):
+        super().__init__()
+        self.connection = connection
+        self.board = board.copy()
+        self.interval = interval
+        self.probes = probes
+        self.assignments = 0
+        self._report_lock = threading.Lock()
+        self._last_report = time.perf_counter()
+
+    def on_branch_entered(self, solver, loc, cell):
+        super().on_branch_entered(solver, loc, cell)
+        self._maybe_report(solver)
+
+    def on_assignment(self, solver, loc, cell):
+        super().on_assignment(solver, loc, cell)
+        with self._lock:
+            self.assignments += 1
+        self._maybe_report(solver)
+
+    def _maybe_report(self, solver: Solver) -> None:
+        now = time.perf_counter()
+        if now - self._last_report < self.interval:
+            return
+        with self._report_lock:
+            if now - self._last_report < self.interval:
+                return
+            if self.tree is None and self.probes:
+                self.probe(self.board, self.probes)
+            estimate = self.estimate()
+            self.connection.send({
+                "event": "progress",
+                "nodes": estimate.branches,
+                "assignments": self.assignments,
+                "decided": solver.board.size ** 2 - len(solver.undecided.opts),
+                "depth": solver.depth,
+                "done": estimate.done,
+                "estimated_nodes": estimate.estimated_branches,
+                "remaining_seconds": estimate.remaining_seconds,
+            })
+            self._last_report = time.perf_counter()
+
+
+def _solve_in_worker(encoded: str, progress_interval: float, estimate_probes: int, connection: Connection) -> None:
+    try:
+        board = decode_board(encoded)
+        reporter = ProgressReporter(connection, board, progress_interval, estimate_probes)
+        solutions = Solver(board, hooks=[reporter]).solve()
+        message = {
+            "event": "result",
+            "status": "solved" if solutions else "unsolvable",
+            "solutions": [encode_board(solution) for solution in solutions],
+            "nodes": reporter.branches,
+        }
+    except Exception as e:
+        message = {"event": "result", "status": "error", "error": f"{type(e).__name__}: {e}"}
+    connection.send(message)
+    connection.close()
+
+
+class Job:
+    """
+    A board submitted to the service. Moves from queued to running to one of FINAL_STATUSES.
+    Every event is kept except progress, of which only the latest is, so late subscribers can catch up.
+    """
+    def __init__(self, job_id: str, board: Board, priority: int, deadline: float | None):
+        self.id = job_id
+        self.board = board
+        self.priority = priority
+        self.deadline = deadline
+        self.status = "queued"
+        self.result: Dict[str, Any] | None = None
+        self.history: List[Dict[str, Any]] = []
+        self.progress: Dict[str, Any] | None = None
+        self.submitted = time.monotonic()
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.process: multiprocessing.Process | None = None
+        self.connection: Connection | None = None
+        self.deadline_timer: asyncio.TimerHandle | None = None
+        self._subscribers: List[asyncio.Queue] = []
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINAL_STATUSES
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        event = {"job": self.id, **event}
+        if event["event"] == "progress":
+            self.progress = event
+        else:
+            self.history.append(event)
+        for queue in self._subscribers:
+            queue.put_nowait(event)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.history:
+            queue.put_nowait(event)
+        if self.progress is not None and not self.done:
+            queue.put_nowait(self.progress)
+        self._subscribers.append(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        if queue in self._subscribers:
+            self._subscribers.remove(queue)
+
+    def to_dict(self) -> Dict[str, Any]:
+        info = {"job": self.id, "status": self.status, "priority": self.priority, "size": self.board.size}
+        end = self.finished if self.finished is not None else time.monotonic()
+        if self.started is not None:
+            info["time"] = round(end - self.started, 6)
+        if self.progress is not None:
+            info["progress"] = {key: value for key, value in self.progress.items() if key not in ("job", "event")}
+        if self.result is not None:
+            info.update(self.result)
+        return info
+
+
+class SolverService:
+    """
+    Solves boards in worker processes, at most workers at a time, from a priority queue (higher priority first,
+    then first come first served). A job runs in a process of its own, so cancelling it or running past its
+    deadline simply terminates that process. Everything runs on the event loop: worker messages are read
+    with loop.add_reader and deadlines are loop timers, so no threads are needed on the service side.
+    """
+    def __init__(self, workers: int | None = None, progress_interval: float = PROGRESS_INTERVAL,
+                 estimate_probes: int = DEFAULT_PROBES):
+        self.workers = workers or os.cpu_count() or 1
+        if self.workers < 1:
+            raise ValueError(f"workers must be positive, got {self.workers}")
+        self.progress_interval = progress_interval
+        self.estimate_probes = estimate_probes
+        self.jobs: Dict[str, Job] = {}
+        self._queue: List[Tuple[int, int, Job]] = []
+        self._order = itertools.count()
+        self._running: Dict[str, Job] = {}
+
+    def submit(self, board: Board, priority: int = 0, timeout: float | None = None) -> Job:
+        """Queues the board, to be given up on if it hasn't finished timeout seconds from now."""
+        loop = asyncio.get_running_loop()
+        job = Job(f"{next(self._order)}", board, priority, loop.time() + timeout if timeout is not None else None)
+        self.jobs[job.id] = job
+        heapq.heappush(self._queue, (-priority, int(job.id), job))
+        if job.deadline is not None:
+            job.deadline_timer = loop.call_at(job.deadline, self._finish, job, "timeout", None)
+        job.publish({"event": "queued", "priority": priority})
+        self._dispatch()
+        return job
+
+    def get(self, job_id: str) -> Job:
+        if job_id not in self.jobs:
+            raise KeyError(job_id)
+        return self.jobs[job_id]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancels a queued or running job. Returns False if it had already finished."""
+        job = self.get(job_id)
+        if job.done:
+            return False
+        self._finish(job, "cancelled", None)
+        return True
+
+    async def wait(self, job_id: str) -> Job:
+        async for _ in self.events(job_id):
+            pass
+        return self.get(job_id)
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        """Every event of the job so far, then each new one as it happens, up to the final one."""
+        job = self.get(job_id)
+        queue = job.subscribe()
+        try:
+            while True:
+                event = await queue.get()
+                yield event
+                if event["event"] == "done":
+                    return
+        finally:
+            job.unsubscribe(queue)
+
+    def _dispatch(self) -> None:
+        while self._queue and len(self._running) < self.workers:
+            _, _, job = heapq.heappop(self._queue)
+            if job.status == "queued":
+                self._start(job)
+
+    def _start(self, job: Job) -> None:
+        loop = asyncio.get_running_loop()
+        job.connection, child_connection = WORKER_CONTEXT.Pipe(duplex=False)
+        job.process = WORKER_CONTEXT.Process(target=_solve_in_worker, daemon=True,
+                                              args=(encode_board(job.board), self.progress_interval, self.estimate_probes,
+                                                    child_connection))
+        job.process.start()
+        child_connection.close()
+        job.status = "running"
+        job.started = time.monotonic()
+        self._running[job.id] = job
+        loop.add_reader(job.connection.fileno(), self._on_message, job)
+        job.publish({"event": "started"})
+
+    def _on_message(self, job: Job) -> None:
+        try:
+            message = job.connection.recv()
+        except (EOFError, OSError):
+            job.process.join(TERMINATE_GRACE)
+            exitcode = job.process.exitcode
+            self._finish(job, "error", {"error": f"worker exited with code {exitcode}"})
+            return
+        if message["event"] == "progress":
+            job.publish(message)
+            return
+        status = message.pop("status")
+        del message["event"]
+        self._finish(job, status, message)
+
+    def _finish(self, job: Job, status: str, result: Dict[str, Any] | None) -> None:
+        if job.done:
+            return
+        if job.deadline_timer is not None:
+            job.deadline_timer.cancel()
+        if job.connection is not None:
+            asyncio.get_running_loop().remove_reader(job.connection.fileno())
+            job.connection.close()
+        if job.process is not None:
+            if job.process.is_alive():
+                job.process.terminate()
+                job.process.join(TERMINATE_GRACE)
+                if job.process.is_alive():
+                    job.process.kill()
+            job.process.join()
+        self._running.pop(job.id, None)
+        job.status = status
+        job.result = result
+        job.finished = time.monotonic()
+        job.publish({"event": "done", **job.to_dict()})
+        self._dispatch()
+
+    async def close(self) -> None:
+        """Cancels everything still queued or running."""
+        for job in list(self.jobs.values()):
+            if not job.done:
+                self._finish(job, "cancelled", None)
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                    unix_path: str | None = None) -> asyncio.Server:
+        """Starts the HTTP interface on a TCP port, or on a Unix socket if unix_path is given."""
+        if unix_path is not None:
+            return await asyncio.start_unix_server(self._handle_connection, path=unix_path)
+        return await asyncio.start_server(self._handle_connection, host, port)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        One request per connection:
+            POST /jobs {"board": <encode_board line>, "priority": 0, "timeout": seconds}  -> the new job
+            GET /jobs/<id>                                                              -> its status
+            GET /jobs/<id>/events                                                       -> its events as JSON lines
+            DELETE /jobs/<id>                                                           -> cancels it
+        Any other error is answered with a 500 and the error, unless the response has already started.
+        """
+        streaming = False
+        try:
+            method, path, body = await _read_request(reader)
+            parts = [part for part in path.split("/") if part]
+            if parts[:1] != ["jobs"] or len(parts) > 3:
+                await _respond(writer, 404, {"error": f"Unknown path '{path}'"})
+            elif method == "POST" and len(parts) == 1:
+                request = json.loads(body or b"{}")
+                if "board" not in request:
+                    raise ValueError("Missing 'board' in request")
+                job = self.submit(decode_board(request["board"]), int(request.get("priority", 0)),
+                                  request.get("timeout"))
+                await _respond(writer, 201, job.to_dict())
+            elif method == "GET" and len(parts) == 2:
+                await _respond(writer, 200, self.get(parts[1]).to_dict())
+            elif method == "GET" and len(parts) == 3 and parts[2] == "events":
+                self.get(parts[1])
+                events = self.events(parts[1])
+                streaming = True
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nConnection: close\r\n\r\n")
+                async for event in events:
+                    writer.write(json.dumps(event).encode() + b"\n")
+                    await writer.drain()
+            elif method == "DELETE" and len(parts) == 2:
+                cancelled = self.cancel(parts[1])
+                await _respond(writer, 200, {"cancelled": cancelled, **self.get(parts[1]).to_dict()})
+            else:
+                await _respond(writer, 405, {"error": f"{method} not allowed on '{path}'"})
+        except KeyError as e:
+            await _respond(writer, 404, {"error": f"Unknown job {e}"})
+        except (ValueError, TypeError) as e:
+            await _respond(writer, 400, {"error": f"{type(e).__name__}: {e}"})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            if not streaming:
+                try:
+                    await _respond(writer, 500, {"error": f"{type(e).__name__}: {e}"})
+                except ConnectionError:
+                    pass
+        finally:
+            writer.close()
+
+
+async def _read_request(reader: asyncio.StreamReader) -> Tuple[str, str, bytes]:
+    request_line = (await reader.readline()).decode("latin-1").split()
+    if len(request_line) != 3:
+        raise ValueError("Malformed request line")
+    method, path, _ = request_line
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_REQUEST_BYTES:
+        raise ValueError(f"Request body of {length} bytes is too large")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), path, body
+
+
+async def _respond(writer: asyncio.StreamWriter, status: int, payload: Dict[str, Any]) -> None:
+    reasons = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               500: "Internal Server Error"}
+    body = json.dumps(payload).encode()
+    writer.write(f"HTTP/1.1 {status} {reasons[status]}\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+
+
+class ServiceClient:
+    """A small asyncio client for the service's HTTP interface, over TCP or a Unix socket."""
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: str | None = None):
+        self.host = host
+        self.port = port
+        self.unix_path = unix_path
+
+    async def _open(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        if self.unix_path is not None:
+            return await asyncio.open_unix_connection(self.unix_path)
+        return await asyncio.open_connection(self.host, self.port)
+
+    async def _send(self, method: str, path: str, payload: Dict[str, Any] | None = None):
+        reader, writer = await self._open()
+        body = json.dumps(payload).encode() if payload is not None else b""
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        status = int((await reader.readline()).split()[1])
+        while (await reader.readline()).strip():
+            pass
+        return status, reader, writer
+
+    async def _request(self, method: str, path: str, payload: Dict[str, Any] | None = None) -> Dict[str, Any]:
+        status, reader, writer = await self._send(method, path, payload)
+        try:
+            response = json.loads(await reader.read())
+        finally:
+            writer.close()
+        if status >= 400:
+            raise ValueError(f"{method} {path} failed with {status}: {response.get('error')}")
+        return response
+
+    async def submit(self, board: Board, priority: int = 0, timeout: float | None = None) -> Dict[str, Any]:
+        return await self._request("POST", "/jobs", {"board": encode_board(board), "priority": priority,
+                                                     "timeout": timeout})
+
+    async def status(self, job_id: str) -> Dict[str, Any]:
+        return await self._request("GET", f"/jobs/{job_id}")
+
+    async def cancel(self, job_id: str) -> Dict[str, Any]:
+        return await self._request("DELETE", f"/jobs/{job_id}")
+
+    async def events(self, job_id: str) -> AsyncIterator[Dict[str, Any]]:
+        status, reader, writer = await self._send("GET", f"/jobs/{job_id}/events")
+        try:
+            if status >= 400:
+                raise ValueError(f"GET /jobs/{job_id}/events failed with {status}: {(await reader.read()).decode()}")
+            while line := await reader.readline():
+                yield json.loads(line)
+        finally:
+            writer.close()
+
+
+async def _serve_forever(args: argparse.Namespace) -> None:
+    service = SolverService(args.workers, args.progress_interval, args.estimate_probes)
+    server = await service.serve(args.host, args.port, args.unix)
+    where = args.unix if args.unix is not None else f"http://{args.host}:{args.port}"
+    print(f"solver service listening on {where} with {service.workers} workers")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the solver over HTTP on localhost or a Unix socket.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", default=None, help="listen on this Unix socket path instead of a TCP port")
+    parser.add_argument("--workers", type=int, default=None, help="jobs solved at once (default: one per cpu)")
+    parser.add_argument("--progress-interval", type=float, default=PROGRESS_INTERVAL,
+                        help="seconds between progress events (default: %(default)s)")
+    parser.add_argument("--estimate-probes", type=int, default=DEFAULT_PROBES,
+                        help="random probes run for the time left estimate of a job that outlasts its first progress "
+                             "event, 0 for none (default: %(default)s)")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve_forever(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from __future__ import annotations
+from package.Board import Board
+from package.Cell import Cell
+from package.Loc import Loc
+from package.triangle_logic import CHUNK_DELTA_TO_TRIANGLE, TRIANGLE_TO_CHUNK_DELTA
+from typing import List, Tuple
+
+# The 8 symmetries of the square, as matrices (a, b, c, d) mapping (x, y) -> (a*x + b*y, c*x + d*y)
+# about the center of the board.
+type Transform = Tuple[int, int, int, int]
+
+IDENTITY: Transform = (1, 0, 0, 1)
+DIHEDRAL_TRANSFORMS: List[Transform] = [
+    IDENTITY,
+    (0, -1, 1, 0),    # rotate 90 counter clockwise
+    (-1, 0, 0, -1),   # rotate 180
+    (0, 1, -1, 0),    # rotate 90 clockwise
+    (-1, 0, 0, 1),    # mirror left-right
+    (1, 0, 0, -1),    # mirror top-bottom
+    (0, 1, 1, 0),     # mirror along the main diagonal
+    (0, -1, -1, 0),   # mirror along the anti diagonal
+]
+
+def inverse_transform(transform: Transform) -> Transform:
+    """All dihedral transforms are orthogonal, so the inverse is the transpose."""
+    a, b, c, d = transform
+    return (a, c, b, d)
+
+def compose_transforms(first: Transform, second: Transform) -> Transform:
+    """The transform that applies first, then second."""
+    a1, b1, c1, d1 = first
+    a2, b2, c2, d2 = second
+    return (a2 * a1 + b2 * c1, a2 * b1 + b2 * d1, c2 * a1 + d2 * c1, c2 * b1 + d2 * d1)
+
+def transform_loc(loc: Loc, transform: Transform, size: int) -> Loc:
+    a, b, c, d = transform
+    # work in doubled coordinates relative to the center so everything stays integral
+    dx = 2 * int(loc.x) - (size - 1)
+    dy = 2 * int(loc.y) - (size - 1)
+    new_dx = a * dx + b * dy
+    new_dy = c * dx + d * dy
+    return Loc((new_dx + size - 1) // 2, (new_dy + size - 1) // 2)
+
+def transform_cell(cell: Cell, transform: Transform) -> Cell:
+    """Triangles are remapped by where their corner ends up, every other cell is unchanged."""
+    if not cell.is_triangle:
+        return cell
+    a, b, c, d = transform
+    delta = TRIANGLE_TO_CHUNK_DELTA[cell]
+    return CHUNK_DELTA_TO_TRIANGLE[Loc(a * delta.x + b * delta.y, c * delta.x + d * delta.y)]
+
+def transform_board(board: Board, transform: Transform) -> Board:
+    grid = [[None for _ in range(board.size)] for _ in range(board.size)]
+    for loc, cell in board:
+        new_loc = transform_loc(loc, transform, board.size)
+        grid[new_loc.x][new_loc.y] = transform_cell(cell, transform)
+    return Board(grid)
+
+def board_key(board: Board) -> str:
+    """A string that is equal for two boards exactly when all their cells are."""
+    return "".join(cell.char for column in board.board for cell in column)
+
+def canonical_form(board: Board) -> Tuple[Board, Transform]:
+    """
+    The representative of the board under all 8 dihedral transforms, and the transform that
+    maps the board onto it. Boards that are rotations or reflections of each other share a canonical form.
+    """
+    best_board, best_transform, best_key = None, None, None
+    for transform in DIHEDRAL_TRANSFORMS:
+        transformed = transform_board(board, transform)
+        key = board_key(transformed)
+        if best_key is None or key < best_key:
+            best_board, best_transform, best_key = transformed, transform, key
+    return best_board, best_transform
+
+def board_symmetries(board: Board) -> List[Transform]:
+    """Every dihedral transform that leaves the board unchanged. Always includes the identity."""
+    key = board_key(board)
+    return [transform for transform in DIHEDRAL_TRANSFORMS if board_key(transform_board(board, transform)) == key]
@@ -5,6 +5,7 @@ from package.Undecided import Undecided
 from typing import List, Set, Tuple, Dict
 from enum import Enum
 from itertools import product
+from package.closure_cache import closure_cache
 
 CHUNK_DELTA_TO_TRIANGLE: Dict[Loc, Cell] = {
     Loc(-0.5, -0.5): Cells.LOWER_LEFT,
@@ -43,9 +44,57 @@ def get_turn_and_continue_data(rot: Rotation, dir_index: int, current: Loc) -> T
     
     return turn_loc, turn_triangle, continue_loc
 
+def _can_hold(board: Board, undecided: Undecided, loc: Loc, cell: Cell) -> bool:
+    """Check if loc is, or could still become, the given cell."""
+    current = board[loc]
+    if current == Cells.UNDECIDED:
+        return undecided.has_opt(loc, cell)
+    return current == cell
+
+def project_unfinished_end(board: Board, undecided: Undecided, end_loc: Loc, end_triangle: Cell, rot: Rotation) -> Tuple[int, ...]:
+    """
+    Follow an unfinished end along its diagonal until the edge can't continue any further.
+    Returns every number of continue steps after which the edge could still turn, in increasing order.
+    An empty result means the edge is headed into a wall, black or number cell with nowhere to turn.
+    Results are cached on undecided and dropped once any cell along the diagonal changes.
+    """
+    key = (end_loc, end_triangle, rot)
+    cached = undecided.get_projection(key)
+    if cached is not None:
+        return cached
+    
+    dir_index = TRIANGLES_CLOCKWISE.index(end_triangle)
+    turn_steps = []
+    watched_locs = []
+    current = end_loc
+    steps = 0
+    
+    while True:
+        turn_loc, turn_triangle, continue_loc = get_turn_and_continue_data(rot, dir_index, current)
+        watched_locs.append(turn_loc)
+        watched_locs.append(continue_loc)
+        
+        if _can_hold(board, undecided, turn_loc, turn_triangle):
+            turn_steps.append(steps)
+        
+        if not _can_hold(board, undecided, continue_loc, end_triangle):
+            break
+        
+        current = continue_loc
+        steps += 1
+    
+    turn_steps = tuple(turn_steps)
+    undecided.set_projection(key, turn_steps, [loc for loc in watched_locs if board[loc] == Cells.UNDECIDED])
+    return turn_steps
+
 class DiagonalRectangleValidator:
-    def __init__(self, board: Board):
+    def __init__(self, board: Board, allow_undecided: bool = True):
+        """
+        allow_undecided: if False, an undecided cell anywhere in the rectangle fails validation,
+        i.e. only rectangles that are closed for good are accepted
+        """
         self.board = board
+        self.allow_undecided = allow_undecided
         self.validated_chunks: Set[Loc] = set()
         self.validated_locs: Set[Loc] = set()
 
@@ -95,6 +144,9 @@ class DiagonalRectangleValidator:
             if cell != expected_triangle and not cell.is_undecided_or_empty:
                 return False
             
+            if not self.allow_undecided and cell == Cells.UNDECIDED:
+                return False
+            
             self.validated_locs.add(loc)
 
             if cell.is_undecided_or_empty:
@@ -255,7 +307,8 @@ class PartialDiagonalRectangle:
                 
         return None
 
-    def _calculate_closure_corners(self, corner_index: int, found_corner: Loc, x_length: int, y_length: int) -> Tuple[List[Loc], List[Loc]]:
+    @staticmethod
+    def _calculate_closure_corners(corner_index: int, found_corner: Loc, x_length: int, y_length: int) -> Tuple[List[Loc], List[Loc]]:
         """Calculate all corners of the closure rectangle."""
         first_corner_to_corner = [
             Loc(0, 0),
@@ -272,7 +325,8 @@ class PartialDiagonalRectangle:
         
         return start_corners, end_corners
     
-    def _whitespace_corners_to_side(self, side_index: int, start_corner: Loc, end_corner: Loc) -> List[Loc]:
+    @staticmethod
+    def _whitespace_corners_to_side(side_index: int, start_corner: Loc, end_corner: Loc) -> List[Loc]:
         difference = end_corner - start_corner
         # difference.x and difference.y will have the same abs value
         num_steps = int(abs(difference.x))
@@ -283,14 +337,16 @@ class PartialDiagonalRectangle:
         # side[i] = whitespace_side[i] - Loc(0.5, 0.5) - CHUNK_DELTAS_CLOCKWISE[rotate_index(side_index, Rotation.COUNTER_CLOCKWISE)]
         return [loc - Loc(0.5, 0.5) - CHUNK_DELTAS_CLOCKWISE[rotate_index(side_index, Rotation.COUNTER_CLOCKWISE)] for loc in whitespace_side]
 
-    def _build_closure_sides(self, start_corners: List[Loc], end_corners: List[Loc]) -> List[List[Loc]]:
+    @staticmethod
+    def _build_closure_sides(start_corners: List[Loc], end_corners: List[Loc]) -> List[List[Loc]]:
         """Build the complete sides of the closure rectangle."""
         return [
-            self._whitespace_corners_to_side(i, start_corners[i], end_corners[i])
+            PartialDiagonalRectangle._whitespace_corners_to_side(i, start_corners[i], end_corners[i])
             for i in range(4)
         ]
 
-    def _calculate_closure_interior(self, closure_sides: List[List[Loc]]) -> Set[Loc]:
+    @staticmethod
+    def _calculate_closure_interior(closure_sides: List[List[Loc]]) -> Set[Loc]:
         """Calculate all interior points of the closure rectangle."""
         closure_interior: Set[Loc] = set()
         
@@ -306,7 +362,8 @@ class PartialDiagonalRectangle:
                 
         return closure_interior
 
-    def _build_closure_perimeter(self, closure_sides: List[List[Loc]]) -> Set[Tuple[Loc, Cell]]:
+    @staticmethod
+    def _build_closure_perimeter(closure_sides: List[List[Loc]]) -> Set[Tuple[Loc, Cell]]:
         """Build the perimeter of the closure rectangle with associated triangles."""
         closure_perimeter: Set[Tuple[Loc, Cell]] = set()
         
@@ -327,14 +384,31 @@ class PartialDiagonalRectangle:
         corner_index = self._find_corner_index(whitespace_side_starts, whitespace_side_ends)
         
         found_corner = whitespace_side_ends[corner_index]
+        corner_x, corner_y = int(found_corner.x), int(found_corner.y)
 
-        start_corners, end_corners = self._calculate_closure_corners(corner_index, found_corner, x_length, y_length)
-        closure_sides = self._build_closure_sides(start_corners, end_corners)
+        relative_perimeter, relative_interior = _relative_closure(corner_index, x_length, y_length)
         
-        closure_interior = self._calculate_closure_interior(closure_sides)
-        closure_perimeter = self._build_closure_perimeter(closure_sides)
+        closure_perimeter = {(Loc(corner_x + dx, corner_y + dy), triangle) for dx, dy, triangle in relative_perimeter}
+        closure_interior = {Loc(corner_x + dx, corner_y + dy) for dx, dy in relative_interior}
         
         return closure_perimeter, closure_interior
+
+@closure_cache
+def _relative_closure(corner_index: int, x_length: int, y_length: int) -> Tuple[Tuple[Tuple[int, int, Cell], ...], Tuple[Tuple[int, int], ...]]:
+    """
+    Closure geometry of a diagonal rectangle with the given side lengths, relative to the corner
+    at the end of side corner_index. Only depends on the shape, so it is computed once per shape.
+    """
+    origin = Loc(0, 0)
+    start_corners, end_corners = PartialDiagonalRectangle._calculate_closure_corners(corner_index, origin, x_length, y_length)
+    closure_sides = PartialDiagonalRectangle._build_closure_sides(start_corners, end_corners)
+    
+    closure_interior = PartialDiagonalRectangle._calculate_closure_interior(closure_sides)
+    closure_perimeter = PartialDiagonalRectangle._build_closure_perimeter(closure_sides)
+    
+    relative_perimeter = tuple((int(loc.x), int(loc.y), triangle) for loc, triangle in closure_perimeter)
+    relative_interior = tuple((int(loc.x), int(loc.y)) for loc in closure_interior)
+    return relative_perimeter, relative_interior
         
 
 def deduce_consequences_triangle(board: Board, undecided: Undecided, loc: Loc) -> bool:
@@ -371,25 +445,31 @@ def deduce_consequences_triangle(board: Board, undecided: Undecided, loc: Loc) -
     for end_loc, end_triangle in ends:
         dir_index = TRIANGLES_CLOCKWISE.index(end_triangle)
         for rot in [Rotation.CLOCKWISE, Rotation.COUNTER_CLOCKWISE]:
-            turn_loc, turn_triangle, continue_loc = get_turn_and_continue_data(rot, dir_index, end_loc)
+            turn_loc, _, continue_loc = get_turn_and_continue_data(rot, dir_index, end_loc)
             
             if turn_loc in pdr.visited or continue_loc in pdr.visited:
                 # this is not the direction the pdr ends at
                 continue
-            # we need one of turn_loc, continue_loc to be a triangle, and we know currently they are both not
-            # if neither is undecided we can't finish this pdr
-            if not board[turn_loc] == Cells.UNDECIDED and not board[continue_loc] == Cells.UNDECIDED:
+            
+            turn_steps = project_unfinished_end(board, undecided, end_loc, end_triangle, rot)
+            # the edge has to turn somewhere before it runs into something
+            if not turn_steps:
                 return False
             
-            # if we know we can't turn, we have to continue
-            if board[continue_loc] == Cells.UNDECIDED and not board[turn_loc] == Cells.UNDECIDED:
-                if not undecided.keep_opts(continue_loc, end_triangle):
-                    return False
+            # it can't turn before the first possible turn, so it has to continue until then
+            current = end_loc
+            for _ in range(turn_steps[0]):
+                _, _, current = get_turn_and_continue_data(rot, dir_index, current)
+                if board[current] == Cells.UNDECIDED:
+                    if not undecided.keep_opts(current, end_triangle):
+                        return False
             
-            # if we know we can't continue, we have to turn
-            if board[turn_loc] == Cells.UNDECIDED and not board[continue_loc] == Cells.UNDECIDED:
-                if not undecided.keep_opts(turn_loc, turn_triangle):
-                    return False
+            # if there is only one place it can turn, it has to turn there
+            if len(turn_steps) == 1:
+                turn_loc, turn_triangle, _ = get_turn_and_continue_data(rot, dir_index, current)
+                if board[turn_loc] == Cells.UNDECIDED:
+                    if not undecided.keep_opts(turn_loc, turn_triangle):
+                        return False
 
     return True
 
@@ -429,25 +509,15 @@ def is_triangle_still_possible(board: Board, undecided: Undecided, loc: Loc, cel
     for end_loc, end_triangle in ends:
         dir_index = TRIANGLES_CLOCKWISE.index(end_triangle)
         for rot in [Rotation.CLOCKWISE, Rotation.COUNTER_CLOCKWISE]:
-            turn_loc, turn_triangle, continue_loc = get_turn_and_continue_data(rot, dir_index, end_loc)
+            turn_loc, _, continue_loc = get_turn_and_continue_data(rot, dir_index, end_loc)
             
             if turn_loc in pdr.visited or continue_loc in pdr.visited:
                 # this is not the direction the pdr ends at
                 continue
-            # we need one of turn_loc, continue_loc to be a triangle, and we know currently they are both not
-            # if neither is undecided we can't finish this pdr
-            if not board[turn_loc] == Cells.UNDECIDED and not board[continue_loc] == Cells.UNDECIDED:
-                return False
-            
-            # if we know we can't turn, we have to continue
-            if board[continue_loc] == Cells.UNDECIDED and not board[turn_loc] == Cells.UNDECIDED:
-                if not undecided.has_opt(continue_loc, end_triangle):
-                    return False
             
-            # if we know we can't continue, we have to turn
-            if board[turn_loc] == Cells.UNDECIDED and not board[continue_loc] == Cells.UNDECIDED:
-                if not undecided.has_opt(turn_loc, turn_triangle):
-                    return False
+            # the edge has to turn somewhere before it runs into something
+            if not project_unfinished_end(board, undecided, end_loc, end_triangle, rot):
+                return False
 
     return True
 
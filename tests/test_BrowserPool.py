@@ -0,0 +1,135 @@
+import functools
+import http.server
+import importlib.util
+import os
+import tempfile
+import threading
+import unittest
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+HAS_BACKENDS = all(importlib.util.find_spec(name) is not None for name in ("numpy", "PIL", "selenium"))
+STAND_IN_PAGE = """<!DOCTYPE html>
+<html><body style="margin: 0; background: white">
+<div id="puzzleContainerDiv"><img class="board-back" src="board.png" style="display: block"></div>
+</body></html>
+"""
+
+
+class QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def start_browser():
+    """A headless Chrome session, or None when there is no browser or driver to start one with."""
+    from package.BrowserPool import headless_chrome
+    try:
+        return headless_chrome()
+    except Exception:
+        return None
+
+
+class FakeDriver:
+    """Stands in for a browser session where the test never loads a page."""
+    def __init__(self):
+        self.quit_called = False
+
+    def quit(self):
+        self.quit_called = True
+
+
+@unittest.skipUnless(HAS_BACKENDS, "needs numpy, PIL and selenium")
+class BrowserPoolCheckoutTest(unittest.TestCase):
+    def wait_for_session(self, pool):
+        """Starts a thread that checks out a session, returning a list its outcome is appended to."""
+        outcome = []
+        def checkout():
+            try:
+                with pool.session() as driver:
+                    outcome.append(driver)
+            except Exception as e:
+                outcome.append(e)
+        thread = threading.Thread(target=checkout, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        # give it time to block on the full pool
+        thread.join(0.2)
+        self.assertEqual(outcome, [], "checkout should wait while every session is in use")
+        return outcome, thread
+
+    def test_waiter_gets_a_new_session_when_one_is_discarded(self):
+        from selenium.common.exceptions import WebDriverException
+        from package.BrowserPool import BrowserPool
+        pool = BrowserPool(size=1, driver_factory=FakeDriver)
+        with self.assertRaises(WebDriverException):
+            with pool.session() as crashed:
+                outcome, thread = self.wait_for_session(pool)
+                raise WebDriverException("session crashed")
+        thread.join(5)
+        self.assertEqual(len(outcome), 1)
+        self.assertIsInstance(outcome[0], FakeDriver)
+        self.assertIsNot(outcome[0], crashed)
+        self.assertTrue(crashed.quit_called)
+        pool.close()
+
+    def test_waiter_gets_the_returned_session(self):
+        from package.BrowserPool import BrowserPool
+        pool = BrowserPool(size=1, driver_factory=FakeDriver)
+        with pool.session() as driver:
+            outcome, thread = self.wait_for_session(pool)
+        thread.join(5)
+        self.assertEqual(outcome, [driver])
+        pool.close()
+
+    def test_waiter_fails_when_the_pool_is_closed(self):
+        from package.BrowserPool import BrowserPool
+        pool = BrowserPool(size=1, driver_factory=FakeDriver)
+        with pool.session() as driver:
+            outcome, thread = self.wait_for_session(pool)
+            pool.close()
+            thread.join(5)
+            self.assertEqual(len(outcome), 1)
+            self.assertIsInstance(outcome[0], ValueError)
+        # a session returned to a closed pool is shut down
+        self.assertTrue(driver.quit_called)
+
+
+@unittest.skipUnless(HAS_BACKENDS, "needs numpy, PIL and selenium")
+class BrowserPoolTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        driver = start_browser()
+        if driver is None:
+            raise unittest.SkipTest("no headless Chrome available")
+        driver.quit()
+
+    def setUp(self):
+        from PIL import Image
+        from package.image_io import crop_board_image
+        import numpy as np
+        # a static stand-in for the site: one page whose board is the solved example
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        image = np.array(Image.open(os.path.join(EXAMPLES, "solved_10.png")).convert("RGB"))
+        Image.fromarray(crop_board_image(image)).save(os.path.join(directory.name, "board.png"))
+        with open(os.path.join(directory.name, "index.html"), 'w') as file:
+            file.write(STAND_IN_PAGE)
+        handler = functools.partial(QuietHandler, directory=directory.name)
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        self.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    def test_scrapes_local_stand_in(self):
+        from package.BrowserPool import BrowserPool
+        from package.io import load_board_from_image
+        expected = load_board_from_image(os.path.join(EXAMPLES, "solved_10.png"))
+        with BrowserPool(size=2, base_url=self.base_url) as pool:
+            boards = pool.scrape_boards([10, 10, 10])
+            self.assertLessEqual(pool._started, 2)
+        self.assertEqual([str(board) for board in boards], [str(expected)] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import tempfile
+import unittest
+from package.PuzzleCorpus import PuzzleCorpus
+from package.encoding import decode_board, encode_board
+
+BENCHMARK_CORPUS = os.path.join(os.path.dirname(__file__), "..", "benchmarks", "corpus.txt")
+
+
+class PuzzleCorpusTest(unittest.TestCase):
+    def test_named_lines_and_comments(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corpus.txt")
+            with open(path, 'w') as file:
+                file.write("# a comment\n\nempty_5 5:.X.a2.dX.j2.X\n# another one\n5:Xx\n")
+            with PuzzleCorpus(path) as corpus:
+                self.assertEqual(len(corpus), 2)
+                self.assertEqual([corpus.name(0), corpus.name(1)], ["empty_5", None])
+                self.assertEqual([encode_board(board) for board in corpus], ["5:.X.a2.dX.j2.X", "5:Xx"])
+
+    def test_benchmark_corpus(self):
+        with PuzzleCorpus(BENCHMARK_CORPUS) as corpus:
+            self.assertGreater(len(corpus), 0)
+            for i, board in enumerate(corpus):
+                self.assertIsNotNone(corpus.name(i))
+                self.assertEqual(decode_board(encode_board(board)).board, board.board)
+
+    def test_binary_round_trip(self):
+        boards = [decode_board("5:.X.a2.dX.j2.X"), decode_board("5:Xx")]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "corpus.bin")
+            PuzzleCorpus.write_binary(path, boards)
+            with PuzzleCorpus(path) as corpus:
+                self.assertEqual([encode_board(board) for board in corpus], [encode_board(board) for board in boards])
+                self.assertIsNone(corpus.name(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,49 @@
+import os
+import unittest
+from package.Cell import Cells
+from package.RectangleSolver import RectangleSolver
+from package.Solver import Solver
+from package.encoding import encode_board
+from package.io import load_board_from_text
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+def solutions(boards):
+    return sorted(encode_board(board) for board in boards)
+
+
+class RectangleSolverTest(unittest.TestCase):
+    def setUp(self):
+        self.puzzle = load_board_from_text(os.path.join(EXAMPLES, "error_board.txt"))
+        self.solution = Solver(self.puzzle.copy()).solve()[0]
+
+    def partly_decided(self, keep_every: int):
+        """The solution with all but every keep_every-th white cell undecided again."""
+        board = self.solution.copy()
+        for i, (loc, cell) in enumerate(self.solution):
+            if (cell.is_triangle or cell == Cells.DECIDED_EMPTY) and i % keep_every:
+                board[loc] = Cells.UNDECIDED
+        return board
+
+    def test_puzzle(self):
+        self.assertEqual(solutions(RectangleSolver(self.puzzle).solve()), solutions([self.solution]))
+
+    def test_partly_decided_board(self):
+        for keep_every in (2, 3, 7):
+            board = self.partly_decided(keep_every)
+            self.assertEqual(solutions(RectangleSolver(board).solve()), solutions(Solver(board.copy()).solve()))
+            self.assertEqual(solutions(RectangleSolver(board).solve()), solutions([self.solution]))
+
+    def test_solved_board(self):
+        self.assertEqual(solutions(RectangleSolver(self.solution).solve()), solutions([self.solution]))
+
+    def test_contradicting_decided_cell(self):
+        board = self.partly_decided(2)
+        loc = next(loc for loc, cell in board if cell.is_triangle)
+        board[loc] = Cells.DECIDED_EMPTY
+        self.assertEqual(RectangleSolver(board).solve(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import json
+import os
+import tempfile
+import unittest
+from package.Board import undecided_board
+from package.SearchHooks import ChromeTraceExporter, SearchHooks
+from package.Solver import Solver
+from package.io import load_board_from_text
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+class BranchRecorder(SearchHooks):
+    """Checks that branches nest, and keeps the solutions reported by the outermost ones."""
+    def __init__(self, test: unittest.TestCase):
+        self.test = test
+        self.open = []
+        self.entered = 0
+        self.top_level_solutions = 0
+
+    def on_branch_entered(self, solver, loc, cell):
+        if self.open:
+            self.test.assertEqual(solver.depth, self.open[-1][2] + 1)
+        self.open.append((loc, cell, solver.depth))
+        self.entered += 1
+
+    def on_branch_exited(self, solver, loc, cell, solutions):
+        self.test.assertTrue(self.open, "exited a branch that was never entered")
+        self.test.assertEqual(self.open.pop()[:2], (loc, cell))
+        if not self.open:
+            self.top_level_solutions += solutions
+
+
+class SearchHooksTest(unittest.TestCase):
+    def setUp(self):
+        self.boards = {
+            "error_board": load_board_from_text(os.path.join(EXAMPLES, "error_board.txt")),
+            "undecided_4": undecided_board(4),
+        }
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def check(self, solve):
+        for name, board in self.boards.items():
+            with self.subTest(board=name):
+                recorder = BranchRecorder(self)
+                solver = Solver(board.copy(), break_symmetry=False, hooks=[recorder])
+                solutions = solve(solver)
+                self.assertEqual(recorder.open, [])
+                self.assertGreater(recorder.entered, 0)
+                self.assertEqual(recorder.entered, solver.stats.decisions)
+                self.assertEqual(recorder.top_level_solutions, solutions)
+
+    def test_recursive_search(self):
+        self.check(lambda solver: len(solver.solve()))
+
+    def test_checkpointed_search(self):
+        path = os.path.join(self.directory.name, "search.checkpoint")
+        def solve(solver):
+            solver.checkpoint_path = path
+            return len(solver.solve())
+        self.check(solve)
+
+    def test_counting(self):
+        self.check(lambda solver: solver.count_solutions())
+
+    def test_symmetric_root_branches_on_children(self):
+        recorder = BranchRecorder(self)
+        solutions = Solver(undecided_board(4), hooks=[recorder]).solve()
+        self.assertEqual(recorder.open, [])
+        self.assertGreater(recorder.entered, 0)
+        self.assertEqual(len(solutions), 23)
+
+    def test_chrome_trace_of_checkpointed_search(self):
+        exporter = ChromeTraceExporter()
+        Solver(self.boards["error_board"].copy(), hooks=[exporter],
+               checkpoint_path=os.path.join(self.directory.name, "trace.checkpoint")).solve()
+        phases = [event["ph"] for event in exporter.to_dict()["traceEvents"] if event["cat"] == "branch"]
+        self.assertGreater(len(phases), 0)
+        self.assertEqual(phases.count("B"), phases.count("E"))
+        json.dumps(exporter.to_dict())
+
+
+if __name__ == "__main__":
+    unittest.main()
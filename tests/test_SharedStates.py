@@ -0,0 +1,50 @@
+import multiprocessing
+import os
+import unittest
+from package.SharedStates import SharedStates
+from package.Solver import Solver
+from package.encoding import encode_board
+from package.io import load_board_from_text
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+def copy_slot(states: SharedStates, source: int, target: int, connection) -> None:
+    """Runs in the worker: reads a state, sends it back encoded, and puts it into another slot."""
+    board, undecided = states.get(source)
+    connection.send((encode_board(board), undecided.to_bytes(states.size)))
+    states.put(target, board, undecided)
+    states.close()
+
+
+class SharedStatesTest(unittest.TestCase):
+    def test_worker_attaches_to_the_same_block(self):
+        solver = Solver(load_board_from_text(os.path.join(EXAMPLES, "error_board.txt")))
+        expected = (encode_board(solver.board), solver.undecided.to_bytes(solver.board.size))
+        states = SharedStates(solver.board.size, 2)
+        self.addCleanup(states.unlink)
+        self.addCleanup(states.close)
+        states.put(0, solver.board, solver.undecided)
+
+        # spawn pickles the arguments, as a pool or a queue would
+        context = multiprocessing.get_context("spawn")
+        receiver, sender = context.Pipe(duplex=False)
+        worker = context.Process(target=copy_slot, args=(states, 0, 1, sender))
+        worker.start()
+        sender.close()
+        self.assertEqual(receiver.recv(), expected)
+        worker.join()
+        self.assertEqual(worker.exitcode, 0)
+
+        board, undecided = states.get(1)
+        self.assertEqual((encode_board(board), undecided.to_bytes(board.size)), expected)
+
+    def test_slot_out_of_range(self):
+        with SharedStates(5, 1) as states:
+            self.addCleanup(states.unlink)
+            with self.assertRaises(IndexError):
+                states.get(1)
+
+
+if __name__ == "__main__":
+    unittest.main()
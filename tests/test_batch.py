@@ -0,0 +1,54 @@
+import importlib.util
+import os
+import tempfile
+import unittest
+from package.batch import find_puzzles, solve_batch
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+HAS_IMAGE_BACKEND = all(importlib.util.find_spec(name) is not None for name in ("numpy", "PIL"))
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+
+    def path(self, name: str, content: str) -> str:
+        path = os.path.join(self.directory.name, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_bad_entries_only_fail_themselves(self):
+        good = os.path.join(EXAMPLES, "error_board.txt")
+        unknown = self.path("notes.xyz", "")
+        corpus = self.path("corpus.txt", "5:.X.a2.dX.j2.X\nnot a board\n")
+        missing_pattern = os.path.join(self.directory.name, "nothing*")
+        missing_corpus = os.path.join(self.directory.name, "missing.txt")
+        puzzles = find_puzzles([good, unknown, missing_pattern], [corpus, missing_corpus])
+        results = list(solve_batch(puzzles, workers=1, timeout=60))
+
+        self.assertEqual([result["id"] for result in results],
+                         [good, unknown, missing_pattern, f"{corpus}:0", f"{corpus}:1", missing_corpus])
+        self.assertEqual([result["status"] for result in results],
+                         ["solved", "error", "error", "solved", "error", "error"])
+
+    def test_error_while_listing_puzzles(self):
+        def puzzles():
+            yield "first", 'text', os.path.join(EXAMPLES, "error_board.txt")
+            raise OSError("disk went away")
+
+        results = list(solve_batch(puzzles(), workers=1, timeout=60))
+        self.assertEqual([result["status"] for result in results], ["solved", "error"])
+        self.assertIn("disk went away", results[1]["error"])
+
+    @unittest.skipUnless(HAS_IMAGE_BACKEND, "needs numpy and PIL")
+    def test_rectangles_engine_on_partly_solved_screenshot(self):
+        puzzles = find_puzzles([os.path.join(EXAMPLES, "solved_10.png")])
+        results = list(solve_batch(puzzles, workers=1, timeout=60, engine="rectangles"))
+        self.assertEqual(results[0]["status"], "solved")
+        self.assertEqual(results[0]["solutions"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
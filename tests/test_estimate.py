@@ -0,0 +1,56 @@
+import os
+import unittest
+from package.Solver import Solver
+from package.estimate import SearchEstimator, estimate_tree_size
+from package.io import load_board_from_text
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+class Snapshots(SearchEstimator):
+    """Keeps what estimate() says after every given number of branches."""
+    def __init__(self, tree, every: int):
+        super().__init__(tree)
+        self.every = every
+        self.snapshots = []
+
+    def on_branch_entered(self, solver, loc, cell):
+        super().on_branch_entered(solver, loc, cell)
+        if self.branches % self.every == 0:
+            self.snapshots.append(self.estimate())
+
+
+class EstimateTest(unittest.TestCase):
+    def setUp(self):
+        self.board = load_board_from_text(os.path.join(EXAMPLES, "error_board.txt"))
+        solver = Solver(self.board.copy())
+        solver.solve()
+        self.actual = solver.stats.decisions
+
+    def test_tree_size_against_solve(self):
+        for seed in range(4):
+            tree = estimate_tree_size(self.board, seed=seed)
+            self.assertLess(self.actual / 2, tree.branches, f"seed {seed}")
+            self.assertLess(tree.branches, self.actual * 2, f"seed {seed}")
+            self.assertLessEqual(tree.low, tree.high)
+
+    def test_running_estimate_against_solve(self):
+        estimator = Snapshots(estimate_tree_size(self.board, seed=0), every=10)
+        Solver(self.board.copy(), hooks=[estimator]).solve()
+        self.assertEqual(estimator.branches, self.actual)
+        self.assertTrue(estimator.snapshots)
+        for estimate in estimator.snapshots:
+            self.assertLess(self.actual / 2, estimate.estimated_branches, f"after {estimate.branches} branches")
+            self.assertLess(estimate.estimated_branches, self.actual * 2, f"after {estimate.branches} branches")
+            self.assertGreaterEqual(estimate.remaining_seconds, 0)
+
+    def test_without_probes(self):
+        estimator = SearchEstimator()
+        self.assertIsNone(estimator.estimate().estimated_branches)
+        Solver(self.board.copy(), hooks=[estimator]).solve()
+        self.assertAlmostEqual(estimator.done, 1.0)
+        self.assertAlmostEqual(estimator.estimate().estimated_branches, self.actual)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import importlib.util
+import os
+import subprocess
+import sys
+import unittest
+from benchmarks.import_time import batch_without_backends, read_corpus_without_backends
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+HEAVY_BACKENDS = ("selenium", "numpy", "PIL")
+
+
+class ImportTest(unittest.TestCase):
+    def loaded_backends(self, code: str) -> list:
+        """The heavy backends in sys.modules after running code in a fresh interpreter."""
+        check = f"{code}\nimport sys\nprint(' '.join(name for name in {HEAVY_BACKENDS!r} if name in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", check], cwd=ROOT, capture_output=True, text=True, check=True)
+        return result.stdout.split()
+
+    def test_text_boards_and_solver_import_no_backends(self):
+        self.assertEqual(self.loaded_backends("import package.io\nfrom package.Solver import Solver"), [])
+
+    def test_solving_a_text_board_imports_no_backends(self):
+        code = ("from package.Solver import Solver\nfrom package.io import load_board_from_text\n"
+                "Solver(load_board_from_text('examples/error_board.txt')).solve()")
+        self.assertEqual(self.loaded_backends(code), [])
+
+    @unittest.skipUnless(importlib.util.find_spec("numpy") and importlib.util.find_spec("PIL"), "needs numpy and PIL")
+    def test_image_backend_loads_on_first_use(self):
+        self.assertEqual(self.loaded_backends("import package.io\npackage.io.load_board_from_image"), ["numpy", "PIL"])
+
+    def test_text_corpus_without_backends(self):
+        count, error = read_corpus_without_backends()
+        self.assertIsNone(error)
+        self.assertGreater(count, 0)
+
+    def test_batch_corpus_without_backends(self):
+        results, error = batch_without_backends()
+        self.assertIsNone(error)
+        self.assertEqual(len(results), read_corpus_without_backends()[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import contextlib
+import importlib.util
+import io
+import os
+import shutil
+import tempfile
+import unittest
+from package.io import load_board_from_text
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+HAS_IMAGE_BACKEND = all(importlib.util.find_spec(name) is not None for name in ("numpy", "PIL"))
+
+
+@unittest.skipUnless(HAS_IMAGE_BACKEND, "needs numpy and PIL")
+class IngestOutputTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.shots = os.path.join(directory.name, "shots")
+        self.output_dir = os.path.join(directory.name, "boards")
+
+    def add_shot(self, name: str, example: str = "solved_10.png") -> None:
+        path = os.path.join(self.shots, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copy(os.path.join(EXAMPLES, example), path)
+
+    def ingest(self, source: str) -> None:
+        from package.ingest import main
+        with contextlib.redirect_stdout(io.StringIO()):
+            main([source, "--workers", "1", "--output-dir", self.output_dir])
+
+    def test_same_names_in_different_directories(self):
+        from package.io import load_board_from_image
+        self.add_shot(os.path.join("a", "board.png"))
+        self.add_shot(os.path.join("b", "c", "board.png"), "empty_10.png")
+        self.ingest(os.path.join(self.shots, "**", "*.png"))
+        for name, example in [(os.path.join("a", "board.txt"), "solved_10.png"),
+                              (os.path.join("b", "c", "board.txt"), "empty_10.png")]:
+            board = load_board_from_text(os.path.join(self.output_dir, name))
+            self.assertEqual(str(board), str(load_board_from_image(os.path.join(EXAMPLES, example))))
+
+    def test_images_sharing_an_output_are_refused(self):
+        self.add_shot("board.png")
+        self.add_shot("board.PNG")
+        with contextlib.redirect_stderr(io.StringIO()) as stderr, self.assertRaises(SystemExit):
+            self.ingest(self.shots)
+        self.assertIn("would both be written to", stderr.getvalue())
+        self.assertFalse(os.path.exists(self.output_dir))
+
+    def test_source_root(self):
+        from package.ingest import source_root
+        os.makedirs(self.shots)
+        self.assertEqual(source_root(self.shots), self.shots)
+        self.assertEqual(source_root(os.path.join("shots", "**", "*.png")), "shots")
+        self.assertEqual(source_root(os.path.join("shots", "2024-*", "*.png")), "shots")
+        self.assertEqual(source_root("*.png"), os.curdir)
+
+
+if __name__ == "__main__":
+    unittest.main()
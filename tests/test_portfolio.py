@@ -0,0 +1,46 @@
+import os
+import unittest
+from package.Cell import Cells
+from package.Solver import Solver
+from package.encoding import encode_board
+from package.io import load_board_from_text
+from package.portfolio import DEFAULT_PORTFOLIO, SolverConfig, solve_portfolio
+
+EXAMPLES = os.path.join(os.path.dirname(__file__), "..", "examples")
+
+
+class PortfolioTest(unittest.TestCase):
+    def setUp(self):
+        self.puzzle = load_board_from_text(os.path.join(EXAMPLES, "error_board.txt"))
+        self.solution = Solver(self.puzzle.copy()).solve()[0]
+
+    def test_default_portfolio(self):
+        result = solve_portfolio(self.puzzle, DEFAULT_PORTFOLIO, timeout=60)
+        self.assertEqual(result.status, "solved")
+        self.assertEqual([encode_board(board) for board in result.solutions], [encode_board(self.solution)])
+
+    def test_every_engine_solves_a_partly_decided_board(self):
+        board = self.solution.copy()
+        for i, (loc, cell) in enumerate(self.solution):
+            if (cell.is_triangle or cell == Cells.DECIDED_EMPTY) and i % 3:
+                board[loc] = Cells.UNDECIDED
+        for config in DEFAULT_PORTFOLIO:
+            result = solve_portfolio(board, [config], timeout=60)
+            self.assertEqual(result.status, "solved", config.name)
+            self.assertEqual([encode_board(board) for board in result.solutions], [encode_board(self.solution)])
+
+    def test_failing_configuration_drops_out(self):
+        failing = SolverConfig("failing", probe_level=-1)
+        result = solve_portfolio(self.puzzle, [failing, SolverConfig("default")], timeout=60)
+        self.assertEqual(result.status, "solved")
+        self.assertEqual(result.winner.name, "default")
+        self.assertIn("ValueError", result.errors["failing"])
+
+    def test_every_configuration_failing(self):
+        result = solve_portfolio(self.puzzle, [SolverConfig("failing", probe_level=-1)], timeout=60)
+        self.assertEqual(result.status, "error")
+        self.assertIsNone(result.winner)
+
+
+if __name__ == "__main__":
+    unittest.main()
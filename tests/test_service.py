@@ -0,0 +1,32 @@
+import unittest
+from unittest import mock
+from package.service import ServiceClient, SolverService
+
+
+class ServiceTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.service = SolverService(workers=1)
+        self.server = await self.service.serve(port=0)
+        self.client = ServiceClient(port=self.server.sockets[0].getsockname()[1])
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.service.close()
+
+    async def test_unexpected_error_is_a_500(self):
+        with mock.patch.object(self.service, "get", side_effect=RuntimeError("lost the job table")):
+            with self.assertRaisesRegex(ValueError, "500: RuntimeError: lost the job table"):
+                await self.client.status("0")
+        # the server keeps answering
+        with self.assertRaisesRegex(ValueError, "404"):
+            await self.client.status("0")
+
+    async def test_events_of_unknown_job_is_a_404(self):
+        with self.assertRaisesRegex(ValueError, "404"):
+            async for _ in self.client.events("0"):
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()